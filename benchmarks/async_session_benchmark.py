@@ -0,0 +1,52 @@
+"""
+Throughput of the AsyncClient with and without the shared session, for 1/10/100
+concurrent calls.
+
+    python benchmarks/async_session_benchmark.py [n_requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trbinance import AsyncClient
+from stand_in import StandInServer
+
+
+async def unpooled_call(url):
+    # what AsyncClient._request used to do: a fresh session (and connection) per call
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as response:
+            await response.json()
+
+
+async def run(call, n, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(n)])
+    return n / (time.perf_counter() - start)
+
+
+async def main(n=2000):
+    with StandInServer() as server:
+        url = server.urls["base"] + "/common/time"
+        print(f"requests: {n}")
+        print(f"{'concurrency':>12} {'unpooled req/s':>15} {'pooled req/s':>13} {'speedup':>8}")
+        async with AsyncClient(urls=server.urls) as client:
+            for concurrency in [1, 10, 100]:
+                unpooled_rps = await run(lambda: unpooled_call(url), n, concurrency)
+                pooled_rps = await run(client.check_server_time, n, concurrency)
+                print(f"{concurrency:>12} {unpooled_rps:>15.0f} {pooled_rps:>13.0f} {pooled_rps / unpooled_rps:>7.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*[int(x) for x in sys.argv[1:]]))
@@ -0,0 +1,61 @@
+"""
+Decode + normalize time per endpoint: stdlib json followed by the float() pass of the format_*
+helpers (what the clients did before the Decoder) against the Decoder backends.
+
+    python benchmarks/decode_benchmark.py [repeat]
+"""
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trbinance.decoder import Decoder, orjson
+from trbinance.helper import format_order_data, format_balance, format_market_data
+import payloads
+
+
+def normalize_depth(data, convert):
+    if convert:
+        for key in ['bids', 'asks']:
+            data[key] = [[float(value) for value in entry] for entry in data[key]]
+    return data
+
+
+# endpoint -> (method, endpoint, body, normalization done by the client after decoding)
+CASES = {
+    "depth 5000": ("GET", "/v3/depth", payloads.depth(5000), normalize_depth),
+    "trading-pairs 1000": ("GET", "/market/trading-pairs", payloads.trading_pairs(1000),
+                           lambda data, convert: [format_market_data(i, convert) for i in data["data"]["list"]]),
+    "orders 1000": ("GET", "/orders", payloads.orders(1000),
+                    lambda data, convert: [format_order_data(i, convert) for i in data["data"]["list"]]),
+    "account 500 assets": ("GET", "/account/spot", payloads.account(500),
+                           lambda data, convert: format_balance(data["data"]["accountAssets"], convert)),
+}
+
+
+def main(repeat=50):
+    decoders = {"legacy json": Decoder("json", numeric=None), "json + hook": Decoder("json")}
+    if orjson is not None:
+        decoders["orjson"] = Decoder("orjson")
+    else:
+        print("orjson is not installed, skipping it")
+
+    print(f"{'endpoint':<20}" + "".join(f"{name:>14}" for name in decoders) + f"{'best speedup':>14}")
+    for case, (method, endpoint, payload, normalize) in CASES.items():
+        body = json.dumps(payload).encode()
+        timings = []
+        for decoder in decoders.values():
+            fields = decoder.fields_for(method, endpoint)
+            convert = decoder.numeric is None
+
+            def run():
+                normalize(decoder.decode(body, fields), convert)
+
+            timings.append(min(timeit.repeat(run, number=5, repeat=repeat)) / 5 * 1000)
+        print(f"{case:<20}" + "".join(f"{t:>11.2f} ms" for t in timings) + f"{timings[0] / min(timings):>13.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
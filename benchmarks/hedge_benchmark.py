@@ -0,0 +1,69 @@
+"""
+Tail latency of GET requests with and without hedging, against the stand-in server with injected
+latency: most answers take a few ms, `slow_ratio` of them stall for `stall` seconds.
+
+    python benchmarks/hedge_benchmark.py [n_requests]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trbinance import AsyncClient, HedgePolicy
+from stand_in import StandInServer, SERVER_TIME
+
+FAST = 0.003
+SLOW_RATIO = 0.03
+STALL = 0.3
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+async def run(client, n, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await client.check_server_time()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[one() for _ in range(n)])
+    return latencies
+
+
+async def main(n=1000, concurrency=10):
+    rng = random.Random(42)
+
+    async def server_time(request):
+        await asyncio.sleep(STALL if rng.random() < SLOW_RATIO else FAST)
+        return SERVER_TIME
+
+    policies = {
+        "no hedging": None,
+        "fixed 20ms": HedgePolicy(delay=0.02),
+        "adaptive p95": HedgePolicy(percentile=95, initial_delay=0.02),
+    }
+    with StandInServer({"GET /open/v1/common/time": server_time}) as server:
+        print(f"requests: {n}, concurrency: {concurrency}, {SLOW_RATIO:.0%} of answers stall {STALL * 1000:.0f} ms")
+        print(f"{'policy':<14} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'extra requests':>15}")
+        for name, policy in policies.items():
+            async with AsyncClient(urls=server.urls, rate_limit=False, hedge=policy) as client:
+                # warm the connection pool and the adaptive delay
+                await run(client, 100, concurrency)
+                sent = server.requests
+                latencies = await run(client, n, concurrency)
+                extra = (server.requests - sent - n) / n
+            print(f"{name:<14} {percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} "
+                  f"{max(latencies) * 1000:>8.1f} {extra:>14.1%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*[int(x) for x in sys.argv[1:]]))
@@ -0,0 +1,62 @@
+"""
+Cost of the request instrumentation: the bookkeeping of one request on its own (timer, phase
+marks, histogram updates), and sync + async throughput against the stand-in server with metrics
+off and on.
+
+    python benchmarks/metrics_benchmark.py [n_requests]
+"""
+import asyncio
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trbinance import Client, AsyncClient, Metrics
+from stand_in import StandInServer
+
+
+def bookkeeping():
+    metrics = Metrics()
+
+    def one():
+        timer = metrics.timer("GET", "/orders")
+        for phase in ["queue", "sign", "transfer", "decode"]:
+            timer.mark(phase)
+        timer.finish()
+
+    number = 20000
+    return min(timeit.repeat(one, number=number, repeat=5)) / number * 1e6
+
+
+def sync_rps(server, n, metrics):
+    with Client(urls=server.urls, rate_limit=False, metrics=metrics) as client:
+        client.check_server_time()
+        start = time.perf_counter()
+        for _ in range(n):
+            client.check_server_time()
+        return n / (time.perf_counter() - start)
+
+
+async def async_rps(server, n, metrics):
+    async with AsyncClient(urls=server.urls, rate_limit=False, metrics=metrics) as client:
+        await client.check_server_time()
+        start = time.perf_counter()
+        for _ in range(n):
+            await client.check_server_time()
+        return n / (time.perf_counter() - start)
+
+
+def main(n=2000):
+    print(f"bookkeeping per request: {bookkeeping():.2f} µs")
+    with StandInServer() as server:
+        print(f"{'client':<8} {'off req/s':>10} {'on req/s':>10}")
+        for name, run in [("sync", lambda m: sync_rps(server, n, m)),
+                          ("async", lambda m: asyncio.run(async_rps(server, n, m)))]:
+            off, on = run(None), run(True)
+            print(f"{name:<8} {off:>10.0f} {on:>10.0f}")
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
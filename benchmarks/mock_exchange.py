@@ -0,0 +1,131 @@
+"""
+Mock TrBinance exchange for the benchmark suite, built on the stand-in server.
+
+Implements the /open/v1 endpoints the clients trade through (orders, order detail, cancel,
+order history, account, symbols, server time) with orders kept in memory, and the /api/v3
+depth-family market data endpoints (depth, trades, aggTrades, klines). Latency and payload
+sizes are configurable, payloads are generated deterministically so runs are comparable.
+"""
+import bisect
+import json
+import random
+import threading
+
+from trbinance.defines import KLINE_INTERVAL_MS
+import payloads
+from stand_in import StandInServer
+
+LAST_TRADE_ID = 10 ** 9
+
+
+class MockExchange(StandInServer):
+    def __init__(self, latency=0.0, jitter=0.0, n_symbols=200, depth_levels=5000, history=5000, n_assets=500,
+                 seed=1):
+        """
+        Args:
+            latency (float, optional): seconds slept before every response. Defaults to 0.
+            jitter (float, optional): up to this many seconds added to the latency at random. Defaults to 0.
+            n_symbols (int, optional): markets listed by /common/symbols, the first one is BTC_TRY. Defaults to 200.
+            depth_levels (int, optional): levels per side the order book has, depth limits are capped by it.
+                Defaults to 5000.
+            history (int, optional): orders in the account history before any are placed. Defaults to 5000.
+            n_assets (int, optional): assets of /account/spot. Defaults to 500.
+        """
+        rng = random.Random(seed)
+        super().__init__(latency=(lambda: latency + rng.random() * jitter) if jitter else latency)
+        self.depth_levels = depth_levels
+        self.orders = {}
+        self.order_ids = []
+        for i in range(history):
+            self._store(payloads.order(i + 1, status=rng.choice([2, 3])))
+        self._next_id = history + 1
+        self._lock = threading.Lock()
+        # static bodies are encoded once, only the order endpoints build responses per request
+        self._symbols = json.dumps(payloads.symbols(n_symbols))
+        self._account = json.dumps(payloads.account(n_assets))
+        self._depth = {}
+        self.routes.update({
+            "GET /open/v1/common/symbols": self._symbols,
+            "GET /open/v1/account/spot": self._account,
+            "POST /open/v1/orders": self.create_order,
+            "GET /open/v1/orders": self.all_orders,
+            "GET /open/v1/orders/detail": self.query_order,
+            "POST /open/v1/orders/cancel": self.cancel_order,
+            "GET /api/v3/depth": self.depth,
+            "GET /api/v3/trades": self.trades,
+            "GET /api/v3/aggTrades": self.agg_trades,
+            "GET /api/v1/klines": self.klines,
+        })
+
+    def _store(self, order):
+        self.orders[order["orderId"]] = order
+        self.order_ids.append(int(order["orderId"]))
+
+    @staticmethod
+    def _error(code, msg):
+        return {"code": code, "msg": msg, "timestamp": 1681279199188}
+
+    async def create_order(self, request):
+        form = await request.post()
+        with self._lock:
+            order_id = self._next_id
+            self._next_id += 1
+        order = payloads.order(order_id, symbol=form["symbol"], side=int(form["side"]),
+                               price=form.get("price", "0"), quantity=form.get("quantity", "0"))
+        order["type"] = int(form["type"])
+        self._store(order)
+        return payloads.envelope(order)
+
+    def query_order(self, request):
+        order = self.orders.get(request.query.get("orderId"))
+        if order is None:
+            return self._error(-2013, "Order does not exist.")
+        return payloads.envelope(order)
+
+    async def cancel_order(self, request):
+        form = await request.post()
+        order = self.orders.get(form.get("orderId"))
+        if order is None:
+            return self._error(-2011, "Unknown order sent.")
+        order["status"] = 3
+        return payloads.envelope(order)
+
+    def all_orders(self, request):
+        # history oldest first, paged by fromId like the exchange
+        limit = min(int(request.query.get("limit", 500)), 1000)
+        from_id = int(request.query.get("fromId", 0))
+        symbol = request.query.get("symbol")
+        page = []
+        # ids only ever grow, so the history list stays sorted
+        for order_id in self.order_ids[bisect.bisect_left(self.order_ids, from_id):]:
+            order = self.orders[str(order_id)]
+            if symbol is None or order["symbol"] == symbol:
+                page.append(order)
+                if len(page) == limit:
+                    break
+        return payloads.envelope({"list": page})
+
+    def depth(self, request):
+        limit = min(int(request.query.get("limit", 100)), self.depth_levels)
+        body = self._depth.get(limit)
+        if body is None:
+            body = self._depth[limit] = json.dumps(payloads.depth(limit))
+        return body
+
+    def trades(self, request):
+        return payloads.trades(min(int(request.query.get("limit", 500)), 1000),
+                               int(request.query.get("fromId", LAST_TRADE_ID)))
+
+    def agg_trades(self, request):
+        return payloads.agg_trades(min(int(request.query.get("limit", 500)), 1000),
+                                   int(request.query.get("fromId", LAST_TRADE_ID)))
+
+    def klines(self, request):
+        interval_ms = KLINE_INTERVAL_MS[request.query["interval"]]
+        limit = min(int(request.query.get("limit", 500)), 1000)
+        start_time = int(request.query.get("startTime", 1681279140000))
+        start_time -= start_time % interval_ms
+        end_time = request.query.get("endTime")
+        if end_time is not None:
+            limit = max(min(limit, (int(end_time) - start_time) // interval_ms + 1), 0)
+        return payloads.klines(start_time, interval_ms, limit)
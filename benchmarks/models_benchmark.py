@@ -0,0 +1,53 @@
+"""
+Memory held and build time of formatted order dicts against slotted Order models, starting from
+the response body of all_orders.
+
+    python benchmarks/models_benchmark.py [n_orders]
+"""
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trbinance.helper import format_order_data
+from trbinance.models import Order
+import payloads
+
+
+def as_dicts(body):
+    return [format_order_data(i) for i in json.loads(body)["data"]["list"]]
+
+
+def as_models(body):
+    return [Order.from_raw(i) for i in json.loads(body)["data"]["list"]]
+
+
+def held_bytes(build, body):
+    gc.collect()
+    tracemalloc.start()
+    result = build(body)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main(n=50000):
+    body = json.dumps(payloads.orders(n)).encode()
+    print(f"orders: {n}")
+    print(f"{'output':<8} {'decode+build us/order':>22} {'bytes/order':>12}")
+    for name, build in [("dict", as_dicts), ("Order", as_models)]:
+        start = time.perf_counter()
+        build(body)
+        elapsed = time.perf_counter() - start
+        result, size = held_bytes(build, body)
+        print(f"{name:<8} {elapsed / n * 1e6:>22.2f} {size / n:>12.0f}")
+        del result
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,89 @@
+"""
+Response payloads shaped like the TrBinance api responses, used by the stand-in server and the benchmarks.
+
+Values are generated deterministically so runs are comparable.
+"""
+import random
+
+
+def envelope(data, timestamp=1681279199188):
+    return {"code": 0, "msg": "success", "data": data, "timestamp": timestamp}
+
+
+def depth(levels=5000, mid=520000.0, tick=1.0, last_update_id=1000):
+    rng = random.Random(levels)
+    return {
+        "lastUpdateId": last_update_id,
+        "bids": [[f"{mid - tick * (i + 1):.8f}", f"{rng.random():.8f}"] for i in range(levels)],
+        "asks": [[f"{mid + tick * (i + 1):.8f}", f"{rng.random():.8f}"] for i in range(levels)],
+    }
+
+
+def order(order_id, symbol="BTC_TRY", status=0, side=0, price="520000", quantity="0.001"):
+    return {
+        "orderId": str(order_id), "bOrderListId": "0", "clientId": f"c{order_id:032d}", "bOrderId": str(order_id * 10),
+        "symbol": symbol, "symbolType": 1, "side": side, "type": 1, "price": price, "origQty": quantity,
+        "origQuoteQty": "520.00000000", "executedQty": "0.00000000", "executedPrice": "0",
+        "executedQuoteQty": "0.00000000", "timeInForce": 1, "stopPrice": "0", "icebergQty": "0",
+        "status": status, "createTime": 1681279199188 + order_id,
+    }
+
+
+def orders(n=1000):
+    return envelope({"list": [order(i + 1, status=i % 4) for i in range(n)]})
+
+
+def account(n_assets=500):
+    rng = random.Random(n_assets)
+    assets = [{"asset": f"A{i}", "free": f"{rng.random() * 100:.8f}", "locked": f"{rng.random() * (i % 2):.8f}"}
+              for i in range(n_assets)]
+    return envelope({"makerCommission": 10, "takerCommission": 10, "buyerCommission": 0, "sellerCommission": 0,
+                     "canTrade": 1, "canWithdraw": 1, "canDeposit": 1, "accountAssets": assets})
+
+
+def trading_pairs(n=1000):
+    rng = random.Random(n)
+    keys = ["price", "volume", "baseVolume", "amount", "quoteVolume", "low", "high", "open", "close", "change24h"]
+    return envelope({"list": [{"symbol": f"C{i}_TRY", **{key: f"{rng.random() * 1000:.8f}" for key in keys}}
+                              for i in range(n)]})
+
+
+def symbol(base, quote="TRY", symbol_type=1):
+    return {
+        "type": symbol_type, "symbol": f"{base}_{quote}", "baseAsset": base, "basePrecision": 8,
+        "quoteAsset": quote, "quotePrecision": 8, "filters": [
+            {"filterType": "PRICE_FILTER", "minPrice": "0.01000000", "maxPrice": "10000000.00000000", "tickSize": "0.01000000"},
+            {"filterType": "LOT_SIZE", "minQty": "0.00001000", "maxQty": "9000.00000000", "stepSize": "0.00001000"},
+            {"filterType": "NOTIONAL", "minNotional": "10.00000000"},
+            {"filterType": "MARKET_LOT_SIZE", "minQty": "0.00000000", "maxQty": "100.00000000", "stepSize": "0.00000000"},
+        ], "orderTypes": ["LIMIT", "MARKET"], "icebergEnable": 1, "ocoEnable": 1, "spotTradingEnable": 1,
+        "marginTradingEnable": 0, "permissions": ["SPOT"],
+    }
+
+
+def symbols(n=200):
+    return envelope({"list": [symbol("BTC")] + [symbol(f"C{i}") for i in range(n - 1)]})
+
+
+def klines(start_time, interval_ms=60000, n=500):
+    rows = []
+    for i in range(n):
+        open_time = start_time + i * interval_ms
+        price = 520000 + (i % 50)
+        rows.append([open_time, f"{price:.2f}", f"{price + 5:.2f}", f"{price - 5:.2f}", f"{price + 1:.2f}",
+                     "1.25000000", open_time + interval_ms - 1, "650000.00000000", 42, "0.60000000", "312000.00000000", "0"])
+    return rows
+
+
+def trades(n=500, from_id=1, price=520000.0):
+    rng = random.Random(from_id)
+    return [{"id": from_id + i, "price": f"{price + rng.randint(-50, 50):.8f}", "qty": f"{rng.random():.8f}",
+             "quoteQty": f"{rng.random() * price:.8f}", "time": 1681279199188 + (from_id + i) * 10,
+             "isBuyerMaker": bool(i % 2), "isBestMatch": True} for i in range(n)]
+
+
+def agg_trades(n=500, from_id=1, price=520000.0):
+    rng = random.Random(from_id)
+    return [{"a": from_id + i, "p": f"{price + rng.randint(-50, 50):.8f}", "q": f"{rng.random():.8f}",
+             "f": (from_id + i) * 2, "l": (from_id + i) * 2 + 1, "T": 1681279199188 + (from_id + i) * 10,
+             "m": bool(i % 2), "M": True} for i in range(n)]
@@ -0,0 +1,49 @@
+"""
+Requests/second of the sync Client with and without the pooled session.
+
+    python benchmarks/session_benchmark.py [n_requests]
+"""
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trbinance import Client
+from stand_in import StandInServer
+
+
+def unpooled(url, n):
+    # what Client._request used to do: a fresh session (and connection) per call
+    for _ in range(n):
+        with requests.Session() as session:
+            session.get(url).json()
+
+
+def pooled(client, n):
+    for _ in range(n):
+        client.check_server_time()
+
+
+def main(n=2000):
+    with StandInServer() as server:
+        url = server.urls["base"] + "/common/time"
+        start = time.perf_counter()
+        unpooled(url, n)
+        unpooled_rps = n / (time.perf_counter() - start)
+
+        with Client(urls=server.urls) as client:
+            start = time.perf_counter()
+            pooled(client, n)
+            pooled_rps = n / (time.perf_counter() - start)
+
+    print(f"requests:  {n}")
+    print(f"unpooled:  {unpooled_rps:8.0f} req/s  {1e6 / unpooled_rps:7.0f} us/req")
+    print(f"pooled:    {pooled_rps:8.0f} req/s  {1e6 / pooled_rps:7.0f} us/req")
+    print(f"speedup:   {pooled_rps / unpooled_rps:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:]])
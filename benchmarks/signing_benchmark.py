@@ -0,0 +1,72 @@
+"""
+Signing + encoding time per private request, in µs/op: the old path (join an unencoded query, a
+new HMAC from the secret, then requests / aiohttp encoding the params again) against signing the
+once-encoded query with a copy of the pre-keyed HMAC.
+
+    python benchmarks/signing_benchmark.py [number]
+"""
+import hashlib
+import hmac
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from requests.models import RequestEncodingMixin
+from yarl import URL
+
+from trbinance.base_client import BaseClient
+
+SECRET = "NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j"
+URL_BASE = "https://www.trbinance.com/open/v1"
+
+# endpoint -> params as the client builds them before the timestamp is added
+CASES = {
+    "POST /orders": {"symbol": "BTC_USDT", "side": 0, "type": 1, "quantity": "0.00100000", "price": "26500.01",
+                     "timeInForce": 1, "clientId": "my-order-42"},
+    "GET /orders/detail": {"orderId": "123456789", "recvWindow": 5000},
+    "POST /orders/cancel": {"orderId": "123456789"},
+    "GET /orders": {"symbol": "BTC_USDT", "startTime": 1625836016000, "limit": 500},
+    "GET /account/spot": {},
+    "POST /withdraws": {"asset": "USDT", "address": "TX8w/1+2=3", "amount": 15.5, "network": "TRX"},
+}
+
+
+def legacy_signature(params):
+    query_string = '&'.join([f"{key}={value}" for key, value in params.items()])
+    return hmac.new(SECRET.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def legacy_requests(params):
+    params = {**params, "timestamp": 1625836016000}
+    params["signature"] = legacy_signature(params)
+    return RequestEncodingMixin._encode_params(params)
+
+
+def legacy_aiohttp(params):
+    params = {**params, "timestamp": 1625836016000}
+    params["signature"] = legacy_signature(params)
+    return URL(URL_BASE).with_query({key: str(value) for key, value in params.items()}).raw_query_string
+
+
+def main(number=20000):
+    client = BaseClient(secret_key=SECRET)
+
+    def single_encode(params):
+        return client._sign({**params, "timestamp": 1625836016000})
+
+    def single_encode_aiohttp(params):
+        return URL(f"{URL_BASE}?{client._sign({**params, 'timestamp': 1625836016000})}", encoded=True)
+
+    runs = {"legacy requests": legacy_requests, "legacy aiohttp": legacy_aiohttp,
+            "single encode": single_encode, "single aiohttp": single_encode_aiohttp}
+    print(f"{'endpoint':<22}" + "".join(f"{name:>18}" for name in runs))
+    for case, params in CASES.items():
+        timings = [min(timeit.repeat(lambda: run(params), number=number, repeat=5)) / number * 1e6
+                   for run in runs.values()]
+        print(f"{case:<22}" + "".join(f"{t:>13.2f} µs/op" for t in timings))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,89 @@
+"""
+Local stand-in for the TrBinance HTTP api, used by the benchmarks.
+
+Runs an aiohttp web server on 127.0.0.1 in a background thread, so it can be
+used from both sync and async benchmark code.
+"""
+import asyncio
+import json
+import threading
+
+from aiohttp import web
+
+SERVER_TIME = {"code": 0, "msg": "success", "timestamp": 1625836016000}
+
+
+class StandInServer:
+    def __init__(self, routes=None, latency=0.0):
+        """
+        Args:
+            routes (dict, optional): "METHOD /path" -> payload or callable(request) returning a payload.
+                Paths are full paths, e.g. "GET /open/v1/common/time".
+            latency (float, optional): seconds slept before every response, or a callable returning them.
+        """
+        self.routes = {"GET /open/v1/common/time": SERVER_TIME}
+        if routes:
+            self.routes.update(routes)
+        self.latency = latency
+        self.port = None
+        self.requests = 0
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def urls(self):
+        root = f"http://127.0.0.1:{self.port}"
+        return {"base": root + "/open/v1", "type1": root + "/api", "hidden": root + "/v1"}
+
+    async def _handle(self, request):
+        self.requests += 1
+        route = self.routes.get(f"{request.method} {request.path}")
+        if route is None:
+            return web.json_response({"code": -1, "msg": "not found"}, status=404)
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+        payload = route(request) if callable(route) else route
+        if asyncio.iscoroutine(payload):
+            payload = await payload
+        if isinstance(payload, web.StreamResponse):
+            return payload
+        body = payload if isinstance(payload, (bytes, str)) else json.dumps(payload)
+        return web.Response(body=body, content_type="application/json",
+                            headers={"X-MBX-USED-WEIGHT-1M": "1"})
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
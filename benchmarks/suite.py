@@ -0,0 +1,217 @@
+"""
+Benchmark suite: Client and AsyncClient against the mock exchange, on three workloads
+
+    order-entry    create_order, query_order and cancel_order round trips
+    market-data    order books of two sizes, recent trades, agg trades, klines
+    bulk-history   the whole order history through iter_all_orders, a day of 1m klines
+
+Every operation reports throughput and latency percentiles. The results are written as json so
+runs of different releases can be compared with --compare.
+
+    python benchmarks/suite.py [--quick] [--latency SECONDS] [--jitter SECONDS] [--output PATH] [--compare PATH]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trbinance import Client, AsyncClient
+from mock_exchange import MockExchange
+
+SYMBOL = "BTC/TRY"
+ORDER = {"symbol": SYMBOL, "side": "BUY", "order_type": "LIMIT", "quantity": "0.001", "price": "500000",
+         "timeInForce": 1}
+DAY_MS = 24 * 60 * 60 * 1000
+KLINES_START = 1681257600000
+
+
+def summarize(workload, client, op, latencies, seconds, items=None):
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)] * 1000
+
+    result = {"workload": workload, "client": client, "op": op, "n": len(ordered), "seconds": seconds,
+              "ops_per_s": len(ordered) / seconds, "p50_ms": percentile(50), "p90_ms": percentile(90),
+              "p99_ms": percentile(99), "max_ms": ordered[-1] * 1000}
+    if items is not None:
+        result["items"] = items
+        result["items_per_s"] = items / seconds
+    return result
+
+
+def run_sync(call, n):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(n):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latencies, time.perf_counter() - started
+
+
+async def run_async(call, n, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(n)])
+    return latencies, time.perf_counter() - started
+
+
+def market_data_calls(client):
+    return {
+        "get_order_book 100": lambda: client.get_order_book(SYMBOL, limit=100),
+        "get_order_book 1000": lambda: client.get_order_book(SYMBOL, limit=1000),
+        "get_recent_trades": lambda: client.get_recent_trades(SYMBOL, limit=500),
+        "get_agg_trades": lambda: client.get_agg_trades(SYMBOL, limit=500),
+        "get_klines": lambda: client.get_klines(SYMBOL, "1m", startTime=KLINES_START, limit=500),
+    }
+
+
+def sync_suite(server, n):
+    results = []
+    with Client("key", "secret", urls=server.urls, rate_limit=False) as client:
+        client.load_markets()
+
+        order_ids = []
+        latencies, seconds = run_sync(lambda: order_ids.append(client.create_order(**ORDER)["orderId"]), n)
+        results.append(summarize("order-entry", "sync", "create_order", latencies, seconds))
+        ids = iter(order_ids)
+        latencies, seconds = run_sync(lambda: client.query_order(next(ids)), n)
+        results.append(summarize("order-entry", "sync", "query_order", latencies, seconds))
+        ids = iter(order_ids)
+        latencies, seconds = run_sync(lambda: client.cancel_order(next(ids)), n)
+        results.append(summarize("order-entry", "sync", "cancel_order", latencies, seconds))
+
+        for op, call in market_data_calls(client).items():
+            latencies, seconds = run_sync(call, n)
+            results.append(summarize("market-data", "sync", op, latencies, seconds))
+
+        counted = []
+        latencies, seconds = run_sync(lambda: counted.append(sum(1 for _ in client.iter_all_orders(limit=500))), 3)
+        results.append(summarize("bulk-history", "sync", "iter_all_orders", latencies, seconds, sum(counted)))
+        counted = []
+        latencies, seconds = run_sync(lambda: counted.append(len(client.get_historical_klines(
+            SYMBOL, "1m", KLINES_START, KLINES_START + DAY_MS - 1)["open_time"])), 3)
+        results.append(summarize("bulk-history", "sync", "get_historical_klines", latencies, seconds, sum(counted)))
+    return results
+
+
+async def async_suite(server, n, concurrency):
+    results = []
+    async with AsyncClient("key", "secret", urls=server.urls, rate_limit=False) as client:
+        await client.load_markets()
+
+        order_ids = []
+
+        async def create():
+            order_ids.append((await client.create_order(**ORDER))["orderId"])
+
+        latencies, seconds = await run_async(create, n, concurrency)
+        results.append(summarize("order-entry", "async", "create_order", latencies, seconds))
+        ids = iter(order_ids)
+        latencies, seconds = await run_async(lambda: client.query_order(next(ids)), n, concurrency)
+        results.append(summarize("order-entry", "async", "query_order", latencies, seconds))
+        ids = iter(order_ids)
+        latencies, seconds = await run_async(lambda: client.cancel_order(next(ids)), n, concurrency)
+        results.append(summarize("order-entry", "async", "cancel_order", latencies, seconds))
+
+        for op, call in market_data_calls(client).items():
+            latencies, seconds = await run_async(call, n, concurrency)
+            results.append(summarize("market-data", "async", op, latencies, seconds))
+
+        counted = []
+
+        async def history():
+            counted.append(len([order async for order in client.iter_all_orders(limit=500)]))
+
+        latencies, seconds = await run_async(history, 3, 1)
+        results.append(summarize("bulk-history", "async", "iter_all_orders", latencies, seconds, sum(counted)))
+        counted = []
+
+        async def klines():
+            columns = await client.get_historical_klines(SYMBOL, "1m", KLINES_START, KLINES_START + DAY_MS - 1)
+            counted.append(len(columns["open_time"]))
+
+        latencies, seconds = await run_async(klines, 3, 1)
+        results.append(summarize("bulk-history", "async", "get_historical_klines", latencies, seconds, sum(counted)))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results, baseline=None):
+    previous = {}
+    if baseline is not None:
+        previous = {(r["workload"], r["client"], r["op"]): r for r in baseline["results"]}
+    header = f"{'workload':<13} {'client':<6} {'op':<22} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header + (f" {'ops/s vs base':>14} {'p99 vs base':>12}" if previous else ""))
+    for r in results:
+        line = (f"{r['workload']:<13} {r['client']:<6} {r['op']:<22} {r['ops_per_s']:>9.1f} {r['p50_ms']:>8.2f} "
+                f"{r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}")
+        base = previous.get((r["workload"], r["client"], r["op"]))
+        if base is not None:
+            line += f" {r['ops_per_s'] / base['ops_per_s']:>13.2f}x {r['p99_ms'] / base['p99_ms']:>11.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="fewer requests and a smaller exchange")
+    parser.add_argument("-n", type=int, default=None, help="requests per operation")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight for AsyncClient")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock waits before answering")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many seconds added to the latency")
+    parser.add_argument("--depth-levels", type=int, default=5000)
+    parser.add_argument("--history", type=int, default=None, help="orders in the account history")
+    parser.add_argument("--output", default="benchmark-results.json", help="where the json results are written")
+    parser.add_argument("--compare", default=None, help="json results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    n = args.n or (50 if args.quick else 500)
+    history = args.history or (1000 if args.quick else 5000)
+    config = {"n": n, "concurrency": args.concurrency, "latency": args.latency, "jitter": args.jitter,
+              "depth_levels": args.depth_levels, "history": history}
+
+    with MockExchange(latency=args.latency, jitter=args.jitter, depth_levels=args.depth_levels,
+                      history=history) as server:
+        results = sync_suite(server, n)
+        results += asyncio.run(async_suite(server, n, args.concurrency))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    report = {
+        "meta": {"revision": git_revision(), "python": platform.python_version(), "platform": platform.platform(),
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "config": config},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Calls/second of Client.query_order and Client.get_order_book over the transports: HTTP to the
+stand-in server, an in-process handler, and a replay of the HTTP session recorded on the way.
+All of them run the real signing, decoding and formatting code.
+
+    python benchmarks/transport_benchmark.py [number]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import payloads
+from stand_in import StandInServer
+from trbinance import Client, InProcessTransport, RecordingTransport, ReplayTransport
+from trbinance.transport import RequestsTransport
+
+SYMBOLS = payloads.symbols(10)
+ROUTES = {
+    "GET /open/v1/common/symbols": SYMBOLS,
+    "GET /open/v1/orders/detail": lambda request: payloads.envelope(payloads.order(int(request.query["orderId"]))),
+    "GET /api/v3/depth": payloads.depth(100),
+}
+IN_PROCESS_ROUTES = {
+    "GET /open/v1/common/symbols": SYMBOLS,
+    "GET /open/v1/orders/detail": lambda request: payloads.envelope(payloads.order(int(request.params["orderId"]))),
+    "GET /api/v3/depth": payloads.depth(100),
+}
+
+
+def run(client, number):
+    calls = {"query_order": lambda i: client.query_order(str(i % 10 + 1)),
+             "get_order_book": lambda i: client.get_order_book("BTC/TRY", limit=100)}
+    rates = {}
+    for name, call in calls.items():
+        started = time.perf_counter()
+        for i in range(number):
+            call(i)
+        rates[name] = number / (time.perf_counter() - started)
+    return rates
+
+
+def main(number=2000):
+    results = {}
+    path = os.path.join(tempfile.mkdtemp(), "session.jsonl.gz")
+    with StandInServer(ROUTES) as server:
+        transport = RecordingTransport(RequestsTransport(server.urls), path)
+        with Client("key", "secret", urls=server.urls, rate_limit=False, transport=transport) as client:
+            results["http (recording)"] = run(client, number)
+    urls = server.urls
+    with Client("key", "secret", urls=urls, rate_limit=False, transport=InProcessTransport(IN_PROCESS_ROUTES)) as client:
+        results["in-process"] = run(client, number)
+    with Client("key", "secret", urls=urls, rate_limit=False, transport=ReplayTransport(path)) as client:
+        results["replay"] = run(client, number)
+
+    print(f"{'transport':<18}{'query_order':>16}{'get_order_book':>18}")
+    for name, rates in results.items():
+        print(f"{name:<18}{rates['query_order']:>12.0f} /s{rates['get_order_book']:>14.0f} /s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
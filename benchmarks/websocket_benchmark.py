@@ -0,0 +1,58 @@
+"""
+Messages/second delivered by WebsocketClient from a local stand-in stream server.
+
+    python benchmarks/websocket_benchmark.py [n_messages] [n_subscribers]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trbinance import WebsocketClient
+from stand_in import StandInServer
+
+TRADE = {"e": "trade", "E": 1681279199188, "s": "BTCTRY", "t": 12345, "p": "520000.00", "q": "0.00120",
+         "b": 88, "a": 50, "T": 1681279199188, "m": True, "M": True}
+
+
+def stream_route(n):
+    async def handle(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            request_id = json.loads(msg.data)["id"]
+            await ws.send_json({"result": None, "id": request_id})
+            frame = json.dumps({"stream": "btctry@trade", "data": TRADE})
+            for _ in range(n):
+                await ws.send_str(frame)
+        return ws
+    return handle
+
+
+async def consume(subscription, n):
+    for _ in range(n):
+        await subscription.get()
+
+
+async def main(n=100000, n_subscribers=1):
+    with StandInServer({"GET /stream": stream_route(n)}) as server:
+        url = f"ws://127.0.0.1:{server.port}/stream"
+        async with WebsocketClient(url=url, queue_size=n, overflow="block") as ws:
+            subscriptions = [await ws.subscribe("btctry@trade", overflow="block") for _ in range(n_subscribers)]
+            start = time.perf_counter()
+            await asyncio.gather(*[consume(subscription, n) for subscription in subscriptions])
+            elapsed = time.perf_counter() - start
+
+    print(f"messages:     {n}")
+    print(f"subscribers:  {n_subscribers}")
+    print(f"throughput:   {n / elapsed:8.0f} msg/s")
+    print(f"deliveries:   {n * n_subscribers / elapsed:8.0f} msg/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*[int(x) for x in sys.argv[1:]]))
@@ -0,0 +1,12 @@
+from trbinance import Client, TapeStore, TapeArchiver
+
+symbols = ["BTC/TRY", "ETH/TRY"]
+
+with Client() as client:
+    # run it nightly: every symbol resumes from the last archived trade id
+    store = TapeStore("tapes")
+    archiver = TapeArchiver(client, store)
+    print(archiver.update(symbols, startTime=client.clock.now() - 60 * 60 * 1000))
+
+    last_hour = store.read("BTC/TRY", startTime=client.clock.now() - 60 * 60 * 1000, columns=["time", "price", "qty"])
+    print(len(last_hour["price"]), "trades in the last hour")
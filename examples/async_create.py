@@ -46,4 +46,6 @@ async def main():
     end = time.time()
     print("Time elapsed:", end-start)
 
+    await async_client.close()
+
 asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,27 @@
+import os
+from dotenv import load_dotenv
+
+from trbinance import Client
+
+load_dotenv()
+
+api_key = os.getenv("API_KEY","")
+secret_key = os.getenv("SECRET_KEY","")
+
+symbol = "BTC/USDT"
+
+with Client(api_key, secret_key) as client:
+    # a small grid of limit orders, sent concurrently over the pooled connections
+    orders = [
+        {"symbol": symbol, "side": "BUY", "order_type": "LIMIT", "quantity": "0.001", "price": str(10000 + i * 100)}
+        for i in range(5)
+    ]
+    results = client.create_orders(orders)
+    for result in results:
+        if result["ok"]:
+            print("Created order:", result["data"]["orderId"])
+        else:
+            print("Failed order:", result["request"], result["code"], result["msg"])
+
+    results = client.cancel_all_orders(symbol)
+    print("Cancelled orders:", [result["request"] for result in results if result["ok"]])
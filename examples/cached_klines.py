@@ -0,0 +1,12 @@
+from trbinance import Client, KlineCache
+
+cache = KlineCache("klines")
+
+with Client(kline_cache=cache) as client:
+    # the first run downloads the day, later runs only the candles closed since
+    day = client.get_historical_klines("BTC/TRY", "1m", startTime=client.clock.now() - 24 * 60 * 60 * 1000)
+    print(len(day["close"]), "candles, last close", day["close"][-1])
+
+    for _ in range(3):
+        client.get_klines("BTC/TRY", "1h", limit=24)
+    print(cache.status())
@@ -9,6 +9,12 @@ setup(
         "aiohttp",
         "python-dotenv"
     ],
+    extras_require={
+        # columnar kline output as numpy arrays instead of array.array
+        "numpy": ["numpy"],
+        # faster response decoding
+        "orjson": ["orjson"],
+    },
     author="akasimo",
     author_email="akasimo@fastmail.com",
     description="TrBinance Wrapper",
@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import trbinance
+
+SYMBOLS = [f"C{i}/TRY" for i in range(20)]
+MARKETS = {symbol: {"id": symbol.replace("/", ""), "symbol": symbol, "symbolType": 1} for symbol in SYMBOLS}
+
+
+class TestFanOut(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.client = trbinance.AsyncClient()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def request(method, endpoint, security_type, symbol_type=0, params=None, url=None):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.001 if params["symbol"] != "C0TRY" else 0.05)
+            self.in_flight -= 1
+            if params["symbol"] == "C3TRY":
+                raise Exception("boom")
+            return {"bids": [[1.0, 2.0]], "asks": [], "symbol": params["symbol"]}
+
+        self.client._request = request
+        self.client.get_symbols = AsyncMock(side_effect=lambda: self.client._set_markets(MARKETS))
+
+    async def test_partial_failures_and_bounded_concurrency(self):
+        books = await self.client.get_order_books(SYMBOLS, concurrency=4)
+        self.assertEqual(list(books), SYMBOLS)
+        self.assertIsInstance(books["C3/TRY"], Exception)
+        self.assertEqual(books["C5/TRY"]["bids"], [[1.0, 2.0]])
+        self.assertLessEqual(self.max_in_flight, 4)
+        self.client.get_symbols.assert_awaited_once()
+
+    async def test_iterator_yields_in_completion_order(self):
+        seen = [symbol async for symbol, _ in self.client.iter_order_books(SYMBOLS, concurrency=20)]
+        self.assertEqual(sorted(seen), sorted(SYMBOLS))
+        self.assertEqual(seen[-1], "C0/TRY")
+
+
+def order(order_id, status=0):
+    return {"orderId": order_id, "symbol": "BTC_USDT", "side": 0, "status": status}
+
+
+class TestBatchOrders(unittest.TestCase):
+
+    def test_create_orders_reports_per_order_errors(self):
+        client = trbinance.Client()
+
+        def request(method, endpoint, security_type, symbol_type=0, params=None, url=None):
+            if params["price"] == "2":
+                return {"code": 3210, "msg": "price too low", "timestamp": 1}
+            return {"code": 0, "data": order(params["price"]), "timestamp": 1}
+
+        client._request = MagicMock(side_effect=request)
+        orders = [{"symbol": "BTC/USDT", "side": "BUY", "order_type": "LIMIT", "quantity": "1", "price": str(i)} for i in range(4)]
+        results = client.create_orders(orders)
+        self.assertEqual([r["ok"] for r in results], [True, True, False, True])
+        self.assertEqual(results[2]["code"], 3210)
+        self.assertEqual(results[3]["data"]["orderId"], "3")
+        self.assertIs(results[0]["request"], orders[0])
+
+    def test_cancel_all_orders_cancels_open_orders(self):
+        client = trbinance.AsyncClient()
+        client.all_orders = AsyncMock(return_value=[order("1", 0), order("2", 2), order("3", 1)])
+        client.cancel_order = AsyncMock(side_effect=lambda order_id: order(order_id, 3))
+        results = asyncio.run(client.cancel_all_orders("BTC/USDT"))
+        self.assertEqual([r["request"] for r in results], ["1", "3"])
+        self.assertTrue(all(r["ok"] for r in results))
+
+    def test_cancel_all_orders_reads_every_page(self):
+        orders = [order(str(i), i % 3) for i in range(1, 8)]
+
+        def all_orders(symbol=None, fromId=1, limit=500, **kwargs):
+            return [o for o in orders if int(o["orderId"]) >= fromId][:limit]
+
+        client = trbinance.Client()
+        client.all_orders = MagicMock(side_effect=all_orders)
+        client.cancel_order = MagicMock(side_effect=lambda order_id: order(order_id, 3))
+        results = client.cancel_all_orders("BTC/USDT", limit=2)
+        self.assertEqual([r["request"] for r in results], ["1", "3", "4", "6", "7"])
+        self.assertEqual(client.all_orders.call_count, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from unittest.mock import MagicMock
+
+import trbinance
+
+
+class TestClientSession(unittest.TestCase):
+
+    def test_adapter_per_base_url(self):
+        client = trbinance.Client(pool_size=4)
+        for url in client.urls.values():
+            adapter = client.session.get_adapter(url + "/common/time")
+            self.assertEqual(adapter._pool_maxsize, 4)
+            self.assertEqual(adapter.max_retries.total, 0)
+        adapters = {id(client.session.get_adapter(url)) for url in client.urls.values()}
+        self.assertEqual(len(adapters), len(client.urls))
+
+    def test_session_is_reused(self):
+        client = trbinance.Client()
+        session = client.session
+        response = MagicMock()
+        response.content = b'{"code": 0, "timestamp": 1}'
+        response.headers = {}
+        session.get = MagicMock(return_value=response)
+        client.check_server_time()
+        client.check_server_time()
+        self.assertIs(client.session, session)
+        self.assertEqual(session.get.call_count, 2)
+
+    def test_context_manager_closes(self):
+        with trbinance.Client() as client:
+            client.session.close = MagicMock()
+        client.session.close.assert_called_once()
+
+
+class TestAsyncClientSession(unittest.IsolatedAsyncioTestCase):
+
+    async def test_session_is_lazy_and_shared(self):
+        client = trbinance.AsyncClient(limit_per_host=5, dns_cache_ttl=60)
+        self.assertIsNone(client.session)
+        session = client.transport.get_session()
+        self.assertIs(client.transport.get_session(), session)
+        self.assertEqual(session.connector.limit_per_host, 5)
+        await client.close()
+        self.assertTrue(session.closed)
+        self.assertIsNone(client.session)
+
+    async def test_context_manager_closes(self):
+        async with trbinance.AsyncClient() as client:
+            session = client.transport.get_session()
+        self.assertTrue(session.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import trbinance
+from trbinance.clock import ClockSync
+
+
+class TestClockSync(unittest.TestCase):
+
+    def test_midpoint_offset(self):
+        clock = ClockSync()
+        self.assertTrue(clock.add_sample(1000, 1550, 1100))
+        self.assertEqual(clock.offset, 500)
+        self.assertEqual(clock.uncertainty, 50)
+        self.assertEqual(clock.recv_window(margin=50), 100)
+
+    def test_smoothing_and_slow_samples(self):
+        clock = ClockSync(alpha=0.5)
+        clock.add_sample(0, 110, 20)
+        clock.add_sample(100, 230, 120)
+        self.assertEqual(clock.offset, 110)
+        # a round trip far slower than the recent ones says little about the offset
+        self.assertFalse(clock.add_sample(200, 900, 400))
+        self.assertEqual(clock.offset, 110)
+        self.assertEqual(clock.status()["samples"], 2)
+
+    def test_slower_network_is_accepted_again(self):
+        clock = ClockSync(window=3)
+        clock.add_sample(0, 10, 10)
+        results = [clock.add_sample(i * 1000, i * 1000 + 50, i * 1000 + 100) for i in range(1, 5)]
+        self.assertEqual(results, [False, False, False, True])
+
+    def test_now_applies_offset(self):
+        clock = ClockSync()
+        clock.add_sample(0, 60000, 0)
+        self.assertAlmostEqual(clock.now(), time.time() * 1000 + 60000, delta=50)
+
+
+class TestClientClock(unittest.TestCase):
+
+    def test_private_requests_use_server_time(self):
+        client = trbinance.Client(secret_key="secret", rate_limit=False)
+        server_offset = 5000
+        client.check_server_time = lambda: {"timestamp": int(time.time() * 1000) + server_offset}
+        status = client.sync_clock(samples=3)
+        self.assertAlmostEqual(status["offset"], server_offset, delta=50)
+
+        response = MagicMock()
+        response.content = b'{"code": 0, "data": {"list": []}, "timestamp": 1}'
+        response.headers = {}
+        client.session.get = MagicMock(return_value=response)
+        client.all_orders()
+        url = client.session.get.call_args.args[0]
+        timestamp = int(url.split("timestamp=")[1].split("&")[0])
+        self.assertAlmostEqual(timestamp, time.time() * 1000 + server_offset, delta=100)
+
+    def test_background_sync(self):
+        client = trbinance.Client(rate_limit=False)
+        client.check_server_time = MagicMock(side_effect=lambda: {"timestamp": int(time.time() * 1000)})
+        client.start_clock_sync(interval=0.01, samples=1)
+        time.sleep(0.1)
+        client.close()
+        self.assertGreater(client.check_server_time.call_count, 2)
+        self.assertIsNone(client._clock_refresh)
+
+
+class TestAsyncClientClock(unittest.IsolatedAsyncioTestCase):
+
+    async def test_sync_clock(self):
+        client = trbinance.AsyncClient(rate_limit=False)
+
+        async def check_server_time():
+            return {"timestamp": int(time.time() * 1000) - 2000}
+
+        client.check_server_time = check_server_time
+        await client.start_clock_sync(interval=60)
+        self.assertAlmostEqual(client.clock.offset, -2000, delta=50)
+        self.assertAlmostEqual(client.clock.now(), time.time() * 1000 - 2000, delta=50)
+        await client.close()
+        self.assertIsNone(client._clock_refresh)
@@ -0,0 +1,59 @@
+import json
+import unittest
+from decimal import Decimal
+
+from trbinance.decoder import Decoder, DEPTH_KEYS, orjson
+from trbinance.helper import ORDER_FLOAT_KEYS, BALANCE_FLOAT_KEYS, format_order_data, format_balance
+
+ORDERS = {"code": 0, "data": {"list": [
+    {"orderId": 1, "symbol": "BTC_TRY", "side": 0, "status": 2, "price": "10.5", "origQty": "0.001", "clientId": "7"},
+]}, "timestamp": 1}
+ACCOUNT = {"code": 0, "data": {"accountAssets": [
+    {"asset": "BTC", "free": "1.5", "locked": "0.5"}, {"asset": "TRY", "free": "0", "locked": "0"},
+]}}
+DEPTH = {"lastUpdateId": 1, "bids": [["2.0", "1.0"]], "asks": [["3.0", "0.5"]]}
+
+
+class TestDecoder(unittest.TestCase):
+
+    def backends(self):
+        return ["json", "orjson"] if orjson is not None else ["json"]
+
+    def test_backends_parse_numbers_like_format_helpers(self):
+        legacy = Decoder("json", numeric=None)
+        for backend in self.backends():
+            decoder = Decoder(backend)
+            body = json.dumps(ORDERS).encode()
+            expected = [format_order_data(i) for i in legacy.decode(body)["data"]["list"]]
+            decoded = decoder.decode(body, ORDER_FLOAT_KEYS)["data"]["list"]
+            self.assertEqual([format_order_data(i, parse_numbers=False) for i in decoded], expected)
+            self.assertEqual(decoded[0]["clientId"], "7")
+
+            body = json.dumps(ACCOUNT).encode()
+            expected = format_balance(legacy.decode(body)["data"]["accountAssets"])
+            decoded = decoder.decode(body, BALANCE_FLOAT_KEYS)["data"]["accountAssets"]
+            self.assertEqual(format_balance(decoded, parse_numbers=False), expected)
+            self.assertEqual(expected["total"], {"BTC": 2.0})
+
+            self.assertEqual(decoder.decode(json.dumps(DEPTH), DEPTH_KEYS)["bids"], [[2.0, 1.0]])
+
+    def test_decimal_numbers(self):
+        for backend in self.backends():
+            data = Decoder(backend, numeric="decimal").decode(json.dumps(DEPTH), DEPTH_KEYS)
+            self.assertEqual(data["asks"], [[Decimal("3.0"), Decimal("0.5")]])
+
+    def test_unquoted_integers_become_floats(self):
+        body = json.dumps({"data": {"list": [{"orderId": 1, "price": 10000, "origQty": "0.5", "clientId": "7"}]}})
+        for backend in self.backends():
+            order = Decoder(backend).decode(body, ORDER_FLOAT_KEYS)["data"]["list"][0]
+            self.assertIs(order["price"].__class__, float)
+            self.assertEqual(order["orderId"], 1)
+
+    def test_fields_for(self):
+        self.assertIs(Decoder("json").fields_for("GET", "/orders"), ORDER_FLOAT_KEYS)
+        self.assertIsNone(Decoder("json").fields_for("GET", "/v1/klines"))
+        self.assertIsNone(Decoder("json", numeric=None).fields_for("GET", "/orders"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+
+import trbinance
+from trbinance.endpoints import ENDPOINTS, compile_endpoints
+from trbinance.decoder import NUMERIC_FIELDS
+from trbinance.ratelimit import endpoint_weight
+from trbinance.transport import InProcessTransport
+
+MARKETS = {
+    "BTC/TRY": {"id": "BTCTRY", "symbol": "BTC/TRY", "symbolType": 1},
+}
+ORDER = {"orderId": 1, "symbol": "BTC_TRY", "side": 0, "status": 0}
+
+# one call per endpoint of the table, (method name, args, kwargs)
+CALLS = [
+    ("check_server_time", (), {}),
+    ("get_market_info", (), {"quoteAsset": "TRY"}),
+    ("get_order_book", ("BTC/TRY",), {"limit": 5}),
+    ("get_recent_trades", ("BTC/TRY",), {"from_id": 3}),
+    ("get_agg_trades", ("BTC/TRY",), {"startTime": 1, "endTime": 2}),
+    ("get_klines", ("BTC/TRY", "1h"), {"startTime": 1}),
+    ("create_order", ("BTC/TRY", "SELL", "LIMIT"), {"quantity": "1", "price": "2"}),
+    ("query_order", ("5",), {}),
+    ("cancel_order", ("5",), {}),
+    ("all_orders", ("BTC/TRY",), {"limit": 10}),
+    ("new_oco", ("BTC/TRY", "BUY", "1", "2", "3", "4"), {}),
+    ("account_information", (), {}),
+    ("account_asset_information", ("TRY",), {}),
+    ("account_trade_list", (), {"fromId": 7}),
+    ("withdraw", ("TRY", "addr", "10"), {"network": "TRX"}),
+    ("withdraw_history", (), {"limit": 10}),
+    ("deposit_history", (), {}),
+    ("deposit_address", ("TRY", "TRX"), {}),
+]
+
+
+def answer(request):
+    if request.path.endswith("/depth"):
+        return {"bids": [], "asks": []}
+    if request.path.startswith("/api"):
+        return []
+    if request.path == "/open/v1/account/spot":
+        return {"code": 0, "data": {"accountAssets": []}, "timestamp": 1}
+    if request.path in ["/open/v1/orders", "/open/v1/orders/trades", "/v1/market/trading-pairs"] \
+            and request.method == "GET":
+        return {"code": 0, "data": {"list": []}, "timestamp": 1}
+    return {"code": 0, "data": dict(ORDER), "timestamp": 1}
+
+
+def recorder(seen):
+    def handler(request):
+        params = {k: v for k, v in request.params.items() if k not in ["timestamp", "signature"]}
+        seen.append((request.method, request.path, params))
+        return answer(request)
+    return handler
+
+
+class TestEndpointTable(unittest.TestCase):
+
+    def test_every_endpoint_has_a_client_method(self):
+        self.assertEqual(sorted(ENDPOINTS), sorted([name for name, _, _ in CALLS] + ["get_symbols"]))
+        for name in ENDPOINTS:
+            self.assertTrue(callable(getattr(trbinance.Client, name)))
+            self.assertTrue(callable(getattr(trbinance.AsyncClient, name)))
+
+    def test_build(self):
+        endpoints = compile_endpoints(trbinance.Client.urls)
+        path, params, url = endpoints["create_order"].build(
+            {"symbol": "BTC/TRY", "side": "SELL", "type": "LIMIT", "price": None, "quantity": "1"})
+        self.assertEqual(path, "/orders")
+        self.assertEqual(url, "https://www.trbinance.com/open/v1/orders")
+        self.assertEqual(params, {"symbol": "BTC_TRY", "side": 1, "type": 1, "quantity": "1"})
+        with self.assertRaises(AssertionError):
+            endpoints["create_order"].build({"symbol": "BTC/TRY", "side": "SELL", "type": "STOP_LOSS"})
+        with self.assertRaises(AssertionError):
+            endpoints["query_order"].build({})
+
+    def test_weights_and_decoder_fields_come_from_the_table(self):
+        self.assertEqual(endpoint_weight("GET", "/account/spot"), 5)
+        self.assertEqual(endpoint_weight("GET", "/v3/depth", {"limit": 1000}), 10)
+        self.assertIn(("GET", "/market/depth"), NUMERIC_FIELDS)
+        self.assertIn(("POST", "/orders/cancel"), NUMERIC_FIELDS)
+
+    def test_clients_send_the_same_requests(self):
+        sync_seen, async_seen = [], []
+        client = trbinance.Client("key", "secret", rate_limit=False, transport=InProcessTransport(recorder(sync_seen)))
+        client._set_markets(MARKETS)
+        for name, args, kwargs in CALLS:
+            getattr(client, name)(*args, **kwargs)
+
+        async def run():
+            async with trbinance.AsyncClient("key", "secret", rate_limit=False,
+                                             transport=InProcessTransport(recorder(async_seen))) as client:
+                client._set_markets(MARKETS)
+                for name, args, kwargs in CALLS:
+                    await getattr(client, name)(*args, **kwargs)
+
+        asyncio.run(run())
+        self.assertEqual(len(sync_seen), len(CALLS))
+        self.assertEqual(sync_seen, async_seen)
+        self.assertEqual(sync_seen[6], ("POST", "/open/v1/orders",
+                                        {"symbol": "BTC_TRY", "side": "1", "type": "1", "quantity": "1", "price": "2"}))
+        self.assertEqual(sync_seen[2], ("GET", "/api/v3/depth", {"symbol": "BTCTRY", "limit": "5"}))
+
+    def test_order_errors_are_returned(self):
+        error = {"code": -2013, "msg": "Order does not exist.", "timestamp": 1}
+        client = trbinance.Client(rate_limit=False, transport=InProcessTransport(lambda request: error))
+        self.assertEqual(client.query_order("5"), error)
+        self.assertEqual(client.create_order("BTC/TRY", "BUY", "MARKET", quantity="1"), error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+import trbinance
+from trbinance.hedging import HedgePolicy
+
+
+class TestHedgePolicy(unittest.TestCase):
+
+    def test_adaptive_delay(self):
+        policy = HedgePolicy(percentile=90, initial_delay=0.5, min_samples=10)
+        self.assertEqual(policy.delay_for("/orders/detail"), 0.5)
+        for i in range(100):
+            policy.record("/orders/detail", (i + 1) / 1000)
+        self.assertAlmostEqual(policy.delay_for("/orders/detail"), 0.091)
+        self.assertTrue(policy.applies("GET", "/orders/detail"))
+        self.assertFalse(policy.applies("POST", "/orders"))
+
+
+class TestHedgedRequests(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.client = trbinance.AsyncClient(secret_key="secret", hedge=HedgePolicy(delay=0.02))
+        self.calls = []
+
+        async def send(method, url, params, headers, fields, timer=None):
+            self.calls.append(method)
+            # the first attempt stalls, any later one answers right away
+            attempt = len(self.calls)
+            await asyncio.sleep(1 if attempt == 1 else 0.001)
+            timer.mark("transfer")
+            timer.status = 200 + attempt
+            return {"code": 0, "attempt": attempt}
+
+        self.client._send = send
+
+    async def test_slow_get_is_hedged(self):
+        used = self.client.scheduler.budget.used
+        response = await asyncio.wait_for(self.client._request("GET", "/orders/detail", "private", params={"orderId": 1}), 0.5)
+        self.assertEqual(response["attempt"], 2)
+        self.assertEqual(self.client.hedge.status()["hedge_wins"], 1)
+        # both attempts are charged
+        self.assertEqual(self.client.scheduler.budget.used - used, 2)
+
+    async def test_hedge_is_traced_on_its_own_timer(self):
+        self.client.metrics = trbinance.Metrics()
+        await asyncio.wait_for(self.client._request("GET", "/orders/detail", "private", params={"orderId": 1}), 0.5)
+        metrics = self.client.metrics.snapshot()["GET /orders/detail"]
+        # one request in the metrics, with the status of the duplicate that answered
+        self.assertEqual(metrics["statuses"], {202: 1})
+        self.assertEqual(metrics["weight"], 2)
+        # timed from when the duplicate went out, not from the first attempt
+        self.assertLess(metrics["phases"]["transfer"]["max"], 0.015)
+
+    async def test_posts_are_never_hedged(self):
+        response = await self.client._request("POST", "/orders/cancel", "private", params={"orderId": 1})
+        self.assertEqual(response["attempt"], 1)
+        self.assertEqual(self.calls, ["POST"])
+        self.assertEqual(self.client.hedge.hedged, 0)
+
+    async def test_no_hedge_without_budget(self):
+        self.client.scheduler.try_acquire = lambda *args: None
+        response = await self.client._request("GET", "/orders/detail", "private", params={"orderId": 1})
+        self.assertEqual(response["attempt"], 1)
+        self.assertEqual(self.client.hedge.skipped, 1)
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import trbinance
+from trbinance.kline_cache import KlineCache, np
+from trbinance.transport import InProcessTransport
+
+MARKETS = {"BTC/TRY": {"id": "BTCTRY", "symbol": "BTC/TRY", "symbolType": 1}}
+MINUTE = 60_000
+
+
+def candle(open_time):
+    i = open_time // MINUTE
+    return [open_time, f"{i}.5", f"{i + 1}.0", f"{i - 1}.0", f"{i}.25", "2.0", open_time + MINUTE - 1, "200.0", i % 50,
+            "1.0", "100.0", "0"]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestKlineCache(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        # client and server clocks, 1m klines are served up to the server one, the last one still open
+        self.now = self.server_now = 1_000 * MINUTE + 30_000
+        self.requests = []
+        self.transport = InProcessTransport({"GET /api/v1/klines": self.klines})
+        self.cache = KlineCache(self.root)
+        self.client = self.make_client(self.cache)
+
+    def klines(self, request):
+        self.requests.append(dict(request.params))
+        limit = int(request.params.get("limit", 500))
+        last = self.server_now // MINUTE * MINUTE
+        if "endTime" in request.params:
+            last = min(last, int(request.params["endTime"]) // MINUTE * MINUTE)
+        if "startTime" in request.params:
+            first = -(-int(request.params["startTime"]) // MINUTE) * MINUTE
+            open_times = list(range(first, last + 1, MINUTE))[:limit]
+        else:
+            open_times = list(range(last - (limit - 1) * MINUTE, last + 1, MINUTE))
+        rows = [candle(t) for t in open_times]
+        if rows and rows[-1][6] >= self.server_now:
+            # the open candle only has a partial close
+            rows[-1][4] = "0.125"
+        return rows
+
+    def make_client(self, cache):
+        client = trbinance.Client(rate_limit=False, transport=self.transport, kline_cache=cache)
+        client._set_markets(MARKETS)
+        client.clock.now = lambda: self.now
+        return client
+
+    def test_repeat_queries_are_served_from_the_cache(self):
+        rows = self.client.get_klines("BTC/TRY", "1m", startTime=100 * MINUTE, limit=200)
+        self.assertEqual(len(rows), 200)
+        self.assertEqual(rows[0][:2], [100 * MINUTE, 100.5])
+        self.assertEqual(rows[-1][6], 300 * MINUTE - 1)
+        self.assertEqual(len(self.requests), 1)
+
+        self.assertEqual(self.client.get_klines("BTC/TRY", "1m", startTime=150 * MINUTE, limit=50), rows[50:100])
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.cache.status(), {"hits": 1, "misses": 1})
+
+    def test_only_new_candles_are_requested(self):
+        self.client.get_klines("BTC/TRY", "1m", startTime=900 * MINUTE, limit=1000)
+        self.assertEqual(self.cache.columns("BTC/TRY", "1m", startTime=900 * MINUTE, limit=1000, now=self.now)
+                         ["open_time"][-1], 1000 * MINUTE)
+
+        self.now = self.server_now = 1_005 * MINUTE + 10_000
+        rows = self.client.get_klines("BTC/TRY", "1m", limit=10)
+        # the candle open at the last call is requested again, nothing before it
+        self.assertEqual(self.requests[-1]["startTime"], str(1000 * MINUTE))
+        self.assertEqual([row[0] for row in rows], [t * MINUTE for t in range(996, 1006)])
+        self.assertEqual(os.path.getsize(os.path.join(self.root, "BTC_TRY", "1m.bin")) // 88, 105)
+
+    def test_open_candle_is_refetched(self):
+        self.client.get_klines("BTC/TRY", "1m", limit=5)
+        self.client.get_klines("BTC/TRY", "1m", limit=5)
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[-1]["startTime"], str(1000 * MINUTE))
+
+        self.client.kline_cache = KlineCache(self.root, open_ttl=1000)
+        self.client.get_klines("BTC/TRY", "1m", limit=5)
+        self.client.get_klines("BTC/TRY", "1m", limit=5)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_older_candles_are_prepended(self):
+        self.client.get_klines("BTC/TRY", "1m", startTime=500 * MINUTE, limit=10)
+        columns = self.client.get_historical_klines("BTC/TRY", "1m", startTime=0, endTime=510 * MINUTE - 1)
+        np.testing.assert_array_equal(columns["open_time"], np.arange(0, 510) * MINUTE)
+        self.assertEqual([request["startTime"] for request in self.requests[1:]], ["0"])
+
+        # another process sees the same files
+        other = self.make_client(KlineCache(self.root))
+        self.assertEqual(len(other.get_klines("BTC/TRY", "1m", startTime=MINUTE, endTime=509 * MINUTE, limit=1000)), 509)
+        self.assertEqual(len(self.requests), 2)
+
+    def test_far_past_query_is_not_bridged(self):
+        self.client.get_klines("BTC/TRY", "1m", limit=500)
+        coverage = self.cache._coverage(("BTC/TRY", "1m"))
+        rows = self.client.get_klines("BTC/TRY", "1m", startTime=10 * MINUTE, limit=10)
+        self.assertEqual([row[0] for row in rows], [t * MINUTE for t in range(10, 20)])
+        self.assertEqual(rows[0][1], 10.5)
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[-1]["startTime"], str(10 * MINUTE))
+        # not stored, the cached range is unchanged
+        self.assertEqual(self.cache._coverage(("BTC/TRY", "1m")), coverage)
+
+        columns = self.client.get_historical_klines("BTC/TRY", "1m", startTime=0, endTime=100 * MINUTE - 1)
+        self.assertEqual(len(columns["open_time"]), 100)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_stale_cache_is_not_bridged(self):
+        self.client.get_klines("BTC/TRY", "1m", limit=500)
+        # a month later
+        self.now = self.server_now = self.now + 30 * 24 * 60 * MINUTE
+        rows = self.client.get_klines("BTC/TRY", "1m", limit=10)
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[-1][0], self.now // MINUTE * MINUTE)
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[-1], {"symbol": "BTCTRY", "limit": "10", "interval": "1m"})
+        self.assertEqual(self.cache.status(), {"hits": 0, "misses": 2})
+
+    def test_local_clock_ahead_of_the_server(self):
+        # the server is 200 ms before the close of candle 1000, the local clock already 100 ms past it
+        self.server_now = 1001 * MINUTE - 200
+        self.now = self.server_now + 300
+        rows = self.client.get_klines("BTC/TRY", "1m", limit=5)
+        self.assertEqual(rows[-1][0], 1000 * MINUTE)
+        self.assertEqual(rows[-1][4], 0.125)
+        self.assertEqual(self.cache._coverage(("BTC/TRY", "1m"))["end"], 1000 * MINUTE - 1)
+
+        self.server_now += 30_000
+        self.now = self.server_now + 300
+        rows = self.client.get_klines("BTC/TRY", "1m", limit=5)
+        # the partial candle was not kept, and the next one was not skipped
+        self.assertEqual(self.requests[-1]["startTime"], str(1000 * MINUTE))
+        self.assertEqual([row[0] for row in rows], [t * MINUTE for t in range(997, 1002)])
+        self.assertEqual(rows[-2][4], 1000.25)
+        self.assertEqual(rows[-1][4], 0.125)
+
+    def test_async_client(self):
+        async def run():
+            async with trbinance.AsyncClient(rate_limit=False, transport=self.transport,
+                                             kline_cache=self.cache) as client:
+                client._set_markets(MARKETS)
+                client.clock.now = lambda: self.now
+                columns = await client.get_historical_klines("BTC/TRY", "1m", startTime=0, endTime=2500 * MINUTE)
+                rows = await client.get_klines("BTC/TRY", "1m", startTime=980 * MINUTE, limit=20)
+                return columns, rows
+
+        columns, rows = asyncio.run(run())
+        self.assertEqual(len(columns["open_time"]), 1001)
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(self.cache.status(), {"hits": 1, "misses": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
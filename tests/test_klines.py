@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+import trbinance
+from trbinance.klines import kline_pages, merge_kline_pages, klines_to_columns
+
+MINUTE = 60_000
+MARKETS = {"BTC/TRY": {"id": "BTCTRY", "symbol": "BTC/TRY", "symbolType": 1}}
+
+
+def row(open_time):
+    return [open_time, "1.0", "2.0", "0.5", "1.5", "10", open_time + MINUTE - 1, "15", 3, "4", "6", "0"]
+
+
+def fake_klines(symbol, interval, startTime=None, endTime=None, limit=500):
+    # like the exchange: every candle opening in the window, plus the one before it to overlap pages
+    return [row(t) for t in range(max(startTime - MINUTE, 0), endTime + 1, MINUTE)][:limit + 1]
+
+
+class TestKlines(unittest.TestCase):
+
+    def test_pages(self):
+        self.assertEqual(kline_pages("1m", 0, 5 * MINUTE - 1, limit=2),
+                         [(0, 2 * MINUTE - 1), (2 * MINUTE, 4 * MINUTE - 1), (4 * MINUTE, 5 * MINUTE - 1)])
+
+    def test_merge_and_columns(self):
+        rows = merge_kline_pages([[row(MINUTE), row(0)], [row(MINUTE), row(2 * MINUTE)]], endTime=MINUTE)
+        self.assertEqual([r[0] for r in rows], [0, MINUTE])
+        columns = klines_to_columns(rows)
+        self.assertEqual(list(columns["open_time"]), [0, MINUTE])
+        self.assertEqual(columns["close"][1], 1.5)
+        self.assertEqual(columns["trades"][0], 3)
+
+    def test_historical_klines(self):
+        client = trbinance.Client()
+        client._set_markets(MARKETS)
+        client.get_klines = MagicMock(side_effect=fake_klines)
+        columns = client.get_historical_klines("BTC/TRY", "1m", MINUTE, 100 * MINUTE, limit=7)
+        self.assertEqual(client.get_klines.call_count, 15)
+        self.assertEqual(list(columns["open_time"]), list(range(MINUTE, 101 * MINUTE, MINUTE)))
+
+    def test_async_historical_klines(self):
+        async def get_klines(*args, **kwargs):
+            return fake_klines(*args, **kwargs)
+
+        client = trbinance.AsyncClient()
+        client._set_markets(MARKETS)
+        client.get_klines = get_klines
+        columns = asyncio.run(client.get_historical_klines("BTC/TRY", "1m", 0, 99 * MINUTE, limit=10))
+        self.assertEqual(len(columns["open_time"]), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import unittest
+
+import trbinance
+from trbinance.ledger import BalanceLedger
+from trbinance.transport import InProcessTransport
+
+ASSETS = [{"asset": "BTC", "free": "1", "locked": "0"}, {"asset": "TRY", "free": "1000", "locked": "0"}]
+
+
+def order(order_id, side, status, price="100", qty="2", executed="0", executed_quote="0"):
+    return {"orderId": order_id, "symbol": "BTC/TRY", "side": side, "status": status, "price": price,
+            "origQty": qty, "executedQty": executed, "executedQuoteQty": executed_quote}
+
+
+class TestBalanceLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.ledger = BalanceLedger(reconcile_interval=1000)
+        self.ledger.reconcile(ASSETS, now=0)
+
+    def test_limit_buy_locks_fills_and_unlocks(self):
+        self.ledger.created(order("1", 0, 0))
+        self.assertEqual((self.ledger.free("TRY"), self.ledger.locked("TRY")), (800.0, 200.0))
+
+        self.ledger.observe(order("1", 0, 1, executed="0.5", executed_quote="50"))
+        self.assertEqual((self.ledger.free("TRY"), self.ledger.locked("TRY")), (800.0, 150.0))
+        self.assertEqual(self.ledger.free("BTC"), 1.5)
+        # an older answer arriving late changes nothing
+        self.ledger.observe(order("1", 0, 0))
+        self.assertEqual(self.ledger.free("BTC"), 1.5)
+
+        self.ledger.observe(order("1", 0, 3, executed="0.5", executed_quote="50"))
+        self.assertEqual((self.ledger.free("TRY"), self.ledger.locked("TRY")), (950.0, 0.0))
+        self.assertEqual(self.ledger.orders, {})
+        self.assertFalse(self.ledger.drift)
+
+    def test_market_sell_and_drift(self):
+        self.ledger.created(order("2", 1, 2, price="0", qty="0.5", executed="0.5", executed_quote="49.9"))
+        self.assertEqual((self.ledger.free("BTC"), self.ledger.locked("BTC")), (0.5, 0.0))
+        self.assertEqual(self.ledger.total("TRY"), 1049.9)
+        self.assertEqual(self.ledger.balances()["total"], {"BTC": 0.5, "TRY": 1049.9})
+
+        self.assertFalse(self.ledger.due(500))
+        self.assertTrue(self.ledger.due(1000))
+        self.ledger.observe(order("3", 1, 2, executed="1"))
+        self.assertTrue(self.ledger.drift)
+        self.assertTrue(self.ledger.due(500))
+
+        # the fee the ledger could not see
+        drift = self.ledger.reconcile([{"asset": "BTC", "free": "0.5", "locked": "0"},
+                                       {"asset": "TRY", "free": "1049.85", "locked": "0"}], now=600)
+        self.assertEqual(list(drift), ["TRY"])
+        self.assertAlmostEqual(drift["TRY"], -0.05)
+        self.assertFalse(self.ledger.due(1000))
+
+    def test_fills_seen_by_a_reconcile_are_not_applied_again(self):
+        self.ledger.created(order("1", 0, 0, qty="1"))
+        self.ledger.created(order("2", 0, 0, qty="1"))
+        # order 1 filled, the snapshot has it before the ledger does
+        self.ledger.reconcile([{"asset": "BTC", "free": "2", "locked": "0"},
+                               {"asset": "TRY", "free": "800", "locked": "100"}], now=10)
+        self.ledger.observe(order("1", 0, 2, qty="1", executed="1", executed_quote="100"))
+        self.assertEqual((self.ledger.free("BTC"), self.ledger.free("TRY"), self.ledger.locked("TRY")),
+                         (2.0, 800.0, 100.0))
+        self.assertTrue(self.ledger.due(11))
+        self.assertEqual(list(self.ledger.orders), ["2"])
+
+        # an order unchanged since the snapshot goes on as before
+        self.ledger.reconcile([{"asset": "BTC", "free": "2", "locked": "0"},
+                               {"asset": "TRY", "free": "800", "locked": "100"}], now=20)
+        self.ledger.observe(order("2", 0, 0, qty="1"))
+        self.assertFalse(self.ledger.drift)
+        self.ledger.observe(order("2", 0, 3, qty="1"))
+        self.assertEqual((self.ledger.free("TRY"), self.ledger.locked("TRY")), (900.0, 0.0))
+        self.assertFalse(self.ledger.drift)
+
+    def test_overspending_is_drift(self):
+        self.ledger.created(order("4", 0, 0, price="600"))
+        self.assertTrue(self.ledger.drift)
+
+
+class TestClientLedger(unittest.TestCase):
+
+    def setUp(self):
+        # the account and one order, the order is set by the test
+        self.assets = ASSETS
+        self.order = None
+        self.account_requests = 0
+        self.transport = InProcessTransport({
+            "GET /open/v1/account/spot": self.account,
+            "POST /open/v1/orders": self.answer_order,
+            "GET /open/v1/orders/detail": self.answer_order,
+            "POST /open/v1/orders/cancel": self.answer_order,
+        })
+
+    def account(self, request):
+        self.account_requests += 1
+        return {"code": 0, "data": {"accountAssets": self.assets}, "timestamp": 1}
+
+    def answer_order(self, request):
+        return {"code": 0, "data": dict(self.order, symbol="BTC_TRY"), "timestamp": 1}
+
+    def test_client_feeds_the_ledger(self):
+        ledger = BalanceLedger()
+        client = trbinance.Client("key", "secret", rate_limit=False, transport=self.transport, balance_ledger=ledger)
+        self.assertEqual(client.account_balance()["TRY"]["free"], 1000.0)
+        self.order = order(7, 0, 0)
+        client.create_order("BTC/TRY", "BUY", "LIMIT", quantity="2", price="100")
+        self.order = order(7, 0, 2, executed="2", executed_quote="200")
+        client.query_order("7")
+
+        balances = client.account_balance()
+        self.assertEqual((balances["TRY"]["free"], balances["BTC"]["free"]), (800.0, 3.0))
+        self.assertEqual(self.account_requests, 1)
+
+        self.assets = [{"asset": "BTC", "free": "3", "locked": "0"}, {"asset": "TRY", "free": "800", "locked": "0"}]
+        self.assertEqual(client.sync_balances(), {})
+        self.assertEqual(self.account_requests, 2)
+
+    def test_async_client_feeds_the_ledger(self):
+        ledger = BalanceLedger()
+
+        async def run():
+            async with trbinance.AsyncClient("key", "secret", rate_limit=False, transport=self.transport,
+                                             balance_ledger=ledger) as client:
+                await client.start_balance_sync(interval=60)
+                self.order = order(8, 1, 0, qty="0.25")
+                await client.create_order("BTC/TRY", "SELL", "LIMIT", quantity="0.25", price="100")
+                self.order = order(8, 1, 3, qty="0.25")
+                await client.cancel_order("8")
+                return await client.account_balance()
+
+        balances = asyncio.run(run())
+        self.assertEqual((balances["BTC"]["free"], balances["BTC"]["locked"]), (1.0, 0.0))
+        self.assertEqual(self.account_requests, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+import trbinance
+from trbinance.market_cache import MarketCache
+
+MARKETS = {"BTC/TRY": {"id": "BTCTRY", "symbol": "BTC/TRY", "symbolType": 1, "precision": {"price": 0}}}
+
+
+class TestMarketCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = MarketCache(os.path.join(self.tmpdir.name, "markets.json"), ttl=60)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_save_load_and_ttl(self):
+        self.assertIsNone(self.cache.load())
+        self.cache.save(MARKETS)
+        self.assertEqual(self.cache.load(), MARKETS)
+        self.assertIsNone(self.cache.load(max_age=-1))
+        self.assertLess(self.cache.age(), 60)
+
+    def test_warm_start_skips_download(self):
+        self.cache.save(MARKETS)
+        client = trbinance.Client(markets_cache=self.cache)
+        client._request = MagicMock()
+        self.assertEqual(client.get_symbol_type("BTC/TRY"), 1)
+        self.assertEqual(client.symbols, ["BTC/TRY"])
+        client._request.assert_not_called()
+
+    def test_stale_cache_is_downloaded_and_saved(self):
+        client = trbinance.Client(markets_cache=self.cache)
+        client.get_symbols = MagicMock(side_effect=lambda: client._save_markets(MARKETS) or MARKETS)
+        self.assertEqual(client.load_markets(), MARKETS)
+        client.get_symbols.assert_called_once()
+        self.assertEqual(self.cache.load(), MARKETS)
+
+        other = trbinance.Client(markets_cache=MarketCache(self.cache.path, ttl=60))
+        other.get_symbols = MagicMock()
+        self.assertEqual(other.load_markets(), MARKETS)
+        other.get_symbols.assert_not_called()
+
+    def test_refresh_without_cache_downloads(self):
+        client = trbinance.Client()
+        client._set_markets(MARKETS)
+        downloaded = threading.Event()
+        client.get_symbols = MagicMock(side_effect=lambda: downloaded.set() or MARKETS)
+        client.start_markets_refresh(interval=0.01)
+        try:
+            self.assertTrue(downloaded.wait(5))
+        finally:
+            client.stop_markets_refresh()
+
+    def test_async_refresh_is_awaited(self):
+        async def run():
+            client = trbinance.AsyncClient()
+            client._set_markets(MARKETS)
+            downloaded = asyncio.Event()
+
+            async def get_symbols():
+                downloaded.set()
+                return MARKETS
+            client.get_symbols = get_symbols
+            await client.start_markets_refresh(interval=0.01)
+            await asyncio.wait_for(downloaded.wait(), 5)
+            task = client._markets_refresh
+            await client.close()
+            return task
+
+        task = asyncio.run(run())
+        self.assertTrue(task.cancelled())
+
+
+if __name__ == '__main__':
+    unittest.main()
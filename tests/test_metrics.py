@@ -0,0 +1,78 @@
+import datetime
+import unittest
+from unittest.mock import MagicMock
+
+import trbinance
+from trbinance.metrics import Histogram, _bucket, _bucket_value
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_buckets_round_trip(self):
+        previous = -1
+        for value in list(range(200)) + [1000, 12345, 10 ** 6, 3 * 10 ** 9]:
+            index = _bucket(value)
+            self.assertGreaterEqual(index, previous)
+            previous = index
+            self.assertLessEqual(_bucket_value(index), value)
+            self.assertLessEqual(value - _bucket_value(index), value / 16)
+            # the bucket record() counts the value in
+            histogram = Histogram()
+            histogram.record(value / 1e6)
+            self.assertEqual(histogram.counts.index(1), index)
+
+    def test_quantiles(self):
+        histogram = Histogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 1000)
+        self.assertAlmostEqual(snapshot["p50"], 0.5, delta=0.5 / 16)
+        self.assertAlmostEqual(snapshot["p99"], 0.99, delta=0.99 / 16)
+        self.assertEqual(snapshot["max"], 1.0)
+
+
+class TestClientMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.client = trbinance.Client(api_key="key", secret_key="secret", metrics=True)
+        response = MagicMock()
+        response.content = (b'{"code": 0, "data": {"list": [{"orderId": 1, "symbol": "BTC_USDT", "price": "1.5", '
+                            b'"origQty": "2", "executedQty": "0", "side": 0, "type": 1, "status": 0}]}, "timestamp": 1}')
+        response.headers = {"X-MBX-USED-WEIGHT-1M": "42"}
+        response.status_code = 200
+        response.elapsed = datetime.timedelta(milliseconds=3)
+        self.client.session.get = MagicMock(return_value=response)
+
+    def test_phases_and_counters(self):
+        samples = []
+        self.client.metrics.add_sink(samples.append)
+        for _ in range(3):
+            self.client.all_orders()
+        snapshot = self.client.metrics.snapshot()["GET /orders"]
+        self.assertEqual(snapshot["count"], 3)
+        self.assertEqual(snapshot["statuses"], {200: 3})
+        self.assertEqual(snapshot["weight"], 15)
+        for phase in ["queue", "sign", "ttfb", "transfer", "decode", "format", "total"]:
+            self.assertEqual(snapshot["phases"][phase]["count"], 3, phase)
+        self.assertEqual(len(samples), 3)
+        self.assertEqual(samples[0]["endpoint"], "/orders")
+        self.assertNotIn("format", samples[0])
+
+    def test_prometheus(self):
+        self.client.all_orders()
+        text = self.client.metrics.prometheus()
+        self.assertIn('trbinance_request_seconds_count{method="GET",endpoint="/orders",phase="total"} 1', text)
+        self.assertIn('trbinance_requests_total{method="GET",endpoint="/orders",status="200"} 1', text)
+        self.assertIn('trbinance_request_weight_total{method="GET",endpoint="/orders"} 5', text)
+        self.assertIn('trbinance_used_weight{timeframe="1m"} 42.0', text)
+
+    def test_failed_requests_are_counted(self):
+        self.client.session.get = MagicMock(side_effect=ConnectionError("down"))
+        with self.assertRaises(ConnectionError):
+            self.client.all_orders()
+        self.assertEqual(self.client.metrics.snapshot()["GET /orders"]["statuses"], {"error": 1})
+
+    def test_off_by_default(self):
+        client = trbinance.Client()
+        self.assertIsNone(client.metrics)
@@ -0,0 +1,69 @@
+import unittest
+
+import trbinance
+from trbinance.helper import format_order_data
+from trbinance.models import Order, Trade, Balance
+from trbinance.transport import InProcessTransport
+
+
+def raw_order():
+    return {"orderId": 5467573389, "clientId": "e8d4", "symbol": "BTC_USDT", "symbolType": 1, "side": 0, "type": 1,
+            "price": "10000", "origQty": "0.001", "executedQty": "0", "status": 3, "createTime": 1681279199188,
+            "newField": "x"}
+
+
+class TestModels(unittest.TestCase):
+
+    def test_order_matches_formatted_dict(self):
+        raw = raw_order()
+        order = Order.from_raw(raw)
+        self.assertEqual(raw["price"], "10000")  # not mutated
+        expected = format_order_data(raw_order())
+        for key in ["orderId", "symbol", "price", "origQty", "status", "side_name", "status_name", "newField"]:
+            self.assertEqual(order[key], expected[key])
+        self.assertEqual(order.type_name, "LIMIT")
+        self.assertIn("orderId", order)
+        self.assertNotIn("stopPrice", order)
+        self.assertFalse(hasattr(order, "__dict__"))
+        order["timestamp"] = 1
+        self.assertEqual(order.timestamp, 1)
+
+    def test_trade_and_balance(self):
+        trade = Trade.from_raw({"tradeId": 1, "orderId": 2, "symbol": "BTC_TRY", "price": "5", "qty": "2"})
+        self.assertEqual((trade.symbol, trade.price, trade.qty), ("BTC/TRY", 5.0, 2.0))
+        balance = Balance.from_raw({"asset": "BTC", "free": "1.5", "locked": "0.5"})
+        self.assertEqual(balance.total, 2.0)
+
+    def client(self, routes):
+        # the default decoder parses the numbers, as it does in use
+        return trbinance.Client(secret_key="secret", models=True, transport=InProcessTransport(routes))
+
+    def test_client_models_and_raw(self):
+        client = self.client({"GET /open/v1/orders": {"code": 0, "data": {"list": [raw_order()]}}})
+        self.assertIsInstance(client.all_orders()[0], Order)
+        self.assertEqual(client.all_orders()[0].price, 10000.0)
+        self.assertEqual(client.all_orders(raw=True)[0]["orderId"], 5467573389)
+
+        client = self.client({"GET /open/v1/account/spot": {"code": 0, "data": {"accountAssets": [
+            {"asset": "BTC", "free": "1", "locked": "0"}]}}})
+        self.assertEqual(client.account_balance()["BTC"].free, 1.0)
+
+    def test_client_trades_have_numbers(self):
+        client = self.client({"GET /open/v1/orders/trades": {"code": 0, "data": {"list": [
+            {"tradeId": 1, "orderId": 2, "symbol": "BTC_TRY", "price": "100.5", "qty": "2", "quoteQty": "201",
+             "commission": "0.1"}]}}})
+        trade = client.account_trade_list()[0]
+        self.assertEqual((trade.price, trade.qty, trade.quoteQty, trade.commission), (100.5, 2.0, 201.0, 0.1))
+        self.assertIs(trade.price.__class__, float)
+
+    def test_model_balance_has_the_aggregates(self):
+        client = self.client({"GET /open/v1/account/spot": {"code": 0, "data": {"accountAssets": [
+            {"asset": "BTC", "free": "1", "locked": "0.5"}, {"asset": "TRY", "free": "0", "locked": "0"}]}}})
+        balance = client.account_balance()
+        self.assertIsInstance(balance["TRY"], Balance)
+        self.assertEqual(balance["free"], {"BTC": 1.0})
+        self.assertEqual(balance["locked"], {"BTC": 0.5})
+        self.assertEqual(balance["total"], {"BTC": 1.5})
+
+if __name__ == '__main__':
+    unittest.main()
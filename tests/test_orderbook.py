@@ -0,0 +1,55 @@
+import unittest
+
+from trbinance.orderbook import LocalOrderBook
+
+SNAPSHOT = {
+    "lastUpdateId": 100,
+    "bids": [[99.0, 1.0], [98.0, 2.0], [97.0, 3.0]],
+    "asks": [[101.0, 1.5], [102.0, 2.5]],
+}
+
+
+def diff(first, last, bids=(), asks=()):
+    return {"e": "depthUpdate", "U": first, "u": last, "b": list(bids), "a": list(asks)}
+
+
+class TestLocalOrderBook(unittest.TestCase):
+
+    def setUp(self):
+        self.book = LocalOrderBook("BTC/TRY")
+        self.book.apply_snapshot(SNAPSHOT)
+
+    def test_snapshot_queries(self):
+        self.assertEqual(self.book.best_bid(), [99.0, 1.0])
+        self.assertEqual(self.book.best_ask(), [101.0, 1.5])
+        self.assertEqual(self.book.mid_price(), 100.0)
+        self.assertEqual(self.book.spread(), 2.0)
+        self.assertEqual(self.book.top(2)["bids"], [[99.0, 1.0], [98.0, 2.0]])
+        self.assertEqual(self.book.bids.depth(2), 3.0)
+        self.assertEqual(self.book.bids.quantity_within(98.0), 3.0)
+        self.assertEqual(self.book.asks.quantity_within(100.0), 0.0)
+        self.assertEqual(self.book.bids.price_for_quantity(4.0), 97.0)
+        self.assertIsNone(self.book.asks.price_for_quantity(10.0))
+
+    def test_diffs_update_levels(self):
+        self.assertTrue(self.book.apply_diff(diff(90, 100, bids=[["99.5", "1"]])))  # covered by the snapshot
+        self.assertEqual(self.book.best_bid(), [99.0, 1.0])
+        self.assertTrue(self.book.apply_diff(diff(95, 105, bids=[["99.5", "4"], ["99", "0"]], asks=[["101", "0"]])))
+        self.assertTrue(self.book.apply_diff(diff(106, 106, asks=[["100.5", "1"]])))
+        self.assertEqual(self.book.best_bid(), [99.5, 4.0])
+        self.assertEqual(self.book.best_ask(), [100.5, 1.0])
+        self.assertEqual(len(self.book.bids), 3)
+        self.assertEqual(self.book.bids.depth(10), 9.0)
+        self.assertEqual(self.book.last_update_id, 106)
+
+    def test_gap_requires_resync(self):
+        self.assertFalse(self.book.apply_diff(diff(102, 103)))
+        self.assertFalse(self.book.apply_diff(diff(104, 104)))
+        self.book.apply_snapshot({**SNAPSHOT, "lastUpdateId": 103})
+        self.assertTrue(self.book.apply_diff(diff(104, 104)))
+        self.assertFalse(self.book.apply_diff(diff(106, 107)))
+        self.assertFalse(self.book.synced)
+
+
+if __name__ == '__main__':
+    unittest.main()
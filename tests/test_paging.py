@@ -0,0 +1,69 @@
+import unittest
+
+import trbinance
+
+ORDERS = [{"orderId": i, "symbol": "BTC_USDT", "side": 0, "type": 1, "price": "1.0", "origQty": "1.0",
+           "executedQty": "0", "status": 0, "createTime": 1000 + i} for i in range(1, 26)]
+WITHDRAWS = [{"id": str(i), "asset": "USDT", "amount": "1", "applyTime": 1000 + i} for i in range(12)]
+
+
+def order_pages(params):
+    start = params.get("fromId", 1)
+    return {"code": 0, "data": {"list": [dict(o) for o in ORDERS if o["orderId"] >= start][:params["limit"]]}}
+
+
+def withdraw_pages(params):
+    offset = params.get("offset", 0)
+    return {"code": 0, "data": WITHDRAWS[offset:offset + params["limit"]]}
+
+
+class TestPaging(unittest.TestCase):
+
+    def setUp(self):
+        self.client = trbinance.Client()
+        self.calls = []
+
+        def request(method, endpoint, security_type, symbol_type=0, params=None, url=None):
+            self.calls.append(dict(params))
+            return order_pages(params) if endpoint == "/orders" else withdraw_pages(params)
+
+        self.client._request = request
+
+    def test_iter_all_orders_pages_through_history(self):
+        orders = list(self.client.iter_all_orders("BTC/USDT", limit=10))
+        self.assertEqual([order["orderId"] for order in orders], [str(i) for i in range(1, 26)])
+        self.assertEqual([call.get("fromId") for call in self.calls], [None, 11, 21])
+
+    def test_stops_on_id_bound(self):
+        orders = list(self.client.iter_all_orders(limit=10, toId=12, prefetch=False))
+        self.assertEqual(orders[-1]["orderId"], "12")
+        self.assertEqual(len(self.calls), 2)
+
+    def test_stops_on_time_bound(self):
+        orders = list(self.client.iter_all_orders(limit=10, endTime=1005, prefetch=False))
+        self.assertEqual(len(orders), 5)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_iter_withdraws_pages_by_offset(self):
+        withdraws = list(self.client.iter_withdraws(limit=5))
+        self.assertEqual(withdraws, WITHDRAWS)
+        self.assertEqual([call.get("offset") for call in self.calls], [None, 5, 10])
+
+
+class TestAsyncPaging(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.client = trbinance.AsyncClient()
+
+        async def request(method, endpoint, security_type, symbol_type=0, params=None, url=None):
+            return order_pages(params) if endpoint == "/orders" else withdraw_pages(params)
+
+        self.client._request = request
+
+    async def test_iter_all_orders(self):
+        orders = [order async for order in self.client.iter_all_orders(limit=10, toId=22)]
+        self.assertEqual([order["orderId"] for order in orders], [str(i) for i in range(1, 23)])
+
+    async def test_iter_deposits(self):
+        deposits = [deposit async for deposit in self.client.iter_deposits(limit=5, endTime=1007)]
+        self.assertEqual(deposits, WITHDRAWS[:8])
@@ -0,0 +1,91 @@
+import copy
+import json
+import os
+import unittest
+from unittest.mock import MagicMock
+
+import trbinance
+from trbinance.helper import format_symbol_data
+from trbinance.quantizer import OrderQuantizer, FILTER_FAILURE, np
+
+
+def load_markets():
+    with open(os.path.join(os.path.dirname(__file__), 'test_responses', 'get_symbols.json'), 'r') as f:
+        data = [format_symbol_data(i) for i in json.load(f)['data']['list']]
+    return {d['symbol']: d for d in data}
+
+
+class TestOrderQuantizer(unittest.TestCase):
+
+    def setUp(self):
+        self.markets = load_markets()
+        self.eth = OrderQuantizer(self.markets["ETH/USDT"])
+
+    def test_snap_without_float_drift(self):
+        self.assertEqual(self.eth.snap_price(0.3), "0.30")
+        self.assertEqual(self.eth.snap_price(1800.129, side="BUY"), "1800.12")
+        self.assertEqual(self.eth.snap_price(1800.121, side="SELL"), "1800.13")
+        self.assertEqual(self.eth.snap_price("1800.125"), "1800.12")
+        self.assertEqual(self.eth.snap_amount(0.12349), "0.1234")
+        self.assertEqual(self.eth.snap_amount(0.3), "0.3000")
+
+    def test_vectorized_snap(self):
+        prices = [1800.129, 1800.12, 0.3, 1799.995]
+        self.assertEqual(list(self.eth.snap_prices(prices, side="BUY")), [1800.12, 1800.12, 0.3, 1799.99])
+        self.assertEqual(list(self.eth.snap_prices(prices, side="SELL")), [1800.13, 1800.12, 0.3, 1800.0])
+        self.assertEqual(list(self.eth.snap_amounts([0.12349, 0.3])), [0.1234, 0.3])
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_vectorized_snap_of_large_prices(self):
+        # prices already on the tick stay where they are, float error grows with the tick count
+        prices = np.round(np.arange(30_000_000, 30_010_000) * 0.01, 2)
+        np.testing.assert_array_equal(self.eth.snap_prices(prices, side="BUY"), prices)
+        np.testing.assert_array_equal(self.eth.snap_prices(prices, side="SELL"), prices)
+
+        market = copy.deepcopy(self.markets["ETH/USDT"])
+        for item in market["info"]["filters"]:
+            if item["filterType"] == "PRICE_FILTER":
+                item["tickSize"] = "0.001"
+        quantizer = OrderQuantizer(market)
+        prices = np.round(np.arange(200_000_000, 200_010_000) * 0.001, 3)
+        np.testing.assert_array_equal(quantizer.snap_prices(prices, side="BUY"), prices)
+        np.testing.assert_array_equal(quantizer.snap_prices(prices, side="SELL"), prices)
+        self.assertEqual(list(quantizer.snap_prices([999999.0014, 999999.0016], side="BUY")), [999999.001, 999999.001])
+        self.assertEqual(list(quantizer.snap_prices([999999.0014], side="SELL")), [999999.002])
+
+    def test_validate(self):
+        self.assertIsNone(self.eth.validate("LIMIT", quantity="0.01", price="1800.12"))
+        self.assertEqual(self.eth.validate("LIMIT", quantity="0.01", price="1800.123")["msg"], "Filter failure: PRICE_FILTER")
+        self.assertEqual(self.eth.validate("LIMIT", quantity="0.00001", price="1800")["msg"], "Filter failure: LOT_SIZE")
+        self.assertEqual(self.eth.validate("LIMIT", quantity="0.01005", price="1800")["msg"], "Filter failure: LOT_SIZE")
+        self.assertEqual(self.eth.validate("LIMIT", quantity="0.001", price="1800")["msg"], "Filter failure: NOTIONAL")
+        self.assertEqual(self.eth.validate("MARKET", quantity="2500")["msg"], "Filter failure: MARKET_LOT_SIZE")
+        self.assertIsNone(self.eth.validate("MARKET", quoteOrderQty="20"))
+
+    def test_validate_max_bounds(self):
+        market = copy.deepcopy(self.markets["ETH/USDT"])
+        filters = {item["filterType"]: item for item in market["info"]["filters"]}
+        filters["NOTIONAL"].update(maxNotional="1000", applyMaxToMarket=False)
+        quantizer = OrderQuantizer(market)
+        self.assertEqual(quantizer.validate("LIMIT", quantity="1", price="1800")["msg"], "Filter failure: NOTIONAL")
+        self.assertIsNone(quantizer.validate("LIMIT", quantity="0.5", price="1800"))
+        self.assertIsNone(quantizer.validate("MARKET", quoteOrderQty="1800"))
+
+        # a max of 0 is no limit
+        filters["PRICE_FILTER"]["maxPrice"] = "0"
+        filters["LOT_SIZE"]["maxQty"] = "0"
+        filters["NOTIONAL"]["maxNotional"] = "0"
+        quantizer = OrderQuantizer(market)
+        self.assertIsNone(quantizer.validate("LIMIT", quantity="100000", price="99999999"))
+
+    def test_create_order_rejects_locally(self):
+        client = trbinance.Client(validate_orders=True)
+        client._set_markets(self.markets)
+        client._request = MagicMock()
+        resp = client.create_order("BTC/TRY", "BUY", "LIMIT", quantity="0.001", price="500000.5")
+        self.assertEqual(resp["code"], FILTER_FAILURE)
+        client._request.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
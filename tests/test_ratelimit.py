@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from trbinance.ratelimit import (
+    WeightBudget, WeightScheduler, AsyncWeightScheduler, endpoint_weight, endpoint_priority,
+    PRIORITY_HIGH, PRIORITY_LOW,
+)
+
+
+class TestWeightBudget(unittest.TestCase):
+
+    def test_endpoint_weights(self):
+        self.assertEqual(endpoint_weight("GET", "/v3/depth", {"limit": 100}), 1)
+        self.assertEqual(endpoint_weight("GET", "/v3/depth", {"limit": 500}), 5)
+        self.assertEqual(endpoint_weight("GET", "/v3/depth", {"limit": 5000}), 50)
+        self.assertEqual(endpoint_weight("GET", "/common/time"), 1)
+        self.assertEqual(endpoint_priority("POST", "/orders/cancel"), PRIORITY_HIGH)
+        self.assertEqual(endpoint_priority("GET", "/v1/klines"), PRIORITY_LOW)
+
+    def test_reserve_is_kept_for_high_priority(self):
+        budget = WeightBudget(limit=100, reserve=0.1)
+        now = 60.0
+        budget.charge(85, now)
+        self.assertTrue(budget.fits(5, PRIORITY_LOW, now))
+        self.assertFalse(budget.fits(6, PRIORITY_LOW, now))
+        self.assertTrue(budget.fits(15, PRIORITY_HIGH, now))
+        self.assertTrue(budget.fits(6, PRIORITY_LOW, now + 60))
+
+    def test_headers_and_ban(self):
+        budget = WeightBudget(limit=100)
+        now = 60.0
+        budget.update(200, {"X-MBX-USED-WEIGHT-1M": "99"}, now)
+        self.assertEqual(budget.used, 99)
+        budget.update(429, {"Retry-After": "5"}, now)
+        self.assertFalse(budget.fits(1, PRIORITY_HIGH, now + 1))
+        self.assertAlmostEqual(budget.wait_time(now + 1), 4)
+
+
+class TestSchedulers(unittest.TestCase):
+
+    def test_blocking_priority_order(self):
+        scheduler = WeightScheduler(WeightBudget(limit=10))
+        scheduler.budget.banned_until = time.time() + 0.3
+        order = []
+
+        def call(method, endpoint):
+            scheduler.acquire(method, endpoint)
+            order.append(endpoint)
+
+        threads = [threading.Thread(target=call, args=("GET", "/v1/klines"))]
+        threads[0].start()
+        time.sleep(0.05)
+        threads.append(threading.Thread(target=call, args=("POST", "/orders/cancel")))
+        threads[1].start()
+        time.sleep(0.05)
+        self.assertEqual(scheduler.queue_depth, 2)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ["/orders/cancel", "/v1/klines"])
+        self.assertEqual(scheduler.status()["queue_depth"], 0)
+
+    def test_async_priority_order(self):
+        async def main():
+            scheduler = AsyncWeightScheduler(WeightBudget(limit=10))
+            scheduler.budget.banned_until = time.time() + 0.3
+            order = []
+
+            async def call(method, endpoint):
+                await scheduler.acquire(method, endpoint)
+                order.append(endpoint)
+
+            low = asyncio.create_task(call("GET", "/v3/depth"))
+            await asyncio.sleep(0.01)
+            high = asyncio.create_task(call("POST", "/orders"))
+            await asyncio.sleep(0.01)
+            self.assertEqual(scheduler.queue_depth, 2)
+            await asyncio.gather(low, high)
+            return order
+
+        self.assertEqual(asyncio.run(main()), ["/orders", "/v3/depth"])
+
+
+if __name__ == '__main__':
+    unittest.main()
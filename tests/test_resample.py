@@ -0,0 +1,107 @@
+import random
+import unittest
+from datetime import datetime, timezone
+
+from trbinance.klines import klines_to_columns
+from trbinance.resample import KlineResampler, resample_klines, bucket_start, bucket_end, can_resample, np
+
+MINUTE = 60_000
+HOUR = 60 * MINUTE
+
+
+def ms(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp()) * 1000
+
+
+def series(start, count, step=MINUTE, seed=1):
+    generator = random.Random(seed)
+    rows, price = [], 100.0
+    for i in range(count):
+        open_time = start + i * step
+        close = price + generator.uniform(-1, 1)
+        rows.append([open_time, str(price), str(max(price, close) + 0.5), str(min(price, close) - 0.5), str(close),
+                     "2", open_time + step - 1, "200", i % 7, "1", "100", "0"])
+        price = close
+    return rows
+
+
+def expected(rows, interval):
+    # one candle per bucket, built row by row
+    candles = {}
+    for row in rows:
+        start = bucket_start(row[0], interval)
+        values = [float(v) for v in row[1:6]] + [float(row[7]), int(row[8]), float(row[9]), float(row[10])]
+        if start not in candles:
+            candles[start] = [start] + values[:5] + [bucket_end(start, interval)] + values[5:]
+        else:
+            candle = candles[start]
+            candle[2], candle[3], candle[4] = max(candle[2], values[1]), min(candle[3], values[2]), values[3]
+            for i, j in [(5, 4), (7, 5), (8, 6), (9, 7), (10, 8)]:
+                candle[i] += values[j]
+    return [candles[start] for start in sorted(candles)]
+
+
+def as_rows(columns):
+    return [list(row) for row in zip(*[list(values) for values in columns.values()])]
+
+
+class TestResample(unittest.TestCase):
+
+    def test_calendar_buckets(self):
+        self.assertEqual(bucket_start(ms(2024, 3, 14, 10, 30), "1w"), ms(2024, 3, 11))
+        self.assertEqual(bucket_start(ms(2024, 2, 29, 23, 59), "1M"), ms(2024, 2, 1))
+        self.assertEqual(bucket_end(ms(2024, 2, 1), "1M"), ms(2024, 3, 1) - 1)
+        self.assertEqual(bucket_end(ms(2024, 12, 1), "1M"), ms(2025, 1, 1) - 1)
+        self.assertEqual(bucket_start(ms(2024, 3, 14, 10, 30), "4h"), ms(2024, 3, 14, 8))
+        self.assertTrue(can_resample("1m", "1M"))
+        self.assertTrue(can_resample("1d", "1w"))
+        self.assertFalse(can_resample("5m", "3m"))
+        self.assertFalse(can_resample("3d", "1w"))
+        self.assertFalse(can_resample("1w", "1M"))
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_vectorized(self):
+        rows = series(ms(2024, 1, 29, 22), 3100)
+        columns = klines_to_columns(rows)
+        np.testing.assert_array_equal(bucket_start(columns["open_time"], "1M")[[0, -1]], [ms(2024, 1, 1), ms(2024, 2, 1)])
+        for interval in ["5m", "1h", "4h", "1d", "1w", "1M"]:
+            self.assertEqual(as_rows(resample_klines(columns, interval)), expected(rows, interval), interval)
+
+        hours = klines_to_columns(series(ms(2023, 12, 1), 24 * 90, HOUR))
+        months = resample_klines(hours, "1M")
+        self.assertEqual(list(months["open_time"]), [ms(2023, 12, 1), ms(2024, 1, 1), ms(2024, 2, 1)])
+        self.assertEqual(months["trades"].sum(), hours["trades"].sum())
+
+    def test_incremental(self):
+        rows = series(ms(2024, 3, 31, 20), 400)
+        resampler = KlineResampler("1m", ["15m", "1h", "1w", "1M"], history=10)
+        for row in rows:
+            # revisions of the open candle before its final state
+            resampler.update(row[:4] + [row[1], "0.5"] + row[6:])
+            self.assertTrue(resampler.update(row))
+        self.assertFalse(resampler.update(rows[0]))
+
+        for interval in ["15m", "1h", "1w", "1M"]:
+            candles = expected(rows, interval)
+            self.assertEqual(as_rows(resampler.klines(interval)), candles[-11:], interval)
+            self.assertEqual(list(resampler.candle(interval)), candles[-1])
+        self.assertEqual(resampler.candle("1M")[0], ms(2024, 4, 1))
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_load_then_update(self):
+        rows = series(ms(2024, 1, 1), 300)
+        loaded = KlineResampler("1m", ["5m", "1h"])
+        loaded.load(klines_to_columns(rows[:250]))
+        updated = KlineResampler("1m", ["5m", "1h"])
+        for row in rows[:250]:
+            updated.update(row)
+        for row in rows[250:]:
+            loaded.update(row)
+            updated.update(row)
+        for interval in ["5m", "1h"]:
+            self.assertEqual(as_rows(loaded.klines(interval)), as_rows(updated.klines(interval)))
+            self.assertEqual(as_rows(loaded.klines(interval)), expected(rows, interval))
+
+
+if __name__ == '__main__':
+    unittest.main()
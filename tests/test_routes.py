@@ -0,0 +1,48 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+
+import trbinance
+
+MARKETS = {
+    "BTC/TRY": {"id": "BTCTRY", "symbol": "BTC/TRY", "symbolType": 1},
+    "ETH/TRY": {"id": "ETHTRY", "symbol": "ETH/TRY", "symbolType": 0},
+}
+
+
+class TestRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.client = trbinance.Client()
+        self.client._set_markets(MARKETS)
+
+    def test_routes_are_precomputed(self):
+        route = self.client.routes["BTC/TRY"]["depth"]
+        self.assertEqual(route.url, "https://api.binance.me/api/v3/depth")
+        self.assertEqual(route.symbol, "BTCTRY")
+        route = self.client.routes["ETH/TRY"]["klines"]
+        self.assertEqual(route.url, "https://www.trbinance.com/open/v1/market/klines")
+        self.assertEqual(route.symbol, "ETH_TRY")
+
+    def test_market_data_call_uses_route(self):
+        self.client._request = MagicMock(return_value=[])
+        self.client.get_klines("BTC/TRY", "1m")
+        args, kwargs = self.client._request.call_args
+        self.assertEqual(args[1], "/v1/klines")
+        self.assertEqual(kwargs["url"], "https://api.binance.me/api/v1/klines")
+        self.assertEqual(kwargs["params"]["symbol"], "BTCTRY")
+        with self.assertRaises(AssertionError):
+            self.client.get_klines("ETH/TRY", "1m")
+
+    def test_async_loads_markets_once(self):
+        client = trbinance.AsyncClient()
+        client.get_symbols = AsyncMock(side_effect=lambda: client._set_markets(MARKETS))
+        client._request = AsyncMock(return_value=[])
+        self.assertEqual(asyncio.run(client.get_symbol_type("BTC/TRY")), 1)
+        asyncio.run(client.get_recent_trades("BTC/TRY"))
+        client.get_symbols.assert_awaited_once()
+        self.assertEqual(client._request.call_args.kwargs["params"]["symbol"], "BTCTRY")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import hashlib
+import hmac
+import unittest
+from unittest.mock import MagicMock
+
+import trbinance
+from trbinance.base_client import encode_params
+
+
+def expected_signature(secret, query_string):
+    return hmac.new(secret.encode(), query_string.encode(), hashlib.sha256).hexdigest()
+
+
+class TestSigning(unittest.TestCase):
+
+    def setUp(self):
+        self.client = trbinance.Client(api_key="key", secret_key="secret", rate_limit=False)
+
+    def test_signs_the_encoded_bytes(self):
+        params = {"symbol": "BTC_USDT", "clientId": "a b&c=d", "price": None, "timestamp": 1}
+        query_string = self.client._sign(params)
+        encoded = "symbol=BTC_USDT&clientId=a%20b%26c%3Dd&timestamp=1"
+        self.assertEqual(encode_params(params), encoded)
+        self.assertEqual(query_string, f"{encoded}&signature={expected_signature('secret', encoded)}")
+
+    def test_template_follows_secret_key(self):
+        first = self.client._generate_signature({"a": 1})
+        self.assertEqual(first, self.client._generate_signature({"a": 1}))
+        self.client.secret_key = "other"
+        self.assertEqual(self.client._generate_signature({"a": 1}), expected_signature("other", "a=1"))
+
+    def test_request_sends_what_was_signed(self):
+        response = MagicMock()
+        response.content = b'{"code": 0, "data": {"list": []}, "timestamp": 1}'
+        response.headers = {}
+        self.client.session.get = MagicMock(return_value=response)
+        self.client.session.post = MagicMock(return_value=response)
+
+        self.client._request("GET", "/orders", "private", params={"symbol": "BTC_USDT"})
+        url = self.client.session.get.call_args.args[0]
+        query_string, signature = url.split("?")[1].rsplit("&signature=", 1)
+        self.assertEqual(signature, expected_signature("secret", query_string))
+        self.assertIsNone(self.client.session.get.call_args.kwargs["params"])
+
+        self.client._request("POST", "/orders/cancel", "private", params={"orderId": 5})
+        kwargs = self.client.session.post.call_args.kwargs
+        query_string, signature = kwargs["data"].rsplit("&signature=", 1)
+        self.assertTrue(query_string.startswith("orderId=5&timestamp="))
+        self.assertEqual(signature, expected_signature("secret", query_string))
+        self.assertEqual(kwargs["headers"]["Content-Type"], "application/x-www-form-urlencoded")
+        self.assertEqual(kwargs["headers"]["X-MBX-APIKEY"], "key")
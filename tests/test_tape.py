@@ -0,0 +1,107 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import trbinance
+from trbinance.tape import TapeStore, TapeArchiver, np
+from trbinance.transport import InProcessTransport
+
+MARKETS = {"BTC/TRY": {"id": "BTCTRY", "symbol": "BTC/TRY", "symbolType": 1},
+           "ETH/TRY": {"id": "ETHTRY", "symbol": "ETH/TRY", "symbolType": 1}}
+
+
+def agg_trade(i):
+    return {"a": i, "p": f"{100 + i % 7}.5", "q": "0.1", "f": i * 2, "l": i * 2 + 1, "T": 1000 + i * 10,
+            "m": bool(i % 2), "M": True}
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestTape(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        self.store = TapeStore(self.root, segment_size=1000)
+        # the exchange has the aggTrades of ids 1..last
+        self.last = 2500
+        self.requests = []
+        self.transport = InProcessTransport({"GET /api/v3/aggTrades": self.agg_trades})
+        self.client = trbinance.Client(rate_limit=False, transport=self.transport)
+        self.client._set_markets(MARKETS)
+
+    def agg_trades(self, request):
+        # pages by fromId like the api
+        self.requests.append(dict(request.params))
+        limit = int(request.params.get("limit", 500))
+        if "fromId" in request.params:
+            first = int(request.params["fromId"])
+        elif "startTime" in request.params:
+            first = max((int(request.params["startTime"]) - 1000 + 9) // 10, 1)
+        else:
+            first = max(self.last - limit + 1, 1)
+        return [agg_trade(i) for i in range(first, min(first + limit, self.last + 1))]
+
+    def test_archives_and_resumes(self):
+        archiver = TapeArchiver(self.client, self.store, limit=400)
+        self.assertEqual(archiver.update(["BTC/TRY"], fromId=1), {"BTC/TRY": 2500})
+        self.assertEqual([s["count"] for s in self.store.segments("BTC/TRY")], [1000, 1000, 500])
+
+        self.last = 2600
+        self.requests.clear()
+        self.assertEqual(archiver.update(["BTC/TRY"]), {"BTC/TRY": 100})
+        self.assertEqual(self.requests[0]["fromId"], "2501")
+        # the tail segment was topped up instead of starting a new one
+        self.assertEqual([s["count"] for s in self.store.segments("BTC/TRY")], [1000, 1000, 600])
+        self.assertEqual(len(os.listdir(os.path.join(self.root, "aggTrades", "BTC_TRY"))), 3 + 2)
+
+        ids = self.store.read("BTC/TRY", columns=["id"])["id"]
+        np.testing.assert_array_equal(ids, np.arange(1, 2601))
+
+    def test_range_queries(self):
+        TapeArchiver(self.client, self.store, limit=1000).update(["BTC/TRY"], fromId=1)
+        data = self.store.read("BTC/TRY", fromId=995, toId=1004)
+        np.testing.assert_array_equal(data["id"], np.arange(995, 1005))
+        self.assertEqual(data["price"][0], 100 + 995 % 7 + 0.5)
+        self.assertEqual(data["buyer_maker"].dtype, np.bool_)
+
+        data = self.store.read("BTC/TRY", startTime=1000 + 2001 * 10, endTime=1000 + 2003 * 10, columns=["id", "qty"])
+        self.assertEqual(sorted(data), ["id", "qty"])
+        np.testing.assert_array_equal(data["id"], [2001, 2002, 2003])
+        self.assertEqual(len(self.store.read("BTC/TRY", fromId=5000)["id"]), 0)
+
+    def test_new_symbol_starts_at_time(self):
+        archiver = TapeArchiver(self.client, self.store, limit=1000)
+        archiver.update(["ETH/TRY"], startTime=1000 + 2000 * 10)
+        self.assertEqual(self.requests[0]["startTime"], str(1000 + 2000 * 10))
+        self.assertEqual(self.store.segments("ETH/TRY")[0]["first_id"], 2000)
+        self.assertEqual(self.store.symbols(), ["ETH/TRY"])
+
+    def test_skips_trades_already_stored(self):
+        self.assertEqual(self.store.append("BTC/TRY", [agg_trade(i) for i in range(1, 11)]), 10)
+        self.assertEqual(self.store.append("BTC/TRY", [agg_trade(i) for i in range(5, 16)]), 5)
+        self.assertEqual(self.store.last_id("BTC/TRY"), 15)
+
+    def test_read_retries_a_replaced_segment(self):
+        self.store.append("BTC/TRY", [agg_trade(i) for i in range(1, 11)])
+        stale = self.store.segments("BTC/TRY")
+        # the tail segment is rewritten under a new name and the old one removed
+        self.store.append("BTC/TRY", [agg_trade(i) for i in range(11, 21)])
+        segments, indexes = self.store.segments, [stale]
+        self.store.segments = lambda symbol: indexes.pop() if indexes else segments(symbol)
+        np.testing.assert_array_equal(self.store.read("BTC/TRY")["id"], np.arange(1, 21))
+
+    def test_async_archiver(self):
+        async def run():
+            async with trbinance.AsyncClient(rate_limit=False, transport=self.transport) as client:
+                client._set_markets(MARKETS)
+                archiver = TapeArchiver(client, self.store, limit=1000, max_pages=2)
+                return await archiver.aupdate(["BTC/TRY", "ETH/TRY"], fromId=1)
+
+        self.assertEqual(asyncio.run(run()), {"BTC/TRY": 2000, "ETH/TRY": 2000})
+        self.assertEqual(self.store.last_id("ETH/TRY"), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
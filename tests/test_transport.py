@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import tempfile
+import unittest
+
+import requests
+
+import trbinance
+from trbinance.transport import InProcessTransport, RecordingTransport, ReplayTransport, Request, Response
+
+ORDER = {"orderId": "5467573389", "clientId": "e8d4", "symbol": "BTC_TRY", "symbolType": 1, "side": 0, "type": 1,
+         "price": "10000", "origQty": "0.001", "executedQty": "0", "status": 0, "createTime": 1681279199188}
+
+
+def envelope(data):
+    return {"code": 0, "msg": "success", "data": data, "timestamp": 1681279199188}
+
+
+class TestInProcessTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.seen = []
+
+        def create_order(request):
+            self.seen.append(request)
+            return envelope({**ORDER, "symbol": request.params["symbol"], "side": int(request.params["side"])})
+
+        self.transport = InProcessTransport({
+            "GET /open/v1/common/time": {"code": 0, "msg": "success", "timestamp": 1625836016000},
+            "POST /open/v1/orders": create_order,
+            "GET /open/v1/orders/detail": lambda request: envelope({**ORDER, "orderId": request.params["orderId"]}),
+        })
+        self.client = trbinance.Client("key", "secret", rate_limit=False, transport=self.transport)
+
+    def test_public_request(self):
+        self.assertEqual(self.client.check_server_time()["timestamp"], 1625836016000)
+        self.assertIsNone(self.client.session)
+
+    def test_signed_order_goes_through_the_client(self):
+        order = self.client.create_order("BTC/TRY", "SELL", "LIMIT", quantity="0.001", price="10000")
+        self.assertEqual(order["symbol"], "BTC/TRY")
+        self.assertEqual(order["side"], 1)
+        self.assertEqual(order["orderId"], "5467573389")
+
+        request = self.seen[0]
+        self.assertEqual(request.headers["X-MBX-APIKEY"], "key")
+        params = dict(request.params)
+        signature = params.pop("signature")
+        query_string = "&".join(f"{k}={v}" for k, v in params.items())
+        self.assertEqual(signature, hmac.new(b"secret", query_string.encode(), hashlib.sha256).hexdigest())
+
+    def test_query_params_reach_the_handler(self):
+        self.assertEqual(self.client.query_order("42")["orderId"], "42")
+
+    def test_errors_raise_like_requests(self):
+        with self.assertRaises(requests.HTTPError) as raised:
+            self.client._request("GET", "/missing", "public")
+        self.assertEqual(raised.exception.response.json()["msg"], "not found")
+
+    def test_async_handler(self):
+        async def handler(request):
+            await asyncio.sleep(0)
+            return {"code": 0, "msg": "success", "timestamp": 1625836016000}
+
+        async def run():
+            async with trbinance.AsyncClient(rate_limit=False, transport=InProcessTransport(handler)) as client:
+                return await client.check_server_time()
+
+        self.assertEqual(asyncio.run(run())["timestamp"], 1625836016000)
+
+
+class TestRecordReplay(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "session.jsonl.gz")
+        orders = iter(range(1, 100))
+        self.live = InProcessTransport({
+            "GET /open/v1/common/time": lambda request: {"code": 0, "msg": "success", "timestamp": next(orders)},
+            "GET /open/v1/orders/detail": lambda request: envelope({**ORDER, "orderId": request.params["orderId"]}),
+        })
+
+    def record(self):
+        with trbinance.Client("key", "secret", rate_limit=False,
+                              transport=RecordingTransport(self.live, self.path)) as client:
+            self.assertEqual([client.check_server_time()["timestamp"] for _ in range(2)], [1, 2])
+            self.assertEqual(client.query_order("7")["orderId"], "7")
+            self.assertEqual(client.query_order("8")["orderId"], "8")
+            self.assertEqual(client.transport.recorded, 4)
+
+    def test_replay_in_recorded_order(self):
+        self.record()
+        with trbinance.Client("key", "other", rate_limit=False, transport=ReplayTransport(self.path)) as client:
+            self.assertEqual([client.check_server_time()["timestamp"] for _ in range(3)], [1, 2, 1])
+            self.assertEqual(client.query_order("8")["orderId"], "8")
+            self.assertEqual(client.query_order("7")["orderId"], "7")
+            # no exact match, falls back to the responses of the path
+            self.assertEqual(client.query_order("9")["orderId"], "7")
+
+    def test_replay_async(self):
+        self.record()
+
+        async def run():
+            async with trbinance.AsyncClient(rate_limit=False, transport=ReplayTransport(self.path)) as client:
+                return await client.query_order("8")
+
+        self.assertEqual(asyncio.run(run())["orderId"], "8")
+
+    def test_strict_replay(self):
+        self.record()
+        transport = ReplayTransport(self.path, strict=True)
+        with self.assertRaises(Exception):
+            transport.request("GET", "https://www.trbinance.com/open/v1/orders/detail?orderId=9")
+
+    def test_volatile_params_are_not_recorded(self):
+        request = Request("POST", "https://x/open/v1/orders", data="symbol=A&timestamp=1&signature=ab")
+        self.assertEqual(request.params, {"symbol": "A", "timestamp": "1", "signature": "ab"})
+        self.assertEqual(request.key(), ("POST", "/open/v1/orders", (("symbol", "A"),)))
+
+
+class TestResponse(unittest.TestCase):
+
+    def test_response(self):
+        response = Response(418, {"X-MBX-USED-WEIGHT-1M": "3"}, b'{"code": -1}')
+        self.assertEqual(response.status, 418)
+        self.assertEqual(response.json(), {"code": -1})
+        with self.assertRaises(requests.HTTPError):
+            response.raise_for_status()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ import json
 import unittest
 from unittest.mock import MagicMock
 import trbinance
+from trbinance.transport import InProcessTransport
 
 class TestTrbinancePublicEndpoints(unittest.TestCase):
 
@@ -14,7 +15,7 @@ class TestTrbinancePublicEndpoints(unittest.TestCase):
 
     @staticmethod
     def _load_test_data(filename):
-        with open(os.path.join('test_responses', filename), 'r') as f:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_responses', filename), 'r') as f:
             return json.load(f)
 
     # def test_get_ticker_price(self):
@@ -25,13 +26,13 @@ class TestTrbinancePublicEndpoints(unittest.TestCase):
 
     def test_check_server_time(self):
         test_data = self._load_test_data('check_server_time.json')
-        self.trbinance._request = MagicMock(return_value=test_data)
+        self.trbinance.transport = InProcessTransport({"GET /open/v1/common/time": test_data})
         result = self.trbinance.check_server_time()
         self.assertEqual(result["timestamp"], 1625836016000)
 
     def test_get_symbols(self):
-        # test_data = self._load_test_data('get_symbols.json')
-        # self.trbinance._request = MagicMock(return_value=test_data)
+        test_data = self._load_test_data('get_symbols.json')
+        self.trbinance.transport = InProcessTransport({"GET /open/v1/common/symbols": test_data})
         result = self.trbinance.get_symbols()
         self.assertEqual(result["BTC/TRY"]['symbol'], 'BTC/TRY')
         self.assertEqual(result["BTC/TRY"]['base'], 'BTC')
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import unittest
+
+from aiohttp import web
+
+from trbinance import WebsocketClient
+
+
+class StandInStreams:
+    """ Websocket server answering SUBSCRIBE requests and pushing messages to subscribed streams """
+    def __init__(self):
+        self.subscribe_requests = []
+        self.sockets = []
+        self.rejected = set()
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        async for msg in ws:
+            data = json.loads(msg.data)
+            if data["method"] == "SUBSCRIBE":
+                self.subscribe_requests.append(data["params"])
+            if self.rejected & set(data["params"]):
+                await ws.send_json({"error": {"code": 2, "msg": "Invalid request"}, "id": data["id"]})
+            else:
+                await ws.send_json({"result": None, "id": data["id"]})
+        return ws
+
+    async def push(self, stream, data):
+        await self.sockets[-1].send_json({"stream": stream, "data": data})
+
+
+class TestWebsocketClient(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = StandInStreams()
+        app = web.Application()
+        app.router.add_get("/stream", self.server.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/stream"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def wait_for(self, condition):
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        self.fail("condition not met")
+
+    async def test_subscribe_and_receive(self):
+        async with WebsocketClient(url=self.url) as ws:
+            sub = await ws.trades(["BTC/TRY", "ETH/TRY"])
+            await self.wait_for(lambda: self.server.subscribe_requests)
+            self.assertEqual(self.server.subscribe_requests[0], ["btctry@trade", "ethtry@trade"])
+            await self.server.push("ethtry@trade", {"p": "1"})
+            message = await asyncio.wait_for(sub.get(), 1)
+            self.assertEqual(message["data"], {"p": "1"})
+
+    async def test_resubscribes_after_reconnect(self):
+        async with WebsocketClient(url=self.url, reconnect_delay=0.01) as ws:
+            sub = await ws.klines("BTC/TRY", "1m")
+            await self.wait_for(lambda: len(self.server.subscribe_requests) == 1)
+            await self.server.sockets[-1].close()
+            await self.wait_for(lambda: len(self.server.subscribe_requests) == 2)
+            self.assertEqual(self.server.subscribe_requests[1], ["btctry@kline_1m"])
+            self.assertEqual(ws.reconnects, 1)
+            await self.server.push("btctry@kline_1m", {"k": {}})
+            self.assertEqual((await asyncio.wait_for(sub.get(), 1))["stream"], "btctry@kline_1m")
+
+    async def test_bad_messages_do_not_end_the_connection(self):
+        async with WebsocketClient(url=self.url) as ws:
+            subscription = await ws.trades("BTC/TRY")
+            await ws.connected.wait()
+            with self.assertLogs("trbinance.websocket", "WARNING"):
+                await self.server.sockets[-1].send_str("{not json")
+                await self.server.sockets[-1].send_json(["a", "list"])
+                await self.server.push("btctry@trade", {"p": "1"})
+                message = await asyncio.wait_for(subscription.get(), 1)
+            self.assertEqual(message["data"], {"p": "1"})
+            self.assertEqual(ws.reconnects, 0)
+
+    async def test_rejected_subscribe_is_surfaced(self):
+        self.server.rejected.add("ethtry@trade")
+        async with WebsocketClient(url=self.url) as ws:
+            await ws.trades("BTC/TRY")
+            await ws.connected.wait()
+            with self.assertLogs("trbinance.websocket", "WARNING"):
+                await ws.trades("ETH/TRY")
+                await self.wait_for(lambda: ws.errors)
+        self.assertEqual(ws.errors[0]["streams"], ["ethtry@trade"])
+        self.assertEqual(ws.errors[0]["method"], "SUBSCRIBE")
+        self.assertEqual(ws.errors[0]["error"]["code"], 2)
+
+    async def test_drop_oldest_when_full(self):
+        async with WebsocketClient(url=self.url) as ws:
+            sub = await ws.subscribe("btctry@trade", queue_size=2)
+            await self.wait_for(lambda: self.server.subscribe_requests)
+            for i in range(5):
+                await self.server.push("btctry@trade", {"i": i})
+            await self.wait_for(lambda: ws.messages == 5)
+            self.assertEqual(sub.dropped, 3)
+            self.assertEqual([(await sub.get())["data"]["i"] for _ in range(2)], [3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,2 +1,12 @@
 from trbinance.client import Client
-from trbinance.async_client import AsyncClient
\ No newline at end of file
+from trbinance.async_client import AsyncClient
+from trbinance.websocket import WebsocketClient
+from trbinance.orderbook import LocalOrderBook
+from trbinance.models import Order, Trade, Balance
+from trbinance.hedging import HedgePolicy
+from trbinance.metrics import Metrics
+from trbinance.transport import InProcessTransport, RecordingTransport, ReplayTransport
+from trbinance.tape import TapeStore, TapeArchiver
+from trbinance.kline_cache import KlineCache
+from trbinance.resample import KlineResampler
+from trbinance.ledger import BalanceLedger
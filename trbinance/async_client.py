@@ -1,88 +1,271 @@
-import aiohttp
+import asyncio
 import time
+from yarl import URL
 
 from .helper import *
 from .defines import *
-from .base_client import BaseClient
+from .base_client import BaseClient, FORM_CONTENT_TYPE
+from .klines import kline_pages, merge_kline_pages, klines_to_columns, typed_kline
+from .batch import fan_out, collect, gather_bounded, order_result, OPEN_ORDER_STATUSES
+from .paging import aiter_pages, aiter_items, next_page_by_id, next_page_by_offset, page_list
+from .ratelimit import AsyncWeightScheduler
+from .hedging import HedgePolicy, hedged_call
+from .metrics import NULL_TIMER, trace_config
+from .transport import AiohttpTransport
+from .endpoints import order_type_value
+
+FORM_HEADERS = {'Content-Type': FORM_CONTENT_TYPE}
 
 class AsyncClient(BaseClient):
-    def __init__(self, *args, **kwargs):
+    scheduler_class = AsyncWeightScheduler
+
+    def __init__(self, *args, limit=100, limit_per_host=0, dns_cache_ttl=300, keepalive_timeout=30, hedge=None,
+                 transport=None, **kwargs):
+        """
+        Args:
+            limit (int, optional): max open connections in total. Defaults to 100.
+            limit_per_host (int, optional): max open connections per host, 0 for no limit. Defaults to 0.
+            dns_cache_ttl (int, optional): seconds resolved hosts are cached. Defaults to 300.
+            keepalive_timeout (float, optional): seconds idle connections are kept open. Defaults to 30.
+            hedge (HedgePolicy, optional): send a duplicate of GET requests that are slower than the policy
+                delay and take the first answer, True for the default policy. Defaults to no hedging.
+            transport (Transport, optional): sends the requests, see trbinance.transport. Defaults to
+                an AiohttpTransport with the connection settings above.
+        """
         super().__init__(*args, **kwargs)
+        self.hedge = HedgePolicy() if hedge is True else hedge or None
         self.headers = {'X-MBX-APIKEY': self.api_key}
-
-    async def _request(self, method, endpoint, security_type, symbol_type=0, params=None):
-        if symbol_type == 1:
-            url = self.urls["type1"] + endpoint
-        elif symbol_type == "hidden":
-            url = self.urls["hidden"] + endpoint
-        else:
-            url = self.urls["base"] + endpoint
-
-        if security_type.lower() in ['private', 'signed']:
-            params['timestamp'] = int(time.time() * 1000)
-            signature = self._generate_signature(params)
-            params['signature'] = signature
-
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            if method == 'GET':
-                async with session.get(url, params=params) as response:
-                    return await self._handle_response(response)
-            elif method == 'POST':
-                async with session.post(url, data=params) as response:
-                    return await self._handle_response(response)
+        if transport is None:
+            connector_kwargs = {
+                "limit": limit,
+                "limit_per_host": limit_per_host,
+                "ttl_dns_cache": dns_cache_ttl,
+                "keepalive_timeout": keepalive_timeout,
+            }
+            trace_configs = [trace_config()] if self.metrics is not None else None
+            transport = AiohttpTransport(self.headers, connector_kwargs, trace_configs)
+        self.transport = transport
+        self._markets_refresh = None
+        self._clock_refresh = None
+        self._balance_sync = None
+        self._markets_lock = asyncio.Lock()
+
+    @property
+    def session(self):
+        # the aiohttp session of the transport, None until the first request or when it does not use one
+        return getattr(self.transport, "session", None)
+
+    async def close(self):
+        await self.stop_markets_refresh()
+        await self.stop_clock_sync()
+        await self.stop_balance_sync()
+        await self.transport.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _request(self, method, endpoint, security_type, symbol_type=0, params=None, url=None):
+        # market data calls pass the url precomputed in their route
+        if url is None:
+            if symbol_type == 1:
+                url = self.urls["type1"] + endpoint
+            elif symbol_type == "hidden":
+                url = self.urls["hidden"] + endpoint
             else:
-                raise Exception('Invalid method')
-
-    async def _handle_response(self, raw_response):
-        response = await raw_response.json()
+                url = self.urls["base"] + endpoint
+
+        if method not in ['GET', 'POST']:
+            raise Exception('Invalid method')
+        timer = self._timer(method, endpoint)
+        try:
+            if self.scheduler is not None:
+                # wait before signing, so the timestamp is not stale once the request is let through
+                timer.weight = await self.scheduler.acquire(method, endpoint, params)
+            timer.mark("queue")
+
+            headers = None
+            request_params = params
+            if security_type.lower() in ['private', 'signed']:
+                params['timestamp'] = self.clock.now()
+                # encoded and signed once, encoded=True keeps yarl from quoting the query again
+                query_string = self._sign(params)
+                if method == 'GET':
+                    url, params = URL(f"{url}?{query_string}", encoded=True), None
+                else:
+                    params, headers = query_string.encode('utf-8'), FORM_HEADERS
+            timer.mark("sign")
+
+            fields = self.decoder.fields_for(method, endpoint)
+            if self.hedge is not None and self.hedge.applies(method, endpoint):
+                def charge():
+                    # the duplicate counts against the budget like any request, and is skipped when it does not fit
+                    if self.scheduler is None:
+                        return True
+                    weight = self.scheduler.try_acquire(method, endpoint, request_params)
+                    if weight is None:
+                        return False
+                    timer.weight += weight
+                    return True
+                attempts, answered = [], []
+
+                async def send():
+                    # every attempt is traced on its own timer, the one that answered first is kept
+                    attempt = self._timer(method, endpoint) if attempts else timer
+                    attempts.append(attempt)
+                    result = await self._send(method, url, params, headers, fields, attempt)
+                    answered.append(attempt)
+                    return result
+                result = await hedged_call(self.hedge, endpoint, send, charge)
+                if answered and answered[0] is not timer:
+                    timer.adopt(answered[0])
+                return result
+            return await self._send(method, url, params, headers, fields, timer)
+        finally:
+            timer.finish()
+
+    async def _send(self, method, url, params, headers, fields, timer=NULL_TIMER):
+        if method == 'GET':
+            response = await self.transport.arequest(method, url, params=params, timer=timer)
+        else:
+            response = await self.transport.arequest(method, url, data=params, headers=headers, timer=timer)
+        timer.mark("transfer")
+        return await self._handle_response(response, fields, timer)
+
+    async def _handle_response(self, raw_response, fields=None, timer=NULL_TIMER):
+        if self.scheduler is not None:
+            self.scheduler.update(raw_response.status_code, raw_response.headers)
+        timer.status = raw_response.status_code
+        response = self.decoder.decode(raw_response.content, fields)
+        timer.mark("decode")
         used_weight = [x for x in list(raw_response.headers) if "X-MBX-USED-" in x.upper()]
         for x in used_weight:
             timeframe = x.split("-")[-1]
             if timeframe == "weight":
                 timeframe = "total"
             self.used_weight[timeframe] = float(raw_response.headers[x])
+        timer.used_weight = self.used_weight
         
         return response
-    
+
+    async def _call(self, name, params, **options):
+        """ Requests an endpoint of the table (see trbinance.endpoints) and parses the response """
+        endpoint = self.endpoints[name]
+        route = await self._get_route(params["symbol"], endpoint.market) if endpoint.market is not None else None
+        path, params, url = endpoint.build(params, route)
+        response = await self._request(endpoint.method, path, endpoint.security, params=params, url=url)
+        return self._parsers[name](response, **options)
+
     async def check_server_time(self):
-        endpoint = '/common/time'
-        response = await self._request('GET', endpoint, 'public')
-        data = {"timestamp": response["timestamp"]}
-        return data
+        return await self._call("check_server_time", {})
     
+    async def sync_clock(self, samples=3):
+        """ Samples the server time `samples` times and updates the clock offset, see Client.sync_clock """
+        for _ in range(samples):
+            sent = time.time() * 1000
+            server_time = (await self.check_server_time())["timestamp"]
+            self.clock.add_sample(sent, server_time, time.time() * 1000)
+        return self.clock.status()
+
+    async def start_clock_sync(self, interval=60, samples=3):
+        """ Syncs the clock now, then again in a background task every `interval` seconds """
+        await self.stop_clock_sync()
+        await self.sync_clock(samples)
+
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.sync_clock(samples)
+                except Exception:
+                    pass  # keep the current offset, try again on the next tick
+
+        self._clock_refresh = asyncio.create_task(run())
+
+    async def stop_clock_sync(self):
+        if self._clock_refresh is not None:
+            self._clock_refresh.cancel()
+            try:
+                await self._clock_refresh
+            except asyncio.CancelledError:
+                pass
+            self._clock_refresh = None
+
     async def get_symbols(self):
-        endpoint = '/common/symbols'
-        response = await self._request('GET', endpoint, 'public')
-        data = [format_symbol_data(i) for i in response['data']['list']]
-        self.symbols = [d['symbol'] for d in data]
-        
-        data = {d["symbol"]: d for d in data}
-        self.markets = data
-        return data
+        return await self._call("get_symbols", {})
+
+    async def load_markets(self, max_age=None):
+        """ Returns markets from memory or the markets cache, downloads them only when neither is fresh
+
+        Args:
+            max_age (float, optional): max age of cached markets in seconds. Defaults to the cache ttl.
+        """
+        if self.markets_cache is None:
+            return self.markets if self.markets is not None else await self.get_symbols()
+        lock = self.markets_cache.lock()
+        # the file lock blocks, wait for it outside of the event loop
+        await asyncio.to_thread(lock.acquire)
+        try:
+            markets = self.markets_cache.load(max_age)
+            if markets is None:
+                return await self.get_symbols()
+            self._set_markets(markets)
+            return markets
+        finally:
+            lock.release()
+
+    async def start_markets_refresh(self, interval=None):
+        """ Refreshes markets in a background task every `interval` seconds (half the cache ttl by default) """
+        await self.stop_markets_refresh()
+        if interval is None:
+            interval = self.markets_cache.ttl / 2 if self.markets_cache is not None else 1800
+
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    # without a cache load_markets would keep returning the markets in memory
+                    if self.markets_cache is None:
+                        await self.get_symbols()
+                    else:
+                        await self.load_markets(max_age=interval)
+                except Exception:
+                    pass  # keep the current markets, try again on the next tick
+
+        self._markets_refresh = asyncio.create_task(run())
+
+    async def stop_markets_refresh(self):
+        if self._markets_refresh is not None:
+            self._markets_refresh.cancel()
+            try:
+                await self._markets_refresh
+            except asyncio.CancelledError:
+                pass
+            self._markets_refresh = None
 
     async def get_market_info(self, quoteAsset=None, offset=0, limit=1000):
-        endpoint = '/market/trading-pairs'
-        params = {
-            "limit": limit,
-        }
-
-        if offset != 0:
-            params["offset"] = offset
-        if quoteAsset:
-            params["quoteAsset"] = quoteAsset
-
-        response = await self._request("GET", endpoint, "public", symbol_type="hidden", params=params)
-        data = response["data"]["list"]
-        data = [format_market_data(i) for i in data]
-        data = {i["symbol"]: i for i in data}
-        return data
+        return await self._call("get_market_info", {"limit": limit, "offset": offset or None,
+                                                    "quoteAsset": quoteAsset or None})
     
+    async def _ensure_markets(self):
+        # concurrent first calls would each download the markets otherwise
+        async with self._markets_lock:
+            if self.routes is None:
+                await self.load_markets()
+
     async def get_symbol_type(self, symbol):
         if self.symbols is None:
-            self.get_symbols()
+            await self._ensure_markets()
         symbol_type = self.markets[symbol]["symbolType"]
         assert symbol_type == 1, "Symbol type must be 1. No info what other types are."
         return symbol_type
+
+    async def _get_route(self, symbol, call):
+        if self.routes is None:
+            await self._ensure_markets()
+        return self._route(symbol, call)
     
     async def get_order_book(self, symbol, limit=100):
         """ Gets order book for a symbol
@@ -94,242 +277,259 @@ class AsyncClient(BaseClient):
         Returns:
             dict: lists of "bids" and "asks" in the order book
         """
-        symbol_type = self.get_symbol_type(symbol)
-        origin_symbol = convert_symbol_convention_to(symbol)
+        return await self._call("get_order_book", {"symbol": symbol, "limit": limit})
 
-        if symbol_type == 1:
-            endpoint = '/v3/depth'
-            origin_symbol = origin_symbol.replace("_", "")
-        else:
-            endpoint = '/market/depth'
-        params = {'symbol': origin_symbol, 'limit': limit}
+    async def get_recent_trades(self, symbol, from_id=None, limit=500):
+        return await self._call("get_recent_trades", {"symbol": symbol, "limit": limit, "fromId": from_id or None})
 
-        data = await self._request("GET", endpoint, "public", symbol_type=symbol_type, params=params)
+    async def get_agg_trades(self, symbol, from_id=None, startTime=None, endTime=None, limit=500):
+        return await self._call("get_agg_trades", {"symbol": symbol, "limit": limit, "fromId": from_id or None,
+                                                   "startTime": startTime or None, "endTime": endTime or None})
 
-        for key in ['bids', 'asks']:
-            data[key] = [[float(value) for value in entry] for entry in data[key]]
-        return data
+    async def get_klines(self, symbol, interval, startTime=None, endTime=None, limit=500):
+        if self.kline_cache is not None:
+            return await self._cached_klines(symbol, interval, startTime or None, endTime or None, limit)
+        return await self._call("get_klines", {"symbol": symbol, "limit": limit, "interval": interval,
+                                               "startTime": startTime or None, "endTime": endTime or None})
+
+    async def _fetch_klines(self, symbol, interval, page):
+        return page[0], page[1], await self._call("get_klines", {"symbol": symbol, "limit": 1000, "interval": interval,
+                                                                 "startTime": page[0], "endTime": page[1]})
+
+    async def _cached_klines(self, symbol, interval, startTime, endTime, limit):
+        # typed rows like the cache serves, also when the call is sent without it
+        now = self.clock.now()
+        pages = self.kline_cache.missing(symbol, interval, startTime, endTime, limit, now)
+        if pages is None:
+            rows = await self._call("get_klines", {"symbol": symbol, "limit": limit, "interval": interval,
+                                                   "startTime": startTime, "endTime": endTime})
+            return [list(typed_kline(row)) for row in rows]
+        if pages:
+            fetched = [await self._fetch_klines(symbol, interval, page) for page in pages]
+            self.kline_cache.add(symbol, interval, fetched, now, self.clock.uncertainty)
+        return self.kline_cache.rows(symbol, interval, startTime, endTime, limit, now)
+
+    async def get_historical_klines(self, symbol, interval, startTime, endTime=None, limit=1000, concurrency=5):
+        """ Gets all klines between startTime and endTime, pages are fetched concurrently
 
-    async def get_recent_trades(self, symbol, from_id=None, limit=500):
-        symbol_type = self.get_symbol_type(symbol)
-        origin_symbol = convert_symbol_convention_to(symbol)
+        Args:
+            symbol (str): e.g. "BTC/TRY"
+            interval (str): one of KLINE_INTERVALS
+            startTime (int): ms timestamp of the first open time
+            endTime (int, optional): ms timestamp of the last open time. Defaults to now.
+            limit (int, optional): candles per page, max 1000. Defaults to 1000.
+            concurrency (int, optional): pages in flight at once. Defaults to 5.
 
-        if symbol_type == 1:
-            endpoint = '/v3/trades'
-            origin_symbol = origin_symbol.replace("_", "")
-        else:
-            endpoint = '/market/trades'
+        Returns:
+            dict: column name -> typed array, see klines.KLINE_COLUMNS
+        """
+        assert interval in KLINE_INTERVALS, "Invalid interval. Valid intervals: " + ", ".join(KLINE_INTERVALS) + "."
+        now = self.clock.now()
+        if endTime is None:
+            endTime = now
+        await self._get_route(symbol, "klines")
+        semaphore = asyncio.Semaphore(concurrency)
+        if self.kline_cache is not None:
+            count = (endTime - startTime) // KLINE_INTERVAL_MS[interval] + 1
+            pages = self.kline_cache.missing(symbol, interval, startTime, endTime, count, now)
+
+            async def fetch_missing(page):
+                async with semaphore:
+                    return await self._fetch_klines(symbol, interval, page)
+
+            # None when the range does not touch the cached one, it is then fetched without storing it
+            uncached = pages is None
+            if uncached:
+                pages = kline_pages(interval, startTime, endTime, limit)
+            fetched = await asyncio.gather(*[fetch_missing(page) for page in pages])
+            if uncached:
+                return klines_to_columns(merge_kline_pages([rows for _, _, rows in fetched], startTime, endTime))
+            if fetched:
+                self.kline_cache.add(symbol, interval, fetched, now, self.clock.uncertainty)
+            return self.kline_cache.columns(symbol, interval, startTime, endTime, count, now)
+        pages = kline_pages(interval, startTime, endTime, limit)
+
+        async def fetch(page):
+            async with semaphore:
+                return await self.get_klines(symbol, interval, startTime=page[0], endTime=page[1], limit=limit)
+
+        results = await asyncio.gather(*[fetch(page) for page in pages])
+        return klines_to_columns(merge_kline_pages(results, startTime, endTime))
+
+    def iter_order_books(self, symbols, limit=100, concurrency=10):
+        """ Yields (symbol, order book or exception) as the books arrive, at most `concurrency` requests at once """
+        return fan_out(symbols, lambda symbol: self.get_order_book(symbol, limit=limit), concurrency)
+
+    async def get_order_books(self, symbols, limit=100, concurrency=10):
+        """ Gets order books of many symbols
 
-        params = {'symbol': origin_symbol, 'limit': limit}
-        if from_id:
-            params['fromId'] = from_id
+        Returns:
+            dict: symbol -> order book, or the exception raised for that symbol
+        """
+        return await collect(self.iter_order_books(symbols, limit, concurrency), symbols)
 
-        data = await self._request("GET", endpoint, "public", symbol_type=symbol_type, params=params)
-        return data
+    def iter_recent_trades_many(self, symbols, limit=500, concurrency=10):
+        return fan_out(symbols, lambda symbol: self.get_recent_trades(symbol, limit=limit), concurrency)
 
-    async def get_agg_trades(self, symbol, from_id=None, startTime=None, endTime=None, limit=500):
-        symbol_type = self.get_symbol_type(symbol)
-        origin_symbol = convert_symbol_convention_to(symbol)
+    async def get_recent_trades_many(self, symbols, limit=500, concurrency=10):
+        return await collect(self.iter_recent_trades_many(symbols, limit, concurrency), symbols)
 
-        if symbol_type == 1:
-            endpoint = '/v3/aggTrades'
-            origin_symbol = origin_symbol.replace("_", "")
-        else:
-            endpoint = '/market/agg-trades'
-
-        params = {'symbol': origin_symbol, 'limit': limit}
-        if from_id:
-            params['fromId'] = from_id
-        if startTime:
-            params['startTime'] = startTime
-        if endTime:
-            params['endTime'] = endTime
-
-        data = await self._request("GET", endpoint, "public", symbol_type=symbol_type, params=params)
-        return data
-    
-    async def get_klines(self, symbol, interval, startTime=None, endTime=None, limit=500):
-        
-        assert interval in KLINE_INTERVALS, "Invalid interval. Valid intervals: " + ", ".join(KLINE_INTERVALS) + "."
+    def iter_agg_trades_many(self, symbols, startTime=None, endTime=None, limit=500, concurrency=10):
+        return fan_out(symbols, lambda symbol: self.get_agg_trades(
+            symbol, startTime=startTime, endTime=endTime, limit=limit), concurrency)
 
-        symbol_type = self.get_symbol_type(symbol)
-        origin_symbol = convert_symbol_convention_to(symbol)
+    async def get_agg_trades_many(self, symbols, startTime=None, endTime=None, limit=500, concurrency=10):
+        return await collect(self.iter_agg_trades_many(symbols, startTime, endTime, limit, concurrency), symbols)
 
-        if symbol_type == 1:
-            endpoint = '/v1/klines'
-            origin_symbol = origin_symbol.replace("_", "")
-        else:
-            endpoint = '/market/klines'
-        
-        params = {'symbol': origin_symbol, 'limit': limit, 'interval': interval}
-        if startTime:
-            params['startTime'] = startTime
-        if endTime:
-            params['endTime'] = endTime
+    def iter_klines_many(self, symbols, interval, startTime=None, endTime=None, limit=500, concurrency=10):
+        return fan_out(symbols, lambda symbol: self.get_klines(
+            symbol, interval, startTime=startTime, endTime=endTime, limit=limit), concurrency)
 
-        data = await self._request("GET", endpoint, "public", symbol_type=symbol_type, params=params)
-        return data
+    async def get_klines_many(self, symbols, interval, startTime=None, endTime=None, limit=500, concurrency=10):
+        return await collect(self.iter_klines_many(symbols, interval, startTime, endTime, limit, concurrency), symbols)
 
     async def create_order(self, symbol, side, order_type, **kwargs):
-
-        origin_symbol = convert_symbol_convention_to(symbol)
-        order_type_num = OrderType[order_type.upper()].value
-        
-        assert order_type_num in [1,2,4,6], "order_type must be either 'LIMIT','MARKET','STOP_LOSS_LIMIT' or 'TAKE_PROFIT_LIMIT' "
-
-        params = {
-            'symbol': origin_symbol,
-            'side': Side[side.upper()].value,
-            'type': order_type_num,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        
-        endpoint = "/orders"
-        symbol_type = 0
-        resp = await self._request("POST", endpoint, "private", symbol_type=symbol_type, params=params)
-        if "code" in resp:
-            if resp["code"] != 0:
-                return resp
-        data = format_order_data(resp["data"])
-        data["timestamp"] = resp["timestamp"]
-        return data
+        if self.validate_orders:
+            if self.markets is None:
+                await self._ensure_markets()
+            error = self._validate_order(symbol, order_type_value(order_type), kwargs)
+            if error is not None:
+                return error
+        return await self._call("create_order", {"symbol": symbol, "side": side, "type": order_type, **kwargs})
 
     async def query_order(self, orderId, **kwargs):
-        params = {
-            'orderId': orderId,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-
-        endpoint = "/orders/detail"
-        resp = await self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        if "data" not in resp:
-            return resp
-        data = format_order_data(resp["data"])
-        data["timestamp"] = resp["timestamp"]
-        return data
+        return await self._call("query_order", {"orderId": orderId, **kwargs})
 
     async def cancel_order(self, orderId, **kwargs):
-        params = {
-            'orderId': orderId,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/orders/cancel"
-        resp = await self._request("POST", endpoint, "private", symbol_type=0, params=params)
-        if "data" not in resp:
-            return resp
-        data = format_order_data(resp["data"])
-        data["timestamp"] = resp["timestamp"]
-        return data
-
-    async def all_orders(self, symbol=None, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-
-        if symbol is not None:
-            origin_symbol = convert_symbol_convention_to(symbol)
-            params['symbol'] = origin_symbol
-        endpoint = "/orders"
-        resp = await self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        data_list = resp["data"]["list"]
-        data = [format_order_data(i) for i in data_list]
-        return data
+        return await self._call("cancel_order", {"orderId": orderId, **kwargs})
+
+    async def all_orders(self, symbol=None, raw=False, **kwargs):
+        return await self._call("all_orders", {"symbol": symbol, **kwargs}, raw=raw)
+
+    def iter_all_orders(self, symbol=None, startTime=None, endTime=None, fromId=None, toId=None, limit=500,
+                        prefetch=True, **kwargs):
+        """ Async generator over the whole order history, see Client.iter_all_orders
+
+        Example:
+            async for order in client.iter_all_orders("BTC/USDT", toId=last_seen_id):
+                ...
+        """
+        params = self._page_params(startTime, endTime, fromId, limit, kwargs)
+        pages = aiter_pages(lambda page_params: self.all_orders(symbol, **page_params), params,
+                            next_page_by_id("orderId"), limit, prefetch)
+        return aiter_items(pages, "orderId", endTime, toId)
+
+    async def create_orders(self, orders, concurrency=10):
+        """ Places many orders at once, pipelined over the pooled connections
+
+        Args:
+            orders (list): create_order arguments as dicts, e.g.
+                {"symbol": "BTC/USDT", "side": "BUY", "order_type": "LIMIT", "quantity": "0.001", "price": "10000"}
+            concurrency (int, optional): orders in flight at once. Defaults to 10.
+
+        Returns:
+            list: one result per order in the same order, see batch.order_result
+        """
+        responses = await gather_bounded(orders, lambda order: self.create_order(**order), concurrency)
+        return [order_result(order, response) for order, response in zip(orders, responses)]
+
+    async def cancel_orders(self, order_ids, concurrency=10, **kwargs):
+        """ Cancels many orders at once, returns one result per order id, see batch.order_result """
+        responses = await gather_bounded(order_ids, lambda order_id: self.cancel_order(order_id, **kwargs), concurrency)
+        return [order_result(order_id, response) for order_id, response in zip(order_ids, responses)]
+
+    async def cancel_all_orders(self, symbol=None, concurrency=10, **kwargs):
+        """ Cancels every open order, of one symbol when given, going through every page of all_orders """
+        order_ids = [order["orderId"] async for order in self.iter_all_orders(symbol=symbol, **kwargs)
+                     if order["status"] in OPEN_ORDER_STATUSES]
+        return await self.cancel_orders(order_ids, concurrency=concurrency)
 
     async def new_oco(self, symbol, side, quantity, price, stopPrice, stopLimitPrice, **kwargs):
-        params = {
-            'symbol': convert_symbol_convention_to(symbol),
-            'side': Side[side.upper()].value,
-            'quantity': quantity,
-            'price': price,
-            'stopPrice': stopPrice,
-            'stopLimitPrice': stopLimitPrice,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/orders/oco"
-        symbol_type = 0
-        resp = await self._request("POST", endpoint, "private", symbol_type=symbol_type, params=params)
-        return resp["data"]
-
-    async def account_information(self, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/account/spot"
-        resp = await self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        data = resp["data"]
-        data['accountAssets'] = format_balance(data['accountAssets']) 
-        return data
+        return await self._call("new_oco", {"symbol": symbol, "side": side, "quantity": quantity, "price": price,
+                                            "stopPrice": stopPrice, "stopLimitPrice": stopLimitPrice, **kwargs})
+
+    async def account_information(self, raw=False, **kwargs):
+        return await self._call("account_information", kwargs, raw=raw)
 
     async def account_balance(self):
+        if self.balance_ledger is not None:
+            if self.balance_ledger.due(self.clock.now()):
+                await self.sync_balances()
+            return self.balance_ledger.balances()
         data = await self.account_information()
         balance_dict = data['accountAssets']
         return balance_dict
+
+    async def sync_balances(self):
+        """ Reconciles the balance ledger with the exchange
+
+        Returns:
+            dict: asset -> how far the ledger was off, see BalanceLedger.reconcile
+        """
+        now = self.clock.now()
+        return self.balance_ledger.reconcile((await self.account_information(raw=True))["accountAssets"], now)
+
+    async def start_balance_sync(self, interval=1):
+        """ Reconciles the balance ledger now, then in a background task whenever it is due, checked every `interval` seconds """
+        await self.stop_balance_sync()
+        await self.sync_balances()
+
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    if self.balance_ledger.due(self.clock.now()):
+                        await self.sync_balances()
+                except Exception:
+                    pass  # keep the current balances, try again on the next tick
+
+        self._balance_sync = asyncio.create_task(run())
+
+    async def stop_balance_sync(self):
+        if self._balance_sync is not None:
+            self._balance_sync.cancel()
+            try:
+                await self._balance_sync
+            except asyncio.CancelledError:
+                pass
+            self._balance_sync = None
     
     async def account_asset_information(self, asset, **kwargs):
-        params = {
-            'asset': asset,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/account/spot/asset"
-        resp = await self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
-
-    async def account_trade_list(self, symbol=None, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        if symbol is not None:
-            origin_symbol = convert_symbol_convention_to(symbol)
-            params['symbol'] = origin_symbol
-        endpoint = "/orders/trades"
-        resp = await self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]["list"]
+        return await self._call("account_asset_information", {"asset": asset, **kwargs})
+
+    async def account_trade_list(self, symbol=None, raw=False, **kwargs):
+        return await self._call("account_trade_list", {"symbol": symbol, **kwargs}, raw=raw)
+
+    def iter_trades(self, symbol=None, startTime=None, endTime=None, fromId=None, toId=None, limit=500,
+                    prefetch=True, **kwargs):
+        """ Async generator over the whole trade history, see Client.iter_all_orders """
+        params = self._page_params(startTime, endTime, fromId, limit, kwargs)
+        pages = aiter_pages(lambda page_params: self.account_trade_list(symbol, **page_params), params,
+                            next_page_by_id("tradeId"), limit, prefetch)
+        return aiter_items(pages, "tradeId", endTime, toId)
 
     async def withdraw(self, asset, address, amount, **kwargs):
-        params = {
-            'asset': asset,
-            'address': address,
-            'amount': amount,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/withdraws"
-        resp = await self._request("POST", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
+        return await self._call("withdraw", {"asset": asset, "address": address, "amount": amount, **kwargs})
 
     async def withdraw_history(self, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/withdraws"
-        resp = await self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
+        return await self._call("withdraw_history", kwargs)
 
     async def deposit_history(self, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/deposits"
-        resp = await self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
+        return await self._call("deposit_history", kwargs)
+
+    def iter_withdraws(self, startTime=None, endTime=None, limit=100, prefetch=True, **kwargs):
+        """ Async generator over the whole withdraw history, paged by offset """
+        async def fetch(page_params):
+            return page_list(await self.withdraw_history(**page_params))
+        params = self._page_params(startTime, endTime, None, limit, kwargs)
+        return aiter_items(aiter_pages(fetch, params, next_page_by_offset, limit, prefetch), endTime=endTime)
+
+    def iter_deposits(self, startTime=None, endTime=None, limit=100, prefetch=True, **kwargs):
+        """ Async generator over the whole deposit history, paged by offset """
+        async def fetch(page_params):
+            return page_list(await self.deposit_history(**page_params))
+        params = self._page_params(startTime, endTime, None, limit, kwargs)
+        return aiter_items(aiter_pages(fetch, params, next_page_by_offset, limit, prefetch), endTime=endTime)
 
     async def deposit_address(self, asset, network, **kwargs):
-        params = {
-            'asset': asset,
-            'network': network,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/deposits/address"
-        resp = await self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
\ No newline at end of file
+        return await self._call("deposit_address", {"asset": asset, "network": network, **kwargs})
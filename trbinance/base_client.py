@@ -1,5 +1,30 @@
 import hmac
 import hashlib
+from collections import namedtuple
+from urllib.parse import quote
+from time import perf_counter
+
+from .defines import MARKET_DATA_ENDPOINTS
+from .helper import convert_symbol_convention_to
+from .ratelimit import WeightBudget
+from .decoder import Decoder
+from .quantizer import OrderQuantizer
+from .models import Order, Trade, Balance
+from .clock import ClockSync
+from .metrics import Metrics, NULL_TIMER
+from .helper import format_order_data, format_balance, format_symbol_data, format_market_data, aggregate_balances
+from .endpoints import compile_endpoints
+
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+
+
+def encode_params(params):
+    """ url-encodes params in insertion order, skipping None values like requests and aiohttp do """
+    return "&".join([f"{key}={quote(str(value), safe='')}" for key, value in params.items() if value is not None])
+
+
+# where a market data call for a symbol goes: full url, endpoint path, symbol as sent on the wire
+Route = namedtuple("Route", ["url", "endpoint", "symbol", "symbol_type"])
 
 class BaseClient:
     id = 'trbinance'
@@ -10,13 +35,221 @@ class BaseClient:
             "hidden" : "https://www.trbinance.com/v1"
         }
     
-    def __init__(self, api_key="", secret_key=""):
+    # set by the sync and async clients to WeightScheduler / AsyncWeightScheduler
+    scheduler_class = None
+
+    def __init__(self, api_key="", secret_key="", urls=None, rate_limit=True, weight_limit=1200, markets_cache=None,
+                 json_backend=None, numeric="float", validate_orders=False, models=False, metrics=None, kline_cache=None,
+                 balance_ledger=None):
         self.api_key = api_key
         self.secret_key = secret_key
         self.markets = None
         self.symbols = None
         self.used_weight = {}
+        self.routes = None
+        self.quantizers = {}
+        # check create_order arguments against the market filters before sending them
+        self.validate_orders = validate_orders
+        # return slotted Order/Trade/Balance models instead of formatted dicts
+        self.models = models
+        self.decoder = Decoder(json_backend, numeric)
+        # the format_* helpers only parse numbers when the decoder left them as strings
+        self.parse_numbers = numeric is None
+        if urls is not None:
+            self.urls = {**self.urls, **urls}
+        # the endpoint table bound to these urls, the clients only do the I/O around it
+        self.endpoints = compile_endpoints(self.urls)
+        self._parsers = {name: getattr(self, "_parse_" + endpoint.parser) for name, endpoint in self.endpoints.items()}
+        self._hmac = self._hmac_key = None
+        # request timestamps are stamped in server time once the clock has been synced
+        self.clock = ClockSync()
+        # per-endpoint phase timings, pass True or a Metrics shared between clients to turn them on
+        self.metrics = Metrics() if metrics is True else metrics or None
+        self.scheduler = None
+        if rate_limit and self.scheduler_class is not None:
+            self.scheduler = self.scheduler_class(WeightBudget(weight_limit))
+
+        # a KlineCache serves get_klines and get_historical_klines, requesting only the candles it lacks
+        self.kline_cache = kline_cache
+        # a BalanceLedger follows the orders seen by the client, account_balance is then read from it
+        self.balance_ledger = balance_ledger
+
+        # a fresh on-disk cache saves the symbols download on the first market data call
+        self.markets_cache = markets_cache
+        if markets_cache is not None:
+            markets = markets_cache.load()
+            if markets is not None:
+                self._set_markets(markets)
+
+    def _set_markets(self, markets):
+        self.markets = markets
+        self.symbols = list(markets)
+        self.routes = self._build_routes(markets)
+        self.quantizers = {}
+
+    def _build_routes(self, markets):
+        routes = {}
+        for symbol, market in markets.items():
+            symbol_type = market["symbolType"]
+            if symbol_type == 1:
+                url, wire_symbol, index = self.urls["type1"], market["id"], 0
+            else:
+                url, wire_symbol, index = self.urls["base"], convert_symbol_convention_to(symbol), 1
+            routes[symbol] = {
+                call: Route(url + endpoints[index], endpoints[index], wire_symbol, symbol_type)
+                for call, endpoints in MARKET_DATA_ENDPOINTS.items()
+            }
+        return routes
+
+    def _timer(self, method, endpoint):
+        if self.metrics is None:
+            return NULL_TIMER
+        return self.metrics.timer(method, endpoint)
+
+    def _timed_format(self, format_func, data):
+        # recorded as the format phase of the request this thread or task made last
+        if self.metrics is None:
+            return format_func(data)
+        started = perf_counter()
+        result = format_func(data)
+        self.metrics.observe_format(perf_counter() - started)
+        return result
+
+    def _format_order(self, data):
+        return self._timed_format(self._build_order, data)
+
+    def _format_orders(self, data_list):
+        return self._timed_format(lambda orders: [self._build_order(i) for i in orders], data_list)
+
+    def _build_order(self, data):
+        if self.models:
+            return Order.from_raw(data, self.parse_numbers)
+        return format_order_data(data, self.parse_numbers)
+
+    def _format_trades(self, data_list):
+        if self.models:
+            return self._timed_format(lambda trades: [Trade.from_raw(i, self.parse_numbers) for i in trades], data_list)
+        return data_list
+
+    def _format_balance(self, balance_list):
+        return self._timed_format(self._build_balance, balance_list)
+
+    def _build_balance(self, balance_list):
+        if self.models:
+            # same layout as format_balance, Balance models in place of the per asset dicts
+            def build(item):
+                balance = Balance.from_raw(item, self.parse_numbers)
+                return balance.asset, balance, balance.free, balance.locked
+            return aggregate_balances(balance_list, build)
+        return format_balance(balance_list, self.parse_numbers)
+
+    def _parse_raw(self, response):
+        return response
+
+    def _parse_data(self, response):
+        return response["data"]
+
+    def _parse_server_time(self, response):
+        return {"timestamp": response["timestamp"]}
+
+    def _parse_symbols(self, response):
+        data = [format_symbol_data(i) for i in response['data']['list']]
+        data = {d["symbol"]: d for d in data}
+        self._save_markets(data)
+        return data
+
+    def _parse_market_info(self, response):
+        data = [format_market_data(i, self.parse_numbers) for i in response["data"]["list"]]
+        return {i["symbol"]: i for i in data}
+
+    def _parse_order_book(self, data):
+        if self.parse_numbers:
+            for key in ['bids', 'asks']:
+                data[key] = [[float(value) for value in entry] for entry in data[key]]
+        return data
+
+    def _parse_order(self, response, created=False):
+        # errors come back as {"code": ..., "msg": ...} and are returned as they are
+        if response.get("code", 0) != 0 or "data" not in response:
+            return response
+        data = self._format_order(response["data"])
+        data["timestamp"] = response["timestamp"]
+        if self.balance_ledger is not None:
+            if created:
+                self.balance_ledger.created(data)
+            else:
+                self.balance_ledger.observe(data)
+        return data
+
+    def _parse_created_order(self, response):
+        return self._parse_order(response, created=True)
+
+    def _parse_orders(self, response, raw=False):
+        data_list = response["data"]["list"]
+        if raw:
+            return data_list
+        return self._format_orders(data_list)
+
+    def _parse_trades(self, response, raw=False):
+        data_list = response["data"]["list"]
+        if raw:
+            return data_list
+        return self._format_trades(data_list)
+
+    def _parse_account(self, response, raw=False):
+        data = response["data"]
+        if not raw:
+            data['accountAssets'] = self._format_balance(data['accountAssets'])
+        return data
+
+    def quantizer(self, symbol):
+        """ Returns the OrderQuantizer of a market, built on first use (markets must be loaded) """
+        quantizer = self.quantizers.get(symbol)
+        if quantizer is None:
+            quantizer = self.quantizers[symbol] = OrderQuantizer(self.markets[symbol])
+        return quantizer
+
+    def _validate_order(self, symbol, order_type, kwargs):
+        return self.quantizer(symbol).validate(
+            order_type, kwargs.get("quantity"), kwargs.get("price"), kwargs.get("quoteOrderQty"))
+
+    def _page_params(self, startTime, endTime, fromId, limit, kwargs):
+        # the first page of an iter_* call, later pages only move the cursor
+        params = {"limit": limit, **kwargs}
+        for key, value in [("startTime", startTime), ("endTime", endTime), ("fromId", fromId)]:
+            if value is not None:
+                params[key] = value
+        return params
+
+    def _route(self, symbol, call):
+        route = self.routes[symbol][call]
+        assert route.symbol_type == 1, "Symbol type must be 1. No info what other types are."
+        return route
+
+    def _save_markets(self, markets):
+        self._set_markets(markets)
+        if self.markets_cache is not None:
+            self.markets_cache.save(markets)
+
+    def _signer(self):
+        # keyed once, every signature starts from a copy of it
+        if self._hmac_key is not self.secret_key:
+            self._hmac = hmac.new(self.secret_key.encode('utf-8'), digestmod=hashlib.sha256)
+            self._hmac_key = self.secret_key
+        return self._hmac.copy()
+
+    def _sign(self, params):
+        """ Encodes params once and signs exactly those bytes
+
+        Returns:
+            str: the query string (or form body) to send as is, with the signature appended
+        """
+        query_string = encode_params(params)
+        signer = self._signer()
+        signer.update(query_string.encode('utf-8'))
+        return f"{query_string}&signature={signer.hexdigest()}"
 
     def _generate_signature(self, params):
-        query_string = '&'.join([f"{key}={value}" for key, value in params.items()])
-        return hmac.new(self.secret_key.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
\ No newline at end of file
+        signer = self._signer()
+        signer.update(encode_params(params).encode('utf-8'))
+        return signer.hexdigest()
\ No newline at end of file
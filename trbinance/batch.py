@@ -0,0 +1,80 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .defines import OrderStatus
+
+OPEN_ORDER_STATUSES = [OrderStatus.NEW.value, OrderStatus.PARTIALLY_FILLED.value]
+
+
+async def fan_out(keys, call, concurrency=10):
+    """ Runs `call(key)` for every key with at most `concurrency` calls in flight
+
+    Yields (key, result) in completion order. A call that raised yields its exception as the result,
+    so one failing key does not stop the others.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(key):
+        async with semaphore:
+            try:
+                return key, await call(key)
+            except Exception as e:
+                return key, e
+
+    tasks = [asyncio.create_task(run(key)) for key in keys]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # the consumer stopped early, do not leave requests running in the background
+        for task in tasks:
+            task.cancel()
+
+
+async def collect(results, keys):
+    """ Gathers a fan_out into a dict ordered like `keys` """
+    data = dict.fromkeys(keys)
+    async for key, result in results:
+        data[key] = result
+    return data
+
+
+async def gather_bounded(items, call, concurrency=10):
+    """ Runs `call(item)` for every item, returns results ordered like `items` with exceptions in place of failures """
+    results = await collect(fan_out(range(len(items)), lambda i: call(items[i]), concurrency), range(len(items)))
+    return list(results.values())
+
+
+def run_threaded(items, call, concurrency=10):
+    """ Sync counterpart of gather_bounded, runs the calls on a thread pool """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(call, item) for item in items]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def order_result(request, response):
+    """ Wraps the outcome of one order call of a batch
+
+    Returns:
+        dict: "request" as given, "ok", "data" with the formatted order on success,
+            "code" and "msg" of the exchange error (or the exception) on failure
+    """
+    if isinstance(response, Exception):
+        code, msg = None, str(response)
+        error_response = getattr(response, "response", None)
+        if error_response is not None:
+            try:
+                body = error_response.json()
+                code, msg = body.get("code"), body.get("msg", msg)
+            except ValueError:
+                pass
+        return {"request": request, "ok": False, "data": None, "code": code, "msg": msg}
+    if "orderId" not in response:
+        return {"request": request, "ok": False, "data": None, "code": response.get("code"), "msg": response.get("msg")}
+    return {"request": request, "ok": True, "data": response, "code": 0, "msg": None}
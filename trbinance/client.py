@@ -1,89 +1,231 @@
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
 
 from .helper import *
 from .defines import *
-from .base_client import BaseClient
+from .base_client import BaseClient, FORM_CONTENT_TYPE
+from .klines import kline_pages, merge_kline_pages, klines_to_columns, typed_kline
+from .batch import run_threaded, order_result, OPEN_ORDER_STATUSES
+from .paging import iter_pages, iter_items, next_page_by_id, next_page_by_offset, page_list
+from .ratelimit import WeightScheduler
+from .metrics import NULL_TIMER
+from .transport import RequestsTransport
+from .endpoints import order_type_value
 
 class Client(BaseClient):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-    def _request(self, method, endpoint, security_type, symbol_type=0, params=None):
-        if symbol_type == 1:
-            url = self.urls["type1"] + endpoint
-        elif symbol_type == "hidden":
-            url = self.urls["hidden"] + endpoint
-        else:
-            url = self.urls["base"] + endpoint
+    scheduler_class = WeightScheduler
 
-        with requests.Session() as session:
+    def __init__(self, *args, pool_size=10, max_retries=0, transport=None, **kwargs):
+        """
+        Args:
+            pool_size (int, optional): keep-alive connections kept per base url. Defaults to 10.
+            max_retries (int, optional): retries done by urllib3 on connection errors. Defaults to 0,
+                retrying an order request blindly can place it twice.
+            transport (Transport, optional): sends the requests, see trbinance.transport. Defaults to
+                a RequestsTransport with one connection pool per base url.
+        """
+        super().__init__(*args, **kwargs)
+        self.headers = {'X-MBX-APIKEY': self.api_key}
+        self.form_headers = {**self.headers, 'Content-Type': FORM_CONTENT_TYPE}
+        if transport is None:
+            transport = RequestsTransport(self.urls, pool_size, max_retries, instrument=self.metrics is not None)
+        self.transport = transport
+        self._markets_refresh = None
+        self._clock_refresh = None
+        self._balance_sync = None
+
+    @property
+    def session(self):
+        # the requests session of the transport, None when it does not use one
+        return getattr(self.transport, "session", None)
+
+    @session.setter
+    def session(self, session):
+        self.transport.session = session
+
+    def close(self):
+        self.stop_markets_refresh()
+        self.stop_clock_sync()
+        self.stop_balance_sync()
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _request(self, method, endpoint, security_type, symbol_type=0, params=None, url=None):
+        # market data calls pass the url precomputed in their route
+        if url is None:
+            if symbol_type == 1:
+                url = self.urls["type1"] + endpoint
+            elif symbol_type == "hidden":
+                url = self.urls["hidden"] + endpoint
+            else:
+                url = self.urls["base"] + endpoint
+
+        if method not in ['GET', 'POST']:
+            raise Exception('Invalid method')
+        timer = self._timer(method, endpoint)
+        try:
+            if self.scheduler is not None:
+                # wait before signing, so the timestamp is not stale once the request is let through
+                timer.weight = self.scheduler.acquire(method, endpoint, params)
+            timer.mark("queue")
+
+            headers = None
             if security_type.lower() in ['private', 'signed']:
-                params['timestamp'] = int(time.time() * 1000)
-                signature = self._generate_signature(params)
-                params['signature'] = signature
-                session.headers.update({'X-MBX-APIKEY': self.api_key})
-                
+                params['timestamp'] = self.clock.now()
+                # encoded and signed once, requests sends the string untouched
+                query_string = self._sign(params)
+                if method == 'GET':
+                    url, params, headers = f"{url}?{query_string}", None, self.headers
+                else:
+                    params, headers = query_string, self.form_headers
+            timer.mark("sign")
+
+            timer.begin_send()
             if method == 'GET':
-                response = session.get(url, params=params)
-            elif method == 'POST':
-                response = session.post(url, data=params)
+                response = self.transport.request(method, url, params=params, headers=headers, timer=timer)
             else:
-                raise Exception('Invalid method')
-
-        response.raise_for_status()
-        return self._handle_response(response)
-
-    def _handle_response(self, raw_response, **kwargs):
-        response = raw_response.json()
+                response = self.transport.request(method, url, data=params, headers=headers, timer=timer)
+            timer.mark("transfer")
+            timer.end_send(response.elapsed.total_seconds())
+            timer.status = response.status_code
+
+            if self.scheduler is not None:
+                self.scheduler.update(response.status_code, response.headers)
+
+            response.raise_for_status()
+            return self._handle_response(response, self.decoder.fields_for(method, endpoint), timer)
+        finally:
+            timer.finish()
+
+    def _handle_response(self, raw_response, fields=None, timer=NULL_TIMER):
+        timer.lap()
+        response = self.decoder.decode(raw_response.content, fields)
+        timer.mark("decode")
         used_weight = [x for x in list(raw_response.headers) if "X-MBX-USED-" in x.upper()]
         for x in used_weight:
             timeframe = x.split("-")[-1]
             if timeframe == "weight":
                 timeframe = "total"
             self.used_weight[timeframe] = float(raw_response.headers[x])
+        timer.used_weight = self.used_weight
 
         return response
-    
+
+    def _call(self, name, params, **options):
+        """ Requests an endpoint of the table (see trbinance.endpoints) and parses the response """
+        endpoint = self.endpoints[name]
+        route = self._get_route(params["symbol"], endpoint.market) if endpoint.market is not None else None
+        path, params, url = endpoint.build(params, route)
+        response = self._request(endpoint.method, path, endpoint.security, params=params, url=url)
+        return self._parsers[name](response, **options)
+
     def check_server_time(self):
-        endpoint = '/common/time'
-        response = self._request('GET', endpoint, 'public')
-        data = {"timestamp": response["timestamp"]}
-        return data
+        return self._call("check_server_time", {})
             
+    def sync_clock(self, samples=3):
+        """ Samples the server time `samples` times and updates the clock offset
+
+        Returns:
+            dict: clock.status(), "offset" and "uncertainty" in ms among others
+        """
+        for _ in range(samples):
+            sent = time.time() * 1000
+            server_time = self.check_server_time()["timestamp"]
+            self.clock.add_sample(sent, server_time, time.time() * 1000)
+        return self.clock.status()
+
+    def start_clock_sync(self, interval=60, samples=3):
+        """ Syncs the clock now, then again in a background thread every `interval` seconds """
+        self.stop_clock_sync()
+        self.sync_clock(samples)
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.sync_clock(samples)
+                except Exception:
+                    pass  # keep the current offset, try again on the next tick
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self._clock_refresh = (stop, thread)
+
+    def stop_clock_sync(self):
+        if self._clock_refresh is not None:
+            stop, thread = self._clock_refresh
+            stop.set()
+            thread.join()
+            self._clock_refresh = None
+
     def get_symbols(self):
-        endpoint = '/common/symbols'
-        response = self._request('GET', endpoint, 'public')
-        data = [format_symbol_data(i) for i in response['data']['list']]
-        self.symbols = [d['symbol'] for d in data]
-        
-        data = {d["symbol"]: d for d in data}
-        self.markets = data
-        return data
+        return self._call("get_symbols", {})
+
+    def load_markets(self, max_age=None):
+        """ Returns markets from memory or the markets cache, downloads them only when neither is fresh
+
+        Args:
+            max_age (float, optional): max age of cached markets in seconds. Defaults to the cache ttl.
+        """
+        if self.markets_cache is None:
+            return self.markets if self.markets is not None else self.get_symbols()
+        with self.markets_cache.lock():
+            # another process may have downloaded them while we waited for the lock
+            markets = self.markets_cache.load(max_age)
+            if markets is None:
+                return self.get_symbols()
+            self._set_markets(markets)
+            return markets
+
+    def start_markets_refresh(self, interval=None):
+        """ Refreshes markets in a background thread every `interval` seconds (half the cache ttl by default) """
+        if interval is None:
+            interval = self.markets_cache.ttl / 2 if self.markets_cache is not None else 1800
+        self.stop_markets_refresh()
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    # without a cache load_markets would keep returning the markets in memory
+                    if self.markets_cache is None:
+                        self.get_symbols()
+                    else:
+                        self.load_markets(max_age=interval)
+                except Exception:
+                    pass  # keep the current markets, try again on the next tick
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self._markets_refresh = (stop, thread)
+
+    def stop_markets_refresh(self):
+        if self._markets_refresh is not None:
+            stop, thread = self._markets_refresh
+            stop.set()
+            thread.join()
+            self._markets_refresh = None
     
     def get_market_info(self, quoteAsset=None, offset=0, limit=1000):
-        endpoint = '/market/trading-pairs'
-        params = {
-            "limit": limit,
-        }
-        if offset != 0:
-            params["offset"] = offset
-        if quoteAsset:
-            params["quoteAsset"] = quoteAsset
-
-        response = self._request("GET", endpoint, "public", symbol_type="hidden", params=params)
-        data = response["data"]["list"]
-        
-        data = [format_market_data(i) for i in data]
-        data = {i["symbol"]: i for i in data}
-        return data
+        return self._call("get_market_info", {"limit": limit, "offset": offset or None, "quoteAsset": quoteAsset or None})
 
     def get_symbol_type(self, symbol):
         if self.symbols is None:
-            self.get_symbols()
+            self.load_markets()
         symbol_type = self.markets[symbol]["symbolType"]
         assert symbol_type == 1, "Symbol type must be 1. No info what other types are."
         return symbol_type
+
+    def _get_route(self, symbol, call):
+        if self.routes is None:
+            self.load_markets()
+        return self._route(symbol, call)
     
     def get_order_book(self, symbol, limit=100):
         """ Gets order book for a symbol
@@ -95,81 +237,79 @@ class Client(BaseClient):
         Returns:
             dict: lists of "bids" and "asks" in the order book
         """
-        symbol_type = self.get_symbol_type(symbol)
-        origin_symbol = convert_symbol_convention_to(symbol)
-
-        if symbol_type == 1:
-            endpoint = '/v3/depth'
-            origin_symbol = origin_symbol.replace("_", "")
-        else:
-            endpoint = '/market/depth'
-        params = {'symbol': origin_symbol, 'limit': limit}
-
-        data = self._request("GET", endpoint, "public", symbol_type=symbol_type, params=params)
-
-        for key in ['bids', 'asks']:
-            data[key] = [[float(value) for value in entry] for entry in data[key]]
-        return data
+        return self._call("get_order_book", {"symbol": symbol, "limit": limit})
 
     def get_recent_trades(self, symbol, from_id=None, limit=500):
-        symbol_type = self.get_symbol_type(symbol)
-        origin_symbol = convert_symbol_convention_to(symbol)
-
-        if symbol_type == 1:
-            endpoint = '/v3/trades'
-            origin_symbol = origin_symbol.replace("_", "")
-        else:
-            endpoint = '/market/trades'
-
-        params = {'symbol': origin_symbol, 'limit': limit}
-        if from_id:
-            params['fromId'] = from_id
-
-        data = self._request("GET", endpoint, "public", symbol_type=symbol_type, params=params)
-        return data
+        return self._call("get_recent_trades", {"symbol": symbol, "limit": limit, "fromId": from_id or None})
 
     def get_agg_trades(self, symbol, from_id=None, startTime=None, endTime=None, limit=500):
-        symbol_type = self.get_symbol_type(symbol)
-        origin_symbol = convert_symbol_convention_to(symbol)
-
-        if symbol_type == 1:
-            endpoint = '/v3/aggTrades'
-            origin_symbol = origin_symbol.replace("_", "")
-        else:
-            endpoint = '/market/agg-trades'
-
-        params = {'symbol': origin_symbol, 'limit': limit}
-        if from_id:
-            params['fromId'] = from_id
-        if startTime:
-            params['startTime'] = startTime
-        if endTime:
-            params['endTime'] = endTime
-
-        data = self._request("GET", endpoint, "public", symbol_type=symbol_type, params=params)
-        return data
-    
-    def get_klines(self, symbol, interval, startTime=None, endTime=None, limit=500):
-        
-        assert interval in KLINE_INTERVALS, "Invalid interval. Valid intervals: " + ", ".join(KLINE_INTERVALS) + "."
+        return self._call("get_agg_trades", {"symbol": symbol, "limit": limit, "fromId": from_id or None,
+                                             "startTime": startTime or None, "endTime": endTime or None})
 
-        symbol_type = self.get_symbol_type(symbol)
-        origin_symbol = convert_symbol_convention_to(symbol)
+    def get_klines(self, symbol, interval, startTime=None, endTime=None, limit=500):
+        if self.kline_cache is not None:
+            return self._cached_klines(symbol, interval, startTime or None, endTime or None, limit)
+        return self._call("get_klines", {"symbol": symbol, "limit": limit, "interval": interval,
+                                         "startTime": startTime or None, "endTime": endTime or None})
+
+    def _fetch_klines(self, symbol, interval, page):
+        return page[0], page[1], self._call("get_klines", {"symbol": symbol, "limit": 1000, "interval": interval,
+                                                           "startTime": page[0], "endTime": page[1]})
+
+    def _cached_klines(self, symbol, interval, startTime, endTime, limit):
+        # typed rows like the cache serves, also when the call is sent without it
+        now = self.clock.now()
+        pages = self.kline_cache.missing(symbol, interval, startTime, endTime, limit, now)
+        if pages is None:
+            rows = self._call("get_klines", {"symbol": symbol, "limit": limit, "interval": interval,
+                                             "startTime": startTime, "endTime": endTime})
+            return [list(typed_kline(row)) for row in rows]
+        if pages:
+            fetched = [self._fetch_klines(symbol, interval, page) for page in pages]
+            self.kline_cache.add(symbol, interval, fetched, now, self.clock.uncertainty)
+        return self.kline_cache.rows(symbol, interval, startTime, endTime, limit, now)
+
+    def get_historical_klines(self, symbol, interval, startTime, endTime=None, limit=1000, concurrency=5):
+        """ Gets all klines between startTime and endTime, pages are fetched concurrently
 
-        if symbol_type == 1:
-            endpoint = '/v1/klines'
-            origin_symbol = origin_symbol.replace("_", "")
-        else:
-            endpoint = '/market/klines'
-        
-        params = {'symbol': origin_symbol, 'limit': limit, 'interval': interval}
-        if startTime:
-            params['startTime'] = startTime
-        if endTime:
-            params['endTime'] = endTime
+        Args:
+            symbol (str): e.g. "BTC/TRY"
+            interval (str): one of KLINE_INTERVALS
+            startTime (int): ms timestamp of the first open time
+            endTime (int, optional): ms timestamp of the last open time. Defaults to now.
+            limit (int, optional): candles per page, max 1000. Defaults to 1000.
+            concurrency (int, optional): pages in flight at once. Defaults to 5.
 
-        data = self._request("GET", endpoint, "public", symbol_type=symbol_type, params=params)
-        return data
+        Returns:
+            dict: column name -> typed array, see klines.KLINE_COLUMNS
+        """
+        assert interval in KLINE_INTERVALS, "Invalid interval. Valid intervals: " + ", ".join(KLINE_INTERVALS) + "."
+        now = self.clock.now()
+        if endTime is None:
+            endTime = now
+        # load markets once, before the pages race to do it
+        self._get_route(symbol, "klines")
+        if self.kline_cache is not None:
+            count = (endTime - startTime) // KLINE_INTERVAL_MS[interval] + 1
+            pages = self.kline_cache.missing(symbol, interval, startTime, endTime, count, now)
+            # None when the range does not touch the cached one, it is then fetched without storing it
+            uncached = pages is None
+            if uncached:
+                pages = kline_pages(interval, startTime, endTime, limit)
+            fetched = []
+            if pages:
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    fetched = list(executor.map(lambda page: self._fetch_klines(symbol, interval, page), pages))
+            if uncached:
+                return klines_to_columns(merge_kline_pages([rows for _, _, rows in fetched], startTime, endTime))
+            if fetched:
+                self.kline_cache.add(symbol, interval, fetched, now, self.clock.uncertainty)
+            return self.kline_cache.columns(symbol, interval, startTime, endTime, count, now)
+        pages = kline_pages(interval, startTime, endTime, limit)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda page: self.get_klines(symbol, interval, startTime=page[0], endTime=page[1], limit=limit), pages))
+        return klines_to_columns(merge_kline_pages(results, startTime, endTime))
 
     def create_order(self, symbol, side, order_type, **kwargs):
         # {
@@ -194,28 +334,13 @@ class Client(BaseClient):
         #     'createTime': 1681279199188
         # }
 
-        origin_symbol = convert_symbol_convention_to(symbol)
-        order_type_num = OrderType[order_type.upper()].value
-        
-        assert order_type_num in [1,2,4,6], "order_type must be either 'LIMIT','MARKET','STOP_LOSS_LIMIT' or 'TAKE_PROFIT_LIMIT' "
-
-        params = {
-            'symbol': origin_symbol,
-            'side': Side[side.upper()].value,
-            'type': order_type_num,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        
-        endpoint = "/orders"
-        symbol_type = 0
-        resp = self._request("POST", endpoint, "private", symbol_type=symbol_type, params=params)
-        if "code" in resp:
-            if resp["code"] != 0:
-                return resp
-        data = format_order_data(resp["data"])
-        data["timestamp"] = resp["timestamp"]
-        return data
+        if self.validate_orders:
+            if self.markets is None:
+                self.load_markets()
+            error = self._validate_order(symbol, order_type_value(order_type), kwargs)
+            if error is not None:
+                return error
+        return self._call("create_order", {"symbol": symbol, "side": side, "type": order_type, **kwargs})
 
     def query_order(self, orderId, **kwargs):
         # {
@@ -240,19 +365,7 @@ class Client(BaseClient):
         #     'createTime': 1681279392188
         #     }
 
-        params = {
-            'orderId': orderId,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-
-        endpoint = "/orders/detail"
-        resp = self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        if "data" not in resp:
-            return resp
-        data = format_order_data(resp["data"])
-        data["timestamp"] = resp["timestamp"]
-        return data
+        return self._call("query_order", {"orderId": orderId, **kwargs})
 
     def cancel_order(self, orderId, **kwargs):
         # {
@@ -275,125 +388,140 @@ class Client(BaseClient):
         #     'icebergQty': '0.0000000000000000', 
         #     'status': 3
         # }
-        params = {
-            'orderId': orderId,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/orders/cancel"
-        resp = self._request("POST", endpoint, "private", symbol_type=0, params=params)
-        if "data" not in resp:
-            return resp
-        data = format_order_data(resp["data"])
-        data["timestamp"] = resp["timestamp"]
-        return data
-
-    def all_orders(self, symbol=None, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-
-        if symbol is not None:
-            origin_symbol = convert_symbol_convention_to(symbol)
-            params['symbol'] = origin_symbol
-        endpoint = "/orders"
-        resp = self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        data_list = resp["data"]["list"]
-        data = [format_order_data(i) for i in data_list]
-        return data
+        return self._call("cancel_order", {"orderId": orderId, **kwargs})
+
+    def all_orders(self, symbol=None, raw=False, **kwargs):
+        return self._call("all_orders", {"symbol": symbol, **kwargs}, raw=raw)
+
+    def iter_all_orders(self, symbol=None, startTime=None, endTime=None, fromId=None, toId=None, limit=500,
+                        prefetch=True, **kwargs):
+        """ Streams the whole order history page by page, oldest first
+
+        Only one page is held at a time, and with prefetch the next page downloads while the current
+        one is being consumed.
+
+        Args:
+            startTime, endTime (int, optional): time bounds in ms, iteration stops at the first order after endTime
+            fromId, toId (int, optional): order id bounds, iteration stops at the first order after toId
+            limit (int, optional): page size. Defaults to 500.
+            prefetch (bool, optional): request the next page in the background. Defaults to True.
+        """
+        params = self._page_params(startTime, endTime, fromId, limit, kwargs)
+        pages = iter_pages(lambda page_params: self.all_orders(symbol, **page_params), params,
+                           next_page_by_id("orderId"), limit, prefetch)
+        return iter_items(pages, "orderId", endTime, toId)
+
+    def create_orders(self, orders, concurrency=10):
+        """ Places many orders at once, pipelined over the pooled connections
+
+        Args:
+            orders (list): create_order arguments as dicts, e.g.
+                {"symbol": "BTC/USDT", "side": "BUY", "order_type": "LIMIT", "quantity": "0.001", "price": "10000"}
+            concurrency (int, optional): orders in flight at once. Defaults to 10.
+
+        Returns:
+            list: one result per order in the same order, see batch.order_result
+        """
+        responses = run_threaded(orders, lambda order: self.create_order(**order), concurrency)
+        return [order_result(order, response) for order, response in zip(orders, responses)]
+
+    def cancel_orders(self, order_ids, concurrency=10, **kwargs):
+        """ Cancels many orders at once, returns one result per order id, see batch.order_result """
+        responses = run_threaded(order_ids, lambda order_id: self.cancel_order(order_id, **kwargs), concurrency)
+        return [order_result(order_id, response) for order_id, response in zip(order_ids, responses)]
+
+    def cancel_all_orders(self, symbol=None, concurrency=10, **kwargs):
+        """ Cancels every open order, of one symbol when given, going through every page of all_orders """
+        order_ids = [order["orderId"] for order in self.iter_all_orders(symbol=symbol, **kwargs)
+                     if order["status"] in OPEN_ORDER_STATUSES]
+        return self.cancel_orders(order_ids, concurrency=concurrency)
 
     def new_oco(self, symbol, side, quantity, price, stopPrice, stopLimitPrice, **kwargs):
-        params = {
-            'symbol': convert_symbol_convention_to(symbol),
-            'side': Side[side.upper()].value,
-            'quantity': quantity,
-            'price': price,
-            'stopPrice': stopPrice,
-            'stopLimitPrice': stopLimitPrice,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/orders/oco"
-        symbol_type = 0
-        resp = self._request("POST", endpoint, "private", symbol_type=symbol_type, params=params)
-        return resp["data"]
-
-    def account_information(self, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/account/spot"
-        resp = self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        data = resp["data"]
-        data['accountAssets'] = format_balance(data['accountAssets']) 
-        return data
+        return self._call("new_oco", {"symbol": symbol, "side": side, "quantity": quantity, "price": price,
+                                      "stopPrice": stopPrice, "stopLimitPrice": stopLimitPrice, **kwargs})
+
+    def account_information(self, raw=False, **kwargs):
+        return self._call("account_information", kwargs, raw=raw)
 
     def account_balance(self):
+        if self.balance_ledger is not None:
+            if self.balance_ledger.due(self.clock.now()):
+                self.sync_balances()
+            return self.balance_ledger.balances()
         data = self.account_information()
         balance_dict = data['accountAssets']
         return balance_dict
+
+    def sync_balances(self):
+        """ Reconciles the balance ledger with the exchange
+
+        Returns:
+            dict: asset -> how far the ledger was off, see BalanceLedger.reconcile
+        """
+        now = self.clock.now()
+        return self.balance_ledger.reconcile(self.account_information(raw=True)["accountAssets"], now)
+
+    def start_balance_sync(self, interval=1):
+        """ Reconciles the balance ledger now, then in a background thread whenever it is due, checked every `interval` seconds """
+        self.stop_balance_sync()
+        self.sync_balances()
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    if self.balance_ledger.due(self.clock.now()):
+                        self.sync_balances()
+                except Exception:
+                    pass  # keep the current balances, try again on the next tick
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self._balance_sync = (stop, thread)
+
+    def stop_balance_sync(self):
+        if self._balance_sync is not None:
+            stop, thread = self._balance_sync
+            stop.set()
+            thread.join()
+            self._balance_sync = None
     
     def account_asset_information(self, asset, **kwargs):
-        params = {
-            'asset': asset,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/account/spot/asset"
-        resp = self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
-
-    def account_trade_list(self, symbol=None, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        if symbol is not None:
-            origin_symbol = convert_symbol_convention_to(symbol)
-            params['symbol'] = origin_symbol
-        endpoint = "/orders/trades"
-        resp = self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]["list"]
+        return self._call("account_asset_information", {"asset": asset, **kwargs})
+
+    def account_trade_list(self, symbol=None, raw=False, **kwargs):
+        return self._call("account_trade_list", {"symbol": symbol, **kwargs}, raw=raw)
     
+    def iter_trades(self, symbol=None, startTime=None, endTime=None, fromId=None, toId=None, limit=500,
+                    prefetch=True, **kwargs):
+        """ Streams the whole trade history page by page, oldest first, see iter_all_orders """
+        params = self._page_params(startTime, endTime, fromId, limit, kwargs)
+        pages = iter_pages(lambda page_params: self.account_trade_list(symbol, **page_params), params,
+                           next_page_by_id("tradeId"), limit, prefetch)
+        return iter_items(pages, "tradeId", endTime, toId)
+
     def withdraw(self, asset, address, amount, **kwargs):
-        params = {
-            'asset': asset,
-            'address': address,
-            'amount': amount,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/withdraws"
-        resp = self._request("POST", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
+        return self._call("withdraw", {"asset": asset, "address": address, "amount": amount, **kwargs})
 
     def withdraw_history(self, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/withdraws"
-        resp = self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
+        return self._call("withdraw_history", kwargs)
 
     def deposit_history(self, **kwargs):
-        params = {
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/deposits"
-        resp = self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
+        return self._call("deposit_history", kwargs)
+
+    def iter_withdraws(self, startTime=None, endTime=None, limit=100, prefetch=True, **kwargs):
+        """ Streams the whole withdraw history page by page, these endpoints page by offset """
+        params = self._page_params(startTime, endTime, None, limit, kwargs)
+        pages = iter_pages(lambda page_params: page_list(self.withdraw_history(**page_params)), params,
+                           next_page_by_offset, limit, prefetch)
+        return iter_items(pages, endTime=endTime)
+
+    def iter_deposits(self, startTime=None, endTime=None, limit=100, prefetch=True, **kwargs):
+        """ Streams the whole deposit history page by page, see iter_withdraws """
+        params = self._page_params(startTime, endTime, None, limit, kwargs)
+        pages = iter_pages(lambda page_params: page_list(self.deposit_history(**page_params)), params,
+                           next_page_by_offset, limit, prefetch)
+        return iter_items(pages, endTime=endTime)
 
     def deposit_address(self, asset, network, **kwargs):
-        params = {
-            'asset': asset,
-            'network': network,
-            'timestamp': int(time.time() * 1000),
-            **kwargs
-        }
-        endpoint = "/deposits/address"
-        resp = self._request("GET", endpoint, "private", symbol_type=0, params=params)
-        return resp["data"]
+        return self._call("deposit_address", {"asset": asset, "network": network, **kwargs})
@@ -0,0 +1,78 @@
+import math
+import time
+from collections import deque
+
+
+class ClockSync:
+    """
+    Tracks the offset between the local clock and the server clock, so request timestamps can be
+    stamped in server time.
+
+    Each sample is one /common/time call: the server time is taken to be read at the midpoint of the
+    round trip, so its error is at most half the round trip time. Samples whose round trip is much
+    slower than the best recent one (a queued or retried request) are dropped, the rest are
+    smoothed into `offset` with an exponential moving average.
+    """
+    def __init__(self, alpha=0.3, window=8, max_rtt_ratio=2.0):
+        """
+        Args:
+            alpha (float, optional): weight of a new sample in the smoothed offset. Defaults to 0.3.
+            window (int, optional): recent samples kept for the round trip filter and the uncertainty. Defaults to 8.
+            max_rtt_ratio (float, optional): samples slower than this times the best recent round trip are dropped.
+                Defaults to 2.
+        """
+        self.alpha = alpha
+        self.max_rtt_ratio = max_rtt_ratio
+        # (offset, rtt) in ms
+        self.samples = deque(maxlen=window)
+        self.rtts = deque(maxlen=window)
+        self.offset = 0.0
+        self.synced_at = None
+
+    def add_sample(self, sent, server_time, received):
+        """ Adds one measurement, all times in ms
+
+        Returns:
+            bool: False when the sample was dropped for its slow round trip
+        """
+        rtt = max(received - sent, 0)
+        sample = server_time - (sent + received) / 2
+        # compared with recent round trips including dropped ones, so a network that got slower for
+        # good is accepted again once the window has filled up with it
+        best = min(self.rtts) if self.rtts else None
+        self.rtts.append(rtt)
+        if best is not None and rtt > self.max_rtt_ratio * max(best, 1):
+            return False
+        if self.synced_at is None:
+            self.offset = sample
+        else:
+            self.offset += self.alpha * (sample - self.offset)
+        self.samples.append((sample, rtt))
+        self.synced_at = received
+        return True
+
+    @property
+    def best_rtt(self):
+        return min(rtt for _, rtt in self.samples) if self.samples else None
+
+    @property
+    def uncertainty(self):
+        """ How far off `offset` may be in ms: half the best round trip plus the spread of recent samples """
+        if not self.samples:
+            return None
+        spread = max(abs(sample - self.offset) for sample, _ in self.samples)
+        return self.best_rtt / 2 + spread
+
+    def now(self):
+        """ Current server time estimate in ms, what requests are stamped with """
+        return int(time.time() * 1000 + self.offset)
+
+    def recv_window(self, margin=50):
+        """ A recvWindow in ms that covers the current uncertainty plus `margin`, None before the first sample """
+        if self.uncertainty is None:
+            return None
+        return int(math.ceil(self.uncertainty + margin))
+
+    def status(self):
+        return {"offset": self.offset, "uncertainty": self.uncertainty, "best_rtt": self.best_rtt,
+                "samples": len(self.samples), "synced_at": self.synced_at}
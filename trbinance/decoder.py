@@ -0,0 +1,100 @@
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .endpoints import ENDPOINTS, DEPTH_KEYS, endpoint_keys
+
+# keys the responses nest their payload under, the only ones walked after an orjson parse
+CONTAINER_KEYS = ["data", "list", "accountAssets"]
+
+# (method, endpoint) -> keys whose decimal strings are parsed into numbers while decoding
+NUMERIC_FIELDS = {key: endpoint.numeric for endpoint in ENDPOINTS.values() if endpoint.numeric
+                  for key in endpoint_keys(endpoint)}
+
+NUMERIC_TYPES = {"float": float, "decimal": Decimal}
+
+
+class Decoder:
+    """
+    Response body decoder with a pluggable json backend.
+
+    With `numeric` set, the decimal strings of the fields listed for an endpoint are turned into
+    float (or Decimal) as part of decoding, and the format_* helpers leave them as they are. With the
+    stdlib backend this happens in an object_hook while the json is parsed, with orjson in a walk
+    right after its (much faster) parse.
+    """
+    def __init__(self, backend=None, numeric="float"):
+        """
+        Args:
+            backend (str, optional): "orjson" or "json". Defaults to orjson when it is installed.
+            numeric (str, optional): "float", "decimal" or None to keep decimal strings. Defaults to "float".
+        """
+        if backend is None:
+            backend = "orjson" if orjson is not None else "json"
+        assert backend in ["orjson", "json"], "backend must be either 'orjson' or 'json'"
+        assert backend != "orjson" or orjson is not None, "orjson is not installed"
+        assert numeric is None or numeric in NUMERIC_TYPES, "numeric must be either 'float', 'decimal' or None"
+        self.backend = backend
+        self.numeric = numeric
+        self.number = NUMERIC_TYPES.get(numeric)
+        self._hooks = {}
+
+    def fields_for(self, method, endpoint):
+        if self.numeric is None:
+            return None
+        return NUMERIC_FIELDS.get((method, endpoint))
+
+    def decode(self, body, fields=None):
+        if self.backend == "orjson":
+            data = orjson.loads(body)
+            if fields:
+                self._walk(data, fields)
+            return data
+        if fields:
+            return json.loads(body, object_hook=self._hook(fields))
+        return json.loads(body)
+
+    def _hook(self, fields):
+        hook = self._hooks.get(id(fields))
+        if hook is not None:
+            return hook
+        number = self.number
+        if fields is DEPTH_KEYS:
+            def hook(obj):
+                if "bids" in obj:
+                    obj["bids"] = [[number(price), number(quantity)] for price, quantity in obj["bids"]]
+                    obj["asks"] = [[number(price), number(quantity)] for price, quantity in obj["asks"]]
+                return obj
+        else:
+            def hook(obj):
+                for key in fields:
+                    if key in obj:
+                        value = obj[key]
+                        # integer valued numbers may come unquoted, they get the same type as the rest
+                        if value.__class__ is str or value.__class__ is int:
+                            obj[key] = number(value)
+                return obj
+        self._hooks[id(fields)] = hook
+        return hook
+
+    def _walk(self, data, fields):
+        # orjson has no hooks, apply the same conversion to the payload objects after parsing
+        hook = self._hook(fields)
+        stack = [data]
+        while stack:
+            value = stack.pop()
+            if value.__class__ is list:
+                for item in value:
+                    if item.__class__ is dict:
+                        stack.append(item)
+                continue
+            if value.__class__ is not dict:
+                continue
+            hook(value)
+            for key in CONTAINER_KEYS:
+                if key in value:
+                    stack.append(value[key])
@@ -31,7 +31,22 @@ class OrderSide(Enum):
     BUY = 0
     SELL = 1
 
+# market data call -> (endpoint for symbol type 1, endpoint for other symbol types)
+MARKET_DATA_ENDPOINTS = {
+    "depth": ("/v3/depth", "/market/depth"),
+    "trades": ("/v3/trades", "/market/trades"),
+    "aggTrades": ("/v3/aggTrades", "/market/agg-trades"),
+    "klines": ("/v1/klines", "/market/klines"),
+}
+
 KLINE_INTERVALS = ["1m","3m","5m","15m","30m","1h","2h","4h","6h","8h","12h","1d","3d","1w","1M"]
 
+# interval length in milliseconds, 1M is the longest month
+KLINE_INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000, "8h": 28_800_000, "12h": 43_200_000,
+    "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000, "1M": 2_678_400_000,
+}
+
 # # Create a reverse-lookup dictionary
 # reverse_lookup = {value: key for key, value in OrderStatus.__members__.items()}
\ No newline at end of file
@@ -0,0 +1,116 @@
+from collections import namedtuple
+
+from .defines import Side, OrderType, KLINE_INTERVALS, MARKET_DATA_ENDPOINTS
+from .helper import (convert_symbol_convention_to, ORDER_FLOAT_KEYS, MARKET_FLOAT_KEYS, BALANCE_FLOAT_KEYS,
+                     TRADE_FLOAT_KEYS)
+
+DEPTH_KEYS = ["bids", "asks"]
+
+# One api call, declared once for both clients.
+#   base: key of BaseClient.urls, or a MARKET_DATA_ENDPOINTS call whose url and path follow the symbol route
+#   weight: request weight, depth is scaled by its limit on top (see ratelimit.DEPTH_WEIGHTS)
+#   required: params the call cannot go without
+#   convert: param -> function turning the argument into what the api expects
+#   parser: the BaseClient._parse_* method the decoded response goes through
+#   numeric: fields the decoder parses into numbers
+Endpoint = namedtuple("Endpoint", ["method", "base", "path", "security", "weight", "required", "convert", "parser",
+                                   "numeric"])
+
+
+def side_value(side):
+    return Side[side.upper()].value if isinstance(side, str) else side
+
+
+def order_type_value(order_type):
+    order_type_num = OrderType[order_type.upper()].value if isinstance(order_type, str) else order_type
+    assert order_type_num in [1,2,4,6], "order_type must be either 'LIMIT','MARKET','STOP_LOSS_LIMIT' or 'TAKE_PROFIT_LIMIT' "
+    return order_type_num
+
+
+def kline_interval(interval):
+    assert interval in KLINE_INTERVALS, "Invalid interval. Valid intervals: " + ", ".join(KLINE_INTERVALS) + "."
+    return interval
+
+
+SYMBOL = {"symbol": convert_symbol_convention_to}
+ORDER = {"symbol": convert_symbol_convention_to, "side": side_value, "type": order_type_value}
+
+ENDPOINTS = {
+    "check_server_time": Endpoint("GET", "base", "/common/time", "public", 1, (), {}, "server_time", None),
+    "get_symbols": Endpoint("GET", "base", "/common/symbols", "public", 1, (), {}, "symbols", None),
+    "get_market_info": Endpoint("GET", "hidden", "/market/trading-pairs", "public", 1, (), {}, "market_info",
+                                MARKET_FLOAT_KEYS),
+    "get_order_book": Endpoint("GET", "depth", None, "public", 1, (), {}, "order_book", DEPTH_KEYS),
+    "get_recent_trades": Endpoint("GET", "trades", None, "public", 1, (), {}, "raw", None),
+    "get_agg_trades": Endpoint("GET", "aggTrades", None, "public", 1, (), {}, "raw", None),
+    "get_klines": Endpoint("GET", "klines", None, "public", 1, ("interval",), {"interval": kline_interval}, "raw",
+                           None),
+    "create_order": Endpoint("POST", "base", "/orders", "private", 1, ("symbol", "side", "type"), ORDER, "created_order",
+                             ORDER_FLOAT_KEYS),
+    "query_order": Endpoint("GET", "base", "/orders/detail", "private", 1, ("orderId",), {}, "order",
+                            ORDER_FLOAT_KEYS),
+    "cancel_order": Endpoint("POST", "base", "/orders/cancel", "private", 1, ("orderId",), {}, "order",
+                             ORDER_FLOAT_KEYS),
+    "all_orders": Endpoint("GET", "base", "/orders", "private", 5, (), SYMBOL, "orders", ORDER_FLOAT_KEYS),
+    "new_oco": Endpoint("POST", "base", "/orders/oco", "private", 1,
+                        ("symbol", "side", "quantity", "price", "stopPrice", "stopLimitPrice"), ORDER, "data", None),
+    "account_information": Endpoint("GET", "base", "/account/spot", "private", 5, (), {}, "account",
+                                    BALANCE_FLOAT_KEYS),
+    "account_asset_information": Endpoint("GET", "base", "/account/spot/asset", "private", 1, ("asset",), {}, "data",
+                                          None),
+    "account_trade_list": Endpoint("GET", "base", "/orders/trades", "private", 5, (), SYMBOL, "trades",
+                                   TRADE_FLOAT_KEYS),
+    "withdraw": Endpoint("POST", "base", "/withdraws", "private", 1, ("asset", "address", "amount"), {}, "data", None),
+    "withdraw_history": Endpoint("GET", "base", "/withdraws", "private", 1, (), {}, "data", None),
+    "deposit_history": Endpoint("GET", "base", "/deposits", "private", 1, (), {}, "data", None),
+    "deposit_address": Endpoint("GET", "base", "/deposits/address", "private", 1, ("asset", "network"), {}, "data",
+                                None),
+}
+
+
+def endpoint_keys(endpoint):
+    """ (method, path) pairs an endpoint is requested as, market data has one path per symbol type """
+    if endpoint.base in MARKET_DATA_ENDPOINTS:
+        return [(endpoint.method, path) for path in MARKET_DATA_ENDPOINTS[endpoint.base]]
+    return [(endpoint.method, endpoint.path)]
+
+
+class CompiledEndpoint:
+    """ An Endpoint bound to the urls of a client, turns call arguments into the arguments of _request """
+    __slots__ = ("name", "method", "path", "url", "market", "security", "required", "convert", "parser")
+
+    def __init__(self, name, endpoint, urls):
+        self.name = name
+        self.method = endpoint.method
+        self.market = endpoint.base if endpoint.base in MARKET_DATA_ENDPOINTS else None
+        self.path = endpoint.path
+        self.url = None if self.market is not None else urls[endpoint.base] + endpoint.path
+        self.security = endpoint.security
+        self.required = endpoint.required
+        self.convert = list(endpoint.convert.items())
+        self.parser = endpoint.parser
+
+    def build(self, params, route=None):
+        """ Builds a request, no I/O involved
+
+        Args:
+            params (dict): call arguments, None values are left out
+            route (Route, optional): symbol route of a market data call, it provides url, path and symbol
+
+        Returns:
+            tuple: (path, params, url)
+        """
+        params = {key: value for key, value in params.items() if value is not None}
+        for key in self.required:
+            assert key in params, f"{self.name} requires {key}"
+        for key, convert in self.convert:
+            if key in params:
+                params[key] = convert(params[key])
+        if route is not None:
+            params["symbol"] = route.symbol
+            return route.endpoint, params, route.url
+        return self.path, params, self.url
+
+
+def compile_endpoints(urls):
+    return {name: CompiledEndpoint(name, endpoint, urls) for name, endpoint in ENDPOINTS.items()}
@@ -0,0 +1,97 @@
+import asyncio
+import collections
+import time
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate of a slow GET request (a hedge) on the AsyncClient.
+
+    Only GET requests are hedged, so orders, cancels and withdraws are never sent twice. A hedge goes
+    out once the first request has been waiting longer than `delay`, or, when no fixed delay is given,
+    longer than the `percentile` of the latencies recently seen on the endpoint. Whichever request
+    answers first wins and the other one is cancelled.
+    """
+    def __init__(self, delay=None, percentile=95, initial_delay=0.1, min_delay=0.002, max_delay=1.0,
+                 window=500, min_samples=20, endpoints=None):
+        """
+        Args:
+            delay (float, optional): fixed hedge delay in seconds. Defaults to the adaptive percentile delay.
+            percentile (float, optional): latency percentile the adaptive delay follows. Defaults to 95.
+            initial_delay (float, optional): delay used until `min_samples` latencies were seen. Defaults to 0.1.
+            min_delay, max_delay (float, optional): bounds of the adaptive delay in seconds.
+            window (int, optional): latencies kept per endpoint. Defaults to 500.
+            min_samples (int, optional): latencies needed before the percentile is trusted. Defaults to 20.
+            endpoints (list, optional): only hedge these GET endpoints. Defaults to every GET endpoint.
+        """
+        self.delay = delay
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.endpoints = set(endpoints) if endpoints is not None else None
+        self.latencies = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.skipped = 0
+
+    def applies(self, method, endpoint):
+        return method == "GET" and (self.endpoints is None or endpoint in self.endpoints)
+
+    def record(self, endpoint, seconds):
+        self.latencies[endpoint].append(seconds)
+
+    def delay_for(self, endpoint):
+        if self.delay is not None:
+            return self.delay
+        latencies = self.latencies.get(endpoint)
+        if latencies is None or len(latencies) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(latencies)
+        index = min(int(len(ordered) * self.percentile / 100), len(ordered) - 1)
+        return min(max(ordered[index], self.min_delay), self.max_delay)
+
+    def status(self):
+        return {"hedged": self.hedged, "hedge_wins": self.hedge_wins, "skipped": self.skipped,
+                "delays": {endpoint: self.delay_for(endpoint) for endpoint in self.latencies}}
+
+
+async def hedged_call(policy, endpoint, send, charge):
+    """ Runs `send()`, and a second `send()` when the first one is slower than the policy delay
+
+    `charge()` is called before the duplicate goes out and returns False when the rate budget has no
+    room for it, in which case the first request is simply awaited.
+    """
+    started = time.perf_counter()
+    first = asyncio.create_task(send())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=policy.delay_for(endpoint))
+        if done or not charge():
+            if not done:
+                policy.skipped += 1
+            result = await first
+            policy.record(endpoint, time.perf_counter() - started)
+            return result
+
+        policy.hedged += 1
+        hedge_started = time.perf_counter()
+        second = asyncio.create_task(send())
+        tasks.add(second)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        policy.hedge_wins += 1
+                        policy.record(endpoint, time.perf_counter() - hedge_started)
+                    else:
+                        policy.record(endpoint, time.perf_counter() - started)
+                    return task.result()
+        # both failed, report the original request's error
+        return first.result()
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -2,6 +2,9 @@ import math
 from .defines import Side, OrderStatus
 
 ORDER_FLOAT_KEYS = ["price", "origQty", "origQuoteQty", "executedPrice", "executedQty", "executedQuoteQty", "stopPrice", "icebergQty"]
+MARKET_FLOAT_KEYS = ["price", "volume", "baseVolume", "amount", "quoteVolume", "low", "high", "open", "close", "change24h"]
+BALANCE_FLOAT_KEYS = ["free", "locked"]
+TRADE_FLOAT_KEYS = ["price", "qty", "quoteQty", "commission"]
 
 def format_symbol_data(input_data):
     filters = {item['filterType']: item for item in input_data["filters"]}
@@ -69,31 +72,58 @@ def format_symbol_data(input_data):
     }
     return output_data
 
-def format_order_data(input_data):
+def format_order_data(input_data, parse_numbers=True):
     input_data["orderId"] = str(input_data["orderId"])
     input_data["symbol"] = convert_symbol_convention_from(input_data["symbol"])
     input_data["side_name"] = Side(input_data["side"]).name
     input_data["status_name"] = OrderStatus(input_data["status"]).name
-    for float_key in ORDER_FLOAT_KEYS:
-        if float_key in input_data:
-            input_data[float_key] = float(input_data[float_key])
+    # parse_numbers is False when the decoder already parsed them
+    if parse_numbers:
+        for float_key in ORDER_FLOAT_KEYS:
+            if float_key in input_data:
+                input_data[float_key] = float(input_data[float_key])
     return input_data
 
-def format_balance(balance_list):
-    balance_dict = {
-            **{item['asset']: {'free': float(item['free']), 'locked': float(item['locked']), 'total': float(item['free']) + float(item['locked'])} for item in balance_list},
-            'free': {item['asset']: float(item['free']) for item in balance_list if float(item['free']) > 0},
-            'locked': {item['asset']: float(item['locked']) for item in balance_list if float(item['locked']) > 0},
-            'total': {item['asset']: float(item['free']) + float(item['locked']) for item in balance_list if float(item['free']) + float(item['locked']) > 0}
-        }
+def aggregate_balances(items, build):
+    """ The balance layout of format_balance: an entry per asset, plus 'free', 'locked' and 'total'
+    dicts of the assets with a non zero amount
+
+    Args:
+        items (iterable): one item per asset, whatever build takes
+        build (function): item -> (asset, entry, free, locked)
+    """
+    balance_dict, free, locked, total = {}, {}, {}, {}
+    for item in items:
+        asset, entry, item_free, item_locked = build(item)
+        balance_dict[asset] = entry
+        item_total = item_free + item_locked
+        if item_free > 0:
+            free[asset] = item_free
+        if item_locked > 0:
+            locked[asset] = item_locked
+        if item_total > 0:
+            total[asset] = item_total
+    balance_dict['free'] = free
+    balance_dict['locked'] = locked
+    balance_dict['total'] = total
     return balance_dict
 
-def format_market_data(item):
+def format_balance(balance_list, parse_numbers=True):
+    def build(item):
+        item_free, item_locked = item['free'], item['locked']
+        if parse_numbers:
+            item_free, item_locked = float(item_free), float(item_locked)
+        entry = {'free': item_free, 'locked': item_locked, 'total': item_free + item_locked}
+        return item['asset'], entry, item_free, item_locked
+    return aggregate_balances(balance_list, build)
+
+def format_market_data(item, parse_numbers=True):
     item_copy = item.copy()
     item_copy['symbol'] = convert_symbol_convention_from(item['symbol'])
-    for key in ["price", "volume", "baseVolume", "amount", "quoteVolume", "low", "high", "open", "close", "change24h"]:
-        if key in item_copy:
-            item_copy[key] = float(item_copy[key])
+    if parse_numbers:
+        for key in MARKET_FLOAT_KEYS:
+            if key in item_copy:
+                item_copy[key] = float(item_copy[key])
     return item_copy
 
 def convert_symbol_convention_from(symbol):
@@ -0,0 +1,226 @@
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .defines import KLINE_INTERVAL_MS
+from .endpoints import kline_interval
+from .helper import convert_symbol_convention_to
+from .klines import KLINE_COLUMNS, kline_pages, typed_kline
+from .market_cache import FileLock
+
+KLINE_DTYPE = np.dtype([(name, dtype) for name, _, dtype in KLINE_COLUMNS]) if np is not None else None
+
+
+class KlineCache:
+    """
+    Local cache of klines per (symbol, interval), filled incrementally.
+
+    Closed candles are appended to a memory-mapped file per symbol and interval and never fetched
+    again. A small json file next to it records the open time range known to be complete, so a call
+    only requests what lies outside of it: usually just the candles after the last cached close. A
+    call that does not touch that range is sent as it is and not stored, the gap is never bridged. The
+    still-open candle is kept in memory and replaced on every fetch, and reused without a request for
+    `open_ttl` ms. A candle is only taken as closed when a later one came with it, or when it closed
+    before the server time by more than the clock uncertainty, so a client clock running ahead of the
+    server does not store a partial candle.
+
+    Used by the clients through `Client(kline_cache=KlineCache(...))`: get_klines and
+    get_historical_klines are then served from the cache. Rows served from the cache hold numbers
+    where the api sends decimal strings, and leave out the unused last field.
+    """
+    def __init__(self, root, open_ttl=0, clock_margin=1000):
+        """
+        Args:
+            root (str): directory of the cache files, created when missing
+            open_ttl (int, optional): ms the open candle is served without refetching it. Defaults to 0.
+            clock_margin (int, optional): ms the clock may be ahead of the server when its uncertainty is
+                not known, e.g. before the first sync_clock. Defaults to 1000.
+        """
+        assert np is not None, "the kline cache needs numpy, pip install trbinance[numpy]"
+        self.root = root
+        self.open_ttl = open_ttl
+        self.clock_margin = clock_margin
+        self.hits = 0
+        self.misses = 0
+        self._meta = {}
+        self._files = {}
+        self._open = {}
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, symbol, interval):
+        return os.path.join(self.root, convert_symbol_convention_to(symbol), interval)
+
+    def _coverage(self, key):
+        # [start, end] open times of which every closed candle is stored, None when nothing is
+        path = self._path(*key) + ".json"
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._meta.get(key)
+        if cached is None or cached[0] != mtime:
+            with open(path) as f:
+                cached = self._meta[key] = (mtime, json.load(f))
+            self._files.pop(key, None)
+        return cached[1]
+
+    def _closed(self, key):
+        closed = self._files.get(key)
+        if closed is None:
+            path = self._path(*key) + ".bin"
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            if size:
+                closed = np.memmap(path, dtype=KLINE_DTYPE, mode="r", shape=(size // KLINE_DTYPE.itemsize,))
+            else:
+                closed = np.empty(0, dtype=KLINE_DTYPE)
+            self._files[key] = closed
+        return closed
+
+    def _window(self, interval, startTime, endTime, limit, now):
+        # open times a get_klines call asks for
+        interval_ms = KLINE_INTERVAL_MS[interval]
+        if startTime is not None:
+            end = startTime + interval_ms * limit - 1
+            return startTime, min(end if endTime is None else min(end, endTime), now)
+        end = now if endTime is None else min(endTime, now)
+        return end - interval_ms * limit + 1, end
+
+    def _open_candle(self, key, end, now):
+        # the open candle, (row, fetched at, clock margin), when it may still be open and is the first one after `end`
+        entry = self._open.get(key)
+        if entry is None or now - entry[2] > entry[0][6] or entry[0][0] != end + 1:
+            return None
+        return entry
+
+    def missing(self, symbol, interval, startTime=None, endTime=None, limit=500, now=None):
+        """ Plans a get_klines call, counting it as a hit or a miss
+
+        Returns:
+            list: (startTime, endTime) pages of at most 1000 candles to request, empty on a hit, None
+                when the call does not touch the cached range and should be sent without the cache
+        """
+        key = (symbol, kline_interval(interval))
+        with self._lock:
+            start, end = self._window(interval, startTime, endTime, limit, now)
+            coverage = self._coverage(key)
+            if coverage is not None and (end < coverage["start"] - 1 or start > coverage["end"] + 1):
+                # filling the gap to the cached range could take many more requests than the call itself
+                self.misses += 1
+                return None
+            if coverage is None:
+                windows = [(start, end)]
+            else:
+                windows = []
+                if start < coverage["start"]:
+                    windows.append((start, coverage["start"] - 1))
+                if end > coverage["end"]:
+                    open_candle = self._open_candle(key, coverage["end"], now)
+                    if open_candle is None or now - open_candle[1] >= self.open_ttl or end > open_candle[0][6]:
+                        windows.append((coverage["end"] + 1, end))
+            if windows:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return [page for window in windows for page in kline_pages(interval, window[0], window[1], 1000)]
+
+    def add(self, symbol, interval, pages, now, uncertainty=None):
+        """ Stores the answers to the pages planned by missing()
+
+        Args:
+            pages (list): (startTime, endTime, rows) per page, in any order
+            now (int): server time estimate in ms the pages were planned at
+            uncertainty (float, optional): how far off `now` may be in ms, see ClockSync.uncertainty.
+                Defaults to clock_margin.
+        """
+        key = (symbol, interval)
+        # candles closing less than this before `now` may still be open on the server
+        margin = self.clock_margin if uncertainty is None else uncertainty
+        spans = []
+        for start, end, rows in sorted(pages, key=lambda page: page[0]):
+            if spans and start == spans[-1][1] + 1:
+                spans[-1][1] = end
+                spans[-1][2].extend(rows)
+            else:
+                spans.append([start, end, list(rows)])
+        path = self._path(*key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock, FileLock(path + ".lock"):
+            coverage = self._coverage(key)
+            for start, end, rows in spans:
+                coverage = self._add_span(key, path, coverage, start, end, rows, now, margin)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".meta-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(coverage, f)
+            os.replace(tmp_path, path + ".json")
+            self._files.pop(key, None)
+
+    def _add_span(self, key, path, coverage, start, end, rows, now, margin):
+        settled = now - margin
+        rows = sorted((typed_kline(row) for row in rows if start <= int(row[0]) <= end), key=lambda row: row[0])
+        # every candle but the last is followed by a later one, so it is closed
+        closed = rows if rows and rows[-1][6] < settled else rows[:-1]
+        if len(closed) < len(rows):
+            self._open[key] = (rows[-1], now, margin)
+            end = rows[-1][0] - 1
+        elif end >= settled:
+            # the server may not have opened the candles after the last one it sent yet
+            end = closed[-1][6] if closed else start - 1
+        new = np.array(closed, dtype=KLINE_DTYPE)
+        stored = self._closed(key)
+        self._files.pop(key, None)
+        if coverage is None or start > coverage["end"] + 1 or end < coverage["start"] - 1:
+            # nothing cached yet, or not adjacent to what is: start over with this range
+            self._write(path, new)
+            return {"start": start, "end": end}
+        if start < coverage["start"]:
+            # candles before the cached ones, the file is rewritten with them in front
+            first = stored["open_time"][0] if len(stored) else coverage["start"]
+            self._write(path, np.concatenate([new[new["open_time"] < first], stored]))
+        elif len(new):
+            last = stored["open_time"][-1] if len(stored) else -1
+            self._append(path, new[new["open_time"] > last])
+        return {"start": min(start, coverage["start"]), "end": max(end, coverage["end"])}
+
+    def _append(self, path, rows):
+        with open(path + ".bin", "ab") as f:
+            f.write(rows.tobytes())
+
+    def _write(self, path, rows):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".klines-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(rows.tobytes())
+        os.replace(tmp_path, path + ".bin")
+
+    def _select(self, key, startTime, endTime, limit, now):
+        interval = key[1]
+        start, end = self._window(interval, startTime, endTime, limit, now)
+        closed = self._closed(key)
+        open_times = closed["open_time"]
+        low, high = np.searchsorted(open_times, start, "left"), np.searchsorted(open_times, end, "right")
+        selected = closed[low:high]
+        coverage = self._coverage(key)
+        open_candle = self._open_candle(key, coverage["end"], now) if coverage is not None else None
+        if open_candle is not None and start <= open_candle[0][0] <= end:
+            selected = np.concatenate([selected, np.array([open_candle[0]], dtype=KLINE_DTYPE)])
+        return selected[:limit] if startTime is not None else selected[-limit:]
+
+    def columns(self, symbol, interval, startTime=None, endTime=None, limit=500, now=None):
+        """ The cached candles of a get_klines call as a dict of numpy arrays, see klines.KLINE_COLUMNS """
+        with self._lock:
+            selected = self._select((symbol, interval), startTime, endTime, limit, now)
+            return {name: selected[name] for name, _, _ in KLINE_COLUMNS}
+
+    def rows(self, symbol, interval, startTime=None, endTime=None, limit=500, now=None):
+        """ The cached candles of a get_klines call as rows like the api returns them """
+        with self._lock:
+            return [list(row) for row in self._select((symbol, interval), startTime, endTime, limit, now).tolist()]
+
+    def status(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,61 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .defines import KLINE_INTERVAL_MS
+
+# column name, array typecode, numpy dtype, in the order of the kline row
+KLINE_COLUMNS = [
+    ("open_time", "q", "int64"),
+    ("open", "d", "float64"),
+    ("high", "d", "float64"),
+    ("low", "d", "float64"),
+    ("close", "d", "float64"),
+    ("volume", "d", "float64"),
+    ("close_time", "q", "int64"),
+    ("quote_volume", "d", "float64"),
+    ("trades", "q", "int64"),
+    ("taker_buy_base_volume", "d", "float64"),
+    ("taker_buy_quote_volume", "d", "float64"),
+]
+
+
+def typed_kline(row):
+    """ A raw kline row as a tuple of ints and floats in KLINE_COLUMNS order, the unused last field is dropped """
+    return tuple(int(value) if typecode == "q" else float(value) for value, (_, typecode, _) in zip(row, KLINE_COLUMNS))
+
+
+def kline_pages(interval, startTime, endTime, limit=1000):
+    """ Splits [startTime, endTime] into (start, end) windows of at most `limit` candles each """
+    step = KLINE_INTERVAL_MS[interval] * limit
+    return [(start, min(start + step - 1, endTime)) for start in range(startTime, endTime + 1, step)]
+
+
+def merge_kline_pages(pages, startTime=None, endTime=None):
+    """ Joins pages into one list of rows sorted by open time, rows repeated on page boundaries are kept once """
+    rows = {}
+    for page in pages:
+        for row in page:
+            rows[row[0]] = row
+    open_times = sorted(rows)
+    if startTime is not None:
+        open_times = [t for t in open_times if t >= startTime]
+    if endTime is not None:
+        open_times = [t for t in open_times if t <= endTime]
+    return [rows[t] for t in open_times]
+
+
+def klines_to_columns(rows):
+    """ Converts raw kline rows into a dict of typed columns
+
+    Columns are numpy arrays when numpy is installed, array.array otherwise.
+    """
+    columns = {}
+    for i, (name, typecode, dtype) in enumerate(KLINE_COLUMNS):
+        cast = int if typecode == "q" else float
+        values = [cast(row[i]) for row in rows]
+        columns[name] = np.array(values, dtype=dtype) if np is not None else array(typecode, values)
+    return columns
@@ -0,0 +1,176 @@
+import threading
+
+from .defines import Side, OrderStatus
+from .helper import aggregate_balances
+
+# orders that will not fill any further, whatever they still had locked goes back to free
+FINAL_STATUSES = {OrderStatus.FILLED.value, OrderStatus.CANCELED.value, OrderStatus.REJECTED.value,
+                  OrderStatus.EXPIRED.value}
+
+
+def _number(value):
+    return float(value) if value not in (None, "") else 0.0
+
+
+class TrackedOrder:
+    """ What the ledger knows about one open order """
+    __slots__ = ("base", "quote", "side", "locked", "executed", "executed_quote", "reconciled")
+
+    def __init__(self, symbol, side):
+        self.base, self.quote = symbol.split("/")
+        self.side = side
+        # amount of the spent asset (quote for buys, base for sells) still locked for the order
+        self.locked = 0.0
+        self.executed = 0.0
+        self.executed_quote = 0.0
+        # set by a reconcile, the snapshot may already hold what the order did since it was last seen
+        self.reconciled = False
+
+
+class BalanceLedger:
+    """
+    Account balances kept in memory, so reading them costs a dict lookup instead of a signed request.
+
+    Seeded from account_information by reconcile(), then moved by the orders the client sees: an
+    order placed through create_order locks its amount, fills seen on create_order, query_order and
+    cancel_order move assets between the two sides of the market, and a final status unlocks what is
+    left. Trading fees are not in the order responses, so balances drift by them until the next
+    reconcile. A reconcile is due every `reconcile_interval` ms, or right away once drift is
+    detected: a balance going negative, fills of an order it did not see being placed, or an order
+    that moved around a reconcile, whose fills the snapshot may already hold.
+
+    Used by the clients through `Client(balance_ledger=BalanceLedger())`, see Client.sync_balances.
+    """
+    def __init__(self, reconcile_interval=60_000, tolerance=1e-8):
+        """
+        Args:
+            reconcile_interval (int, optional): ms between reconciles. Defaults to 60000.
+            tolerance (float, optional): differences up to this are not drift. Defaults to 1e-8.
+        """
+        self.reconcile_interval = reconcile_interval
+        self.tolerance = tolerance
+        self._free = {}
+        self._locked = {}
+        self.orders = {}
+        self.reconciled_at = None
+        # set when the balances are known to be off, cleared by reconcile
+        self.drift = False
+        self.last_drift = {}
+        self._lock = threading.Lock()
+
+    def free(self, asset):
+        return self._free.get(asset, 0.0)
+
+    def locked(self, asset):
+        return self._locked.get(asset, 0.0)
+
+    def total(self, asset):
+        return self._free.get(asset, 0.0) + self._locked.get(asset, 0.0)
+
+    def balances(self):
+        """ All balances, in the format of helper.format_balance """
+        def build(asset):
+            free, locked = self.free(asset), self.locked(asset)
+            return asset, {'free': free, 'locked': locked, 'total': free + locked}, free, locked
+        return aggregate_balances(self._free.keys() | self._locked.keys(), build)
+
+    def due(self, now):
+        """ Whether the ledger should be reconciled at `now` (ms) """
+        return self.drift or self.reconciled_at is None or now - self.reconciled_at >= self.reconcile_interval
+
+    def reconcile(self, assets, now):
+        """ Replaces the balances with the exchange ones
+
+        Args:
+            assets (list): accountAssets of a raw account_information response
+            now (int): ms timestamp the request was sent at
+
+        Returns:
+            dict: asset -> exchange total minus ledger total, for the assets that were off
+        """
+        free = {item["asset"]: _number(item["free"]) for item in assets}
+        locked = {item["asset"]: _number(item["locked"]) for item in assets}
+        with self._lock:
+            drift = {}
+            if self.reconciled_at is not None:
+                for asset in free.keys() | self._free.keys():
+                    difference = free.get(asset, 0.0) + locked.get(asset, 0.0) - self.total(asset)
+                    if abs(difference) > self.tolerance:
+                        drift[asset] = difference
+            self._free, self._locked = free, locked
+            for tracked in self.orders.values():
+                tracked.reconciled = True
+            self.reconciled_at = now
+            self.drift = False
+            self.last_drift = drift
+            return drift
+
+    def created(self, order):
+        """ Applies an order returned by create_order: its lock and whatever it filled right away """
+        with self._lock:
+            tracked = self.orders[order["orderId"]] = TrackedOrder(order["symbol"], order["side"])
+            if order["side"] == Side.BUY.value:
+                price = _number(order.get("price"))
+                amount = price * _number(order.get("origQty")) if price else _number(order.get("origQuoteQty"))
+                asset = tracked.quote
+            else:
+                amount, asset = _number(order.get("origQty")), tracked.base
+            tracked.locked = amount
+            self._free[asset] = self.free(asset) - amount
+            self._locked[asset] = self.locked(asset) + amount
+            self._check(asset)
+            self._apply(order["orderId"], tracked, order)
+
+    def observe(self, order):
+        """ Applies an order returned by query_order or cancel_order """
+        with self._lock:
+            tracked = self.orders.get(order["orderId"])
+            if tracked is None:
+                # placed elsewhere: its fills since the last reconcile cannot be told apart
+                if _number(order.get("executedQty")) > 0:
+                    self.drift = True
+                return
+            self._apply(order["orderId"], tracked, order)
+
+    def _apply(self, order_id, tracked, order):
+        executed, executed_quote = _number(order.get("executedQty")), _number(order.get("executedQuoteQty"))
+        if not executed_quote and executed:
+            executed_quote = executed * _number(order.get("executedPrice") or order.get("price"))
+        if executed < tracked.executed:
+            return  # an older state of the order than the one already applied
+        filled, filled_quote = executed - tracked.executed, executed_quote - tracked.executed_quote
+        tracked.executed, tracked.executed_quote = executed, executed_quote
+        final = order.get("status") in FINAL_STATUSES
+        if tracked.reconciled:
+            # whether the snapshot saw these fills is unknown: only record them, and reconcile again if there were any
+            tracked.reconciled = False
+            tracked.locked = max(tracked.locked - (filled_quote if tracked.side == Side.BUY.value else filled), 0.0)
+            if filled or final:
+                self.drift = True
+            if final:
+                del self.orders[order_id]
+            return
+        if tracked.side == Side.BUY.value:
+            self._spend(tracked, tracked.quote, filled_quote)
+            self._free[tracked.base] = self.free(tracked.base) + filled
+        else:
+            self._spend(tracked, tracked.base, filled)
+            self._free[tracked.quote] = self.free(tracked.quote) + filled_quote
+        if final:
+            asset = tracked.quote if tracked.side == Side.BUY.value else tracked.base
+            self._locked[asset] = self.locked(asset) - tracked.locked
+            self._free[asset] = self.free(asset) + tracked.locked
+            self._check(asset)
+            del self.orders[order_id]
+
+    def _spend(self, tracked, asset, amount):
+        # fills are paid from the order lock first, a market order may not have locked enough
+        from_lock = min(amount, tracked.locked)
+        tracked.locked -= from_lock
+        self._locked[asset] = self.locked(asset) - from_lock
+        self._free[asset] = self.free(asset) - (amount - from_lock)
+        self._check(asset)
+
+    def _check(self, asset):
+        if self._free.get(asset, 0.0) < -self.tolerance or self._locked.get(asset, 0.0) < -self.tolerance:
+            self.drift = True
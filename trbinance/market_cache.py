@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # windows, refreshes are not coordinated between processes
+    fcntl = None
+
+
+class FileLock:
+    """ Exclusive advisory lock on a file, held across processes of the same host. """
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def release(self):
+        if self._fd is not None:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class MarketCache:
+    """
+    On-disk cache of the normalized `markets` dict returned by get_symbols.
+
+    The file is replaced atomically on save, so readers never see a partial write and need no lock.
+    `lock()` is only taken around downloads, so that when several processes find the cache stale
+    at once only the first one downloads and the others load its result.
+    """
+    def __init__(self, path=None, ttl=3600):
+        """
+        Args:
+            path (str, optional): cache file. Defaults to trbinance-markets.json in the temp directory.
+            ttl (float, optional): seconds a cached markets dict is considered fresh. Defaults to 3600.
+        """
+        self.path = path or os.path.join(tempfile.gettempdir(), "trbinance-markets.json")
+        self.ttl = ttl
+
+    def load(self, max_age=None):
+        """ Returns the cached markets, or None when there is no cache or it is older than max_age (ttl by default) """
+        max_age = self.ttl if max_age is None else max_age
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - data["fetched_at"] > max_age:
+            return None
+        return data["markets"]
+
+    def save(self, markets):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".trbinance-markets-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"fetched_at": time.time(), "markets": markets}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def age(self):
+        try:
+            with open(self.path, "r") as f:
+                return time.time() - json.load(f)["fetched_at"]
+        except (OSError, ValueError):
+            return None
+
+    def lock(self):
+        return FileLock(self.path + ".lock")
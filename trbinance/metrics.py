@@ -0,0 +1,337 @@
+import collections
+import contextvars
+import threading
+from time import perf_counter
+
+import aiohttp
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# transfer runs from sending the request to having the whole body, connect (new connections only)
+# and ttfb (request sent to response headers) are the parts of it that are measured separately
+PHASES = ["queue", "sign", "connect", "ttfb", "transfer", "decode", "format", "total"]
+QUANTILES = [0.5, 0.9, 0.99, 0.999]
+
+# 16 sub-buckets per power of two, values are kept within ~6% of what was recorded
+SUB_BITS = 4
+SUB_COUNT = 1 << SUB_BITS
+
+# the request timer of the last _request made in this thread or task, for timing format_* afterwards
+current_timer = contextvars.ContextVar("current_timer", default=None)
+
+# sync client connect timing: urllib3 connections note how long their connect() took in a thread
+# local, read back by the request that triggered it
+_local = threading.local()
+
+
+def _bucket(value):
+    if value < SUB_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BITS - 1
+    return ((shift + 1) << SUB_BITS) + (value >> shift) - SUB_COUNT
+
+
+def _bucket_value(index):
+    # lowest value of a bucket, the inverse of _bucket
+    if index < SUB_COUNT:
+        return index
+    shift = (index >> SUB_BITS) - 1
+    return ((index & (SUB_COUNT - 1)) + SUB_COUNT) << shift
+
+
+class Histogram:
+    """
+    HDR-style log-linear histogram of durations, recorded in microseconds.
+
+    Memory and recording cost do not depend on how many values are recorded: a value only bumps
+    the counter of its bucket, and the buckets double in width every 16 buckets.
+    """
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, seconds):
+        value = max(int(seconds * 1e6), 0)
+        index = _bucket(value)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """ Value at quantile q (0.99 for p99) in seconds, None when empty """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(max(_bucket_value(index), self.min), self.max) / 1e6
+        return self.max / 1e6
+
+    def snapshot(self):
+        if not self.count:
+            return {"count": 0}
+        data = {"count": self.count, "sum": self.total / 1e6, "mean": self.total / self.count / 1e6,
+                "min": self.min / 1e6, "max": self.max / 1e6}
+        for q in QUANTILES:
+            data[f"p{q * 100:g}"] = self.quantile(q)
+        return data
+
+
+class EndpointMetrics:
+    __slots__ = ("phases", "statuses", "weight", "connections")
+
+    def __init__(self):
+        self.phases = collections.defaultdict(Histogram)
+        self.statuses = collections.Counter()
+        self.weight = 0
+        self.connections = 0
+
+    def snapshot(self):
+        return {
+            "count": sum(self.statuses.values()),
+            "statuses": dict(self.statuses),
+            "weight": self.weight,
+            "connections": self.connections,
+            "phases": {phase: self.phases[phase].snapshot() for phase in PHASES if phase in self.phases},
+        }
+
+
+class RequestTimer:
+    """ Times the phases of one request, `mark(phase)` records the time since the previous mark """
+    __slots__ = ("metrics", "key", "started", "last", "phases", "status", "weight", "used_weight", "sent",
+                 "connect_started")
+
+    def __init__(self, metrics, method, endpoint):
+        self.metrics = metrics
+        self.key = (method, endpoint)
+        self.started = self.last = perf_counter()
+        self.phases = {}
+        self.status = "error"
+        self.weight = 0
+        self.used_weight = None
+
+    def mark(self, phase):
+        now = perf_counter()
+        self.phases[phase] = now - self.last
+        self.last = now
+
+    def lap(self):
+        # skip the time since the previous mark
+        self.last = perf_counter()
+
+    def begin_send(self):
+        # a connect noted by a request that failed before reading it back must not be counted here
+        _local.connect = None
+
+    def end_send(self, elapsed):
+        """ Splits the elapsed time requests reports (send to headers) into connect and ttfb """
+        connect = getattr(_local, "connect", None)
+        if connect is not None:
+            self.phases["connect"] = connect
+            _local.connect = None
+        self.phases["ttfb"] = elapsed - (connect or 0)
+
+    def adopt(self, other):
+        # takes the response phases and status of a hedged duplicate that answered first
+        self.phases.update(other.phases)
+        self.status, self.used_weight = other.status, other.used_weight
+
+    def finish(self):
+        self.phases["total"] = perf_counter() - self.started
+        self.metrics.observe(self)
+
+
+class NullTimer:
+    """ Stands in for RequestTimer when metrics are off, so the request path has no branches """
+    __slots__ = ()
+    weight = 0
+    status = None
+    used_weight = None
+
+    def __setattr__(self, name, value):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def lap(self):
+        pass
+
+    def begin_send(self):
+        pass
+
+    def end_send(self, elapsed):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class Metrics:
+    """
+    Per-endpoint request instrumentation shared by the clients.
+
+    Every request records its phases (see PHASES) into histograms keyed by (method, endpoint), plus
+    its status code and the weight it was charged. Read it with `snapshot()`, export it with
+    `prometheus()`, or get every request as it completes with `add_sink(callback)`.
+
+    The format phase is recorded when the client formats a response, after the request itself
+    completed, so it is in the histograms but not in the samples handed to the sinks.
+    """
+    def __init__(self):
+        self.endpoints = collections.defaultdict(EndpointMetrics)
+        self.used_weight = {}
+        self.sinks = []
+        self._lock = threading.Lock()
+
+    def timer(self, method, endpoint):
+        timer = RequestTimer(self, method, endpoint)
+        current_timer.set(timer)
+        return timer
+
+    def add_sink(self, callback):
+        """ Calls `callback(sample)` after every request, sample is a dict with method, endpoint, status,
+        weight and the phase durations in seconds """
+        self.sinks.append(callback)
+
+    def remove_sink(self, callback):
+        self.sinks.remove(callback)
+
+    def observe(self, timer):
+        with self._lock:
+            metrics = self.endpoints[timer.key]
+            for phase, seconds in timer.phases.items():
+                metrics.phases[phase].record(seconds)
+            if "connect" in timer.phases:
+                metrics.connections += 1
+            metrics.statuses[timer.status] += 1
+            metrics.weight += timer.weight
+            if timer.used_weight:
+                self.used_weight.update(timer.used_weight)
+        if self.sinks:
+            sample = {"method": timer.key[0], "endpoint": timer.key[1], "status": timer.status,
+                      "weight": timer.weight, **timer.phases}
+            for sink in self.sinks:
+                sink(sample)
+
+    def observe_format(self, seconds):
+        timer = current_timer.get()
+        if timer is None or timer.metrics is not self:
+            return
+        with self._lock:
+            self.endpoints[timer.key].phases["format"].record(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+            self.used_weight = {}
+
+    def snapshot(self):
+        """ Returns {"GET /orders": {"count", "statuses", "weight", "connections", "phases": {...}}, ...} """
+        with self._lock:
+            return {f"{method} {endpoint}": metrics.snapshot()
+                    for (method, endpoint), metrics in self.endpoints.items()}
+
+    def prometheus(self, prefix="trbinance"):
+        """ Renders the metrics in the Prometheus text exposition format """
+        lines = [f"# HELP {prefix}_request_seconds Request phase durations.",
+                 f"# TYPE {prefix}_request_seconds summary"]
+        counters = [f"# HELP {prefix}_requests_total Requests by status code.",
+                    f"# TYPE {prefix}_requests_total counter"]
+        weights = [f"# HELP {prefix}_request_weight_total Request weight charged.",
+                   f"# TYPE {prefix}_request_weight_total counter"]
+        with self._lock:
+            for (method, endpoint), metrics in sorted(self.endpoints.items()):
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                for phase in PHASES:
+                    histogram = metrics.phases.get(phase)
+                    if histogram is None or not histogram.count:
+                        continue
+                    phase_labels = f'{labels},phase="{phase}"'
+                    for q in QUANTILES:
+                        lines.append(f'{prefix}_request_seconds{{{phase_labels},quantile="{q}"}} {histogram.quantile(q)}')
+                    lines.append(f"{prefix}_request_seconds_sum{{{phase_labels}}} {histogram.total / 1e6}")
+                    lines.append(f"{prefix}_request_seconds_count{{{phase_labels}}} {histogram.count}")
+                for status, count in sorted(metrics.statuses.items(), key=str):
+                    counters.append(f'{prefix}_requests_total{{{labels},status="{status}"}} {count}')
+                weights.append(f"{prefix}_request_weight_total{{{labels}}} {metrics.weight}")
+            gauges = [f"# HELP {prefix}_used_weight Used weight reported by the exchange.",
+                      f"# TYPE {prefix}_used_weight gauge"]
+            for timeframe, value in sorted(self.used_weight.items()):
+                gauges.append(f'{prefix}_used_weight{{timeframe="{timeframe.lower()}"}} {value}')
+        return "\n".join(lines + counters + weights + gauges) + "\n"
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = perf_counter()
+        super().connect()
+        _local.connect = perf_counter() - started
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = perf_counter()
+        super().connect()
+        _local.connect = perf_counter() - started
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def instrument_adapter(adapter):
+    """ Makes the pools of a requests HTTPAdapter time new connections for RequestTimer.end_send """
+    adapter.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool,
+                                                  "https": _TimedHTTPSConnectionPool}
+
+
+def trace_config():
+    """ aiohttp TraceConfig feeding connect and ttfb into the RequestTimer passed as trace_request_ctx """
+    async def on_request_start(session, ctx, params):
+        timer = ctx.trace_request_ctx
+        if timer is not None:
+            timer.sent = perf_counter()
+            timer.connect_started = None
+
+    async def on_connection_create_start(session, ctx, params):
+        if ctx.trace_request_ctx is not None:
+            ctx.trace_request_ctx.connect_started = perf_counter()
+
+    async def on_connection_create_end(session, ctx, params):
+        timer = ctx.trace_request_ctx
+        if timer is not None and timer.connect_started is not None:
+            timer.phases["connect"] = perf_counter() - timer.connect_started
+
+    async def on_request_end(session, ctx, params):
+        timer = ctx.trace_request_ctx
+        if timer is not None:
+            timer.phases["ttfb"] = perf_counter() - timer.sent - timer.phases.get("connect", 0)
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_connection_create_start.append(on_connection_create_start)
+    config.on_connection_create_end.append(on_connection_create_end)
+    config.on_request_end.append(on_request_end)
+    return config
@@ -0,0 +1,143 @@
+import sys
+
+from .defines import Side, OrderStatus, OrderType
+from .helper import convert_symbol_convention_from, ORDER_FLOAT_KEYS, TRADE_FLOAT_KEYS
+
+_symbols = {}
+
+
+def _symbol(wire_symbol):
+    # one shared string per symbol instead of a new one per order
+    symbol = _symbols.get(wire_symbol)
+    if symbol is None:
+        symbol = _symbols[wire_symbol] = sys.intern(convert_symbol_convention_from(wire_symbol))
+    return symbol
+
+
+class Model:
+    """
+    Base of the slotted response models, a compact alternative to the formatted dicts.
+
+    Known fields are slots, fields the model does not know about are kept in `extra`. Item access
+    (`order["price"]`, `"orderId" in order`) works like on the dicts, so code written for them keeps working.
+    """
+    __slots__ = ("extra",)
+    _fields = ()
+    _float_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls._fields)
+
+    def __init__(self, **fields):
+        for name in self._fields:
+            setattr(self, name, fields.pop(name, None))
+        self.extra = fields or None
+
+    @classmethod
+    def from_raw(cls, data, parse_numbers=True):
+        """ Builds a model from a raw response dict, without mutating it """
+        obj = cls.__new__(cls)
+        get = data.get
+        for name in cls._fields:
+            setattr(obj, name, get(name))
+        if parse_numbers:
+            for name in cls._float_fields:
+                value = getattr(obj, name)
+                if value.__class__ is str:
+                    setattr(obj, name, float(value))
+        extra = data.keys() - cls._field_set
+        obj.extra = {key: data[key] for key in extra} if extra else None
+        return obj
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            return getattr(self, key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        if key in self._field_set:
+            return getattr(self, key) is not None
+        return self.extra is not None and key in self.extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self._fields if getattr(self, name) is not None}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()})"
+
+
+class Order(Model):
+    _fields = ("orderId", "clientId", "bOrderId", "bOrderListId", "symbol", "symbolType", "side", "type", "price",
+               "origQty", "origQuoteQty", "executedQty", "executedPrice", "executedQuoteQty", "timeInForce",
+               "stopPrice", "icebergQty", "status", "createTime", "timestamp")
+    __slots__ = _fields
+    _float_fields = tuple(ORDER_FLOAT_KEYS)
+
+    @classmethod
+    def from_raw(cls, data, parse_numbers=True):
+        obj = super().from_raw(data, parse_numbers)
+        obj.orderId = str(obj.orderId)
+        obj.symbol = _symbol(obj.symbol)
+        return obj
+
+    # enum names are only looked up when asked for
+    @property
+    def side_name(self):
+        return Side(self.side).name
+
+    @property
+    def status_name(self):
+        return OrderStatus(self.status).name
+
+    @property
+    def type_name(self):
+        return OrderType(self.type).name
+
+
+class Trade(Model):
+    _fields = ("tradeId", "orderId", "symbol", "price", "qty", "quoteQty", "commission", "commissionAsset",
+               "isBuyer", "isMaker", "isBestMatch", "time", "createTime")
+    __slots__ = _fields
+    _float_fields = tuple(TRADE_FLOAT_KEYS)
+
+    @classmethod
+    def from_raw(cls, data, parse_numbers=True):
+        obj = super().from_raw(data, parse_numbers)
+        obj.symbol = _symbol(obj.symbol)
+        return obj
+
+
+class Balance(Model):
+    _fields = ("asset", "free", "locked")
+    __slots__ = _fields
+    _float_fields = ("free", "locked")
+
+    @property
+    def total(self):
+        return self.free + self.locked
@@ -0,0 +1,172 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+
+class BookSide:
+    """
+    One side of the book as two sorted, parallel float arrays.
+
+    Prices are stored signed (negated for bids) so both sides sort ascending with the best level
+    first. Lookups are binary searches, inserts and deletes shift the arrays in C. Cumulative
+    quantities are rebuilt lazily on the first depth query after an update.
+    """
+    def __init__(self, descending=False):
+        self.sign = -1.0 if descending else 1.0
+        self.keys = array('d')
+        self.quantities = array('d')
+        self._cumulative = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys = array('d')
+        self.quantities = array('d')
+        self._cumulative = None
+
+    def update(self, price, quantity):
+        key = self.sign * price
+        i = bisect_left(self.keys, key)
+        found = i < len(self.keys) and self.keys[i] == key
+        if quantity == 0:
+            if found:
+                del self.keys[i]
+                del self.quantities[i]
+        elif found:
+            self.quantities[i] = quantity
+        else:
+            self.keys.insert(i, key)
+            self.quantities.insert(i, quantity)
+        self._cumulative = None
+
+    def best(self):
+        if not self.keys:
+            return None
+        return [self.sign * self.keys[0], self.quantities[0]]
+
+    def levels(self, n=None):
+        n = len(self.keys) if n is None else min(n, len(self.keys))
+        return [[self.sign * self.keys[i], self.quantities[i]] for i in range(n)]
+
+    @property
+    def cumulative(self):
+        if self._cumulative is None:
+            self._cumulative = array('d', accumulate(self.quantities))
+        return self._cumulative
+
+    def depth(self, n):
+        """ Total quantity of the best n levels """
+        n = min(n, len(self.keys))
+        return self.cumulative[n - 1] if n > 0 else 0.0
+
+    def quantity_within(self, price):
+        """ Total quantity of the levels at `price` or better """
+        i = bisect_right(self.keys, self.sign * price)
+        return self.cumulative[i - 1] if i > 0 else 0.0
+
+    def price_for_quantity(self, quantity):
+        """ Worst price reached when taking `quantity` from this side, None if the side is too thin """
+        i = bisect_left(self.cumulative, quantity)
+        if i == len(self.keys):
+            return None
+        return self.sign * self.keys[i]
+
+
+class LocalOrderBook:
+    """
+    Order book of one symbol kept in sync from a depth snapshot plus depth diff events.
+
+    Diff events carry the first (U) and last (u) update id they contain. Events already covered by
+    the snapshot are skipped, after that every event has to continue where the previous one stopped.
+    When it does not, `apply_diff` returns False and the book must be seeded again from a snapshot.
+    """
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide()
+        self.last_update_id = None
+        self.synced = False
+        self.resyncs = 0
+
+    def apply_snapshot(self, snapshot):
+        """ Seeds the book from get_order_book output """
+        self.bids.clear()
+        self.asks.clear()
+        for price, quantity in snapshot["bids"]:
+            self.bids.update(float(price), float(quantity))
+        for price, quantity in snapshot["asks"]:
+            self.asks.update(float(price), float(quantity))
+        self.last_update_id = snapshot["lastUpdateId"]
+        self.synced = False
+
+    def apply_diff(self, event):
+        """ Applies a depthUpdate event, returns False when an update id gap was detected """
+        if self.last_update_id is None:
+            return False
+        if event["u"] <= self.last_update_id:
+            return True
+        if self.synced:
+            in_sequence = event["U"] == self.last_update_id + 1
+        else:
+            in_sequence = event["U"] <= self.last_update_id + 1 <= event["u"]
+        if not in_sequence:
+            self.synced = False
+            self.last_update_id = None
+            return False
+
+        for price, quantity in event["b"]:
+            self.bids.update(float(price), float(quantity))
+        for price, quantity in event["a"]:
+            self.asks.update(float(price), float(quantity))
+        self.last_update_id = event["u"]
+        self.synced = True
+        return True
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def mid_price(self):
+        if not self.bids or not self.asks:
+            return None
+        return (self.bids.sign * self.bids.keys[0] + self.asks.keys[0]) / 2
+
+    def spread(self):
+        if not self.bids or not self.asks:
+            return None
+        return self.asks.keys[0] - self.bids.sign * self.bids.keys[0]
+
+    def top(self, n=10):
+        """ Returns the best n levels in get_order_book format """
+        return {"bids": self.bids.levels(n), "asks": self.asks.levels(n), "lastUpdateId": self.last_update_id}
+
+    def sync(self, client, limit=1000):
+        """ Seeds the book with a REST snapshot from a sync Client """
+        self.apply_snapshot(client.get_order_book(self.symbol, limit=limit))
+
+    async def async_sync(self, client, limit=1000):
+        """ Seeds the book with a REST snapshot from an AsyncClient """
+        self.apply_snapshot(await client.get_order_book(self.symbol, limit=limit))
+
+    async def run(self, client, websocket, limit=1000, speed="100ms"):
+        """ Keeps the book in sync until cancelled
+
+        Args:
+            client (AsyncClient): used for the snapshots.
+            websocket (WebsocketClient): used for the depth diff stream.
+            limit (int, optional): snapshot depth. Defaults to 1000.
+            speed (str, optional): diff stream update speed. Defaults to "100ms".
+        """
+        # subscribe first, so the diffs sent while the snapshot is downloaded wait in the queue
+        subscription = await websocket.depth(self.symbol, speed=speed)
+        try:
+            while True:
+                await self.async_sync(client, limit)
+                while self.apply_diff((await subscription.get())["data"]):
+                    pass
+                self.resyncs += 1
+        finally:
+            await subscription.close()
@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+def next_page_by_id(id_key):
+    """ Cursor for endpoints taking fromId, the next page starts right after the last id of this one """
+    def next_params(params, page):
+        return {**params, "fromId": int(page[-1][id_key]) + 1}
+    return next_params
+
+
+def next_page_by_offset(params, page):
+    """ Cursor for endpoints taking offset """
+    return {**params, "offset": params.get("offset", 0) + len(page)}
+
+
+def page_list(data):
+    # history endpoints answer either a list or {"list": [...], ...}
+    if isinstance(data, dict):
+        return data.get("list", [])
+    return data
+
+
+def item_time(item):
+    for key in ["createTime", "time", "insertTime", "applyTime"]:
+        value = item.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def in_bounds(item, id_key=None, endTime=None, toId=None):
+    if toId is not None and int(item[id_key]) > toId:
+        return False
+    if endTime is not None:
+        time = item_time(item)
+        if time is not None and time > endTime:
+            return False
+    return True
+
+
+def iter_pages(fetch, params, next_params, limit, prefetch=True):
+    """ Yields pages of fetch(params) until one comes back shorter than `limit`
+
+    With prefetch the next page is requested on a worker thread as soon as the current one arrives,
+    so it downloads while the caller works through the current page.
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = fetch(params)
+        while page:
+            has_next = len(page) >= limit
+            if has_next:
+                params = next_params(params, page)
+                future = executor.submit(fetch, params) if prefetch else None
+            yield page
+            if not has_next:
+                return
+            page = future.result() if prefetch else fetch(params)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_items(pages, id_key=None, endTime=None, toId=None):
+    """ Flattens pages into items, stopping at the first item past endTime or toId """
+    try:
+        for page in pages:
+            for item in page:
+                if not in_bounds(item, id_key, endTime, toId):
+                    return
+                yield item
+    finally:
+        pages.close()
+
+
+async def aiter_pages(fetch, params, next_params, limit, prefetch=True):
+    """ Async counterpart of iter_pages, the next page is prefetched in a task """
+    task = None
+    try:
+        page = await fetch(params)
+        while page:
+            has_next = len(page) >= limit
+            if has_next:
+                params = next_params(params, page)
+                task = asyncio.create_task(fetch(params)) if prefetch else None
+            yield page
+            if not has_next:
+                return
+            page = await task if prefetch else await fetch(params)
+            task = None
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+async def aiter_items(pages, id_key=None, endTime=None, toId=None):
+    try:
+        async for page in pages:
+            for item in page:
+                if not in_bounds(item, id_key, endTime, toId):
+                    return
+                yield item
+    finally:
+        await pages.aclose()
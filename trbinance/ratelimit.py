@@ -0,0 +1,217 @@
+import asyncio
+import collections
+import math
+import threading
+import time
+
+from .defines import MARKET_DATA_ENDPOINTS
+from .endpoints import ENDPOINTS, endpoint_keys
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# (method, endpoint) -> request weight, from the endpoint table, endpoints not listed weigh 1
+ENDPOINT_WEIGHTS = {key: endpoint.weight for endpoint in ENDPOINTS.values() for key in endpoint_keys(endpoint)}
+
+# depth weight grows with the limit, (max limit, weight)
+DEPTH_WEIGHTS = [(100, 1), (500, 5), (1000, 10), (5000, 50)]
+DEPTH_ENDPOINTS = list(MARKET_DATA_ENDPOINTS["depth"])
+
+# orders and cancels jump ahead of everything, market data polling goes last
+ENDPOINT_PRIORITIES = {
+    ("POST", "/orders"): PRIORITY_HIGH,
+    ("POST", "/orders/cancel"): PRIORITY_HIGH,
+    ("POST", "/orders/oco"): PRIORITY_HIGH,
+    ("GET", "/v3/depth"): PRIORITY_LOW,
+    ("GET", "/market/depth"): PRIORITY_LOW,
+    ("GET", "/v3/trades"): PRIORITY_LOW,
+    ("GET", "/market/trades"): PRIORITY_LOW,
+    ("GET", "/v3/aggTrades"): PRIORITY_LOW,
+    ("GET", "/market/agg-trades"): PRIORITY_LOW,
+    ("GET", "/v1/klines"): PRIORITY_LOW,
+    ("GET", "/market/klines"): PRIORITY_LOW,
+    ("GET", "/market/trading-pairs"): PRIORITY_LOW,
+}
+
+
+def endpoint_weight(method, endpoint, params=None):
+    if endpoint in DEPTH_ENDPOINTS:
+        limit = int((params or {}).get("limit", 100))
+        for max_limit, weight in DEPTH_WEIGHTS:
+            if limit <= max_limit:
+                return weight
+        return DEPTH_WEIGHTS[-1][1]
+    return ENDPOINT_WEIGHTS.get((method, endpoint), 1)
+
+
+def endpoint_priority(method, endpoint):
+    return ENDPOINT_PRIORITIES.get((method, endpoint), PRIORITY_NORMAL)
+
+
+class WeightBudget:
+    """
+    Rolling request weight budget of one exchange window (1200 weight per minute by default).
+
+    Weight is charged locally when a request is admitted and corrected upwards from the
+    X-MBX-USED-WEIGHT-* headers, which also count requests of other processes behind the same ip.
+    A `reserve` fraction of the limit can only be used by high priority requests, so orders and
+    cancels still go through while polling has exhausted its share.
+    """
+    def __init__(self, limit=1200, interval=60, reserve=0.1):
+        self.limit = limit
+        self.interval = interval
+        self.reserve = reserve
+        self.used = 0
+        self.window = None
+        self.banned_until = 0
+
+    def _roll(self, now):
+        window = math.floor(now / self.interval)
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+    def capacity(self, priority):
+        if priority == PRIORITY_HIGH:
+            return self.limit
+        return self.limit * (1 - self.reserve)
+
+    def remaining(self, priority=PRIORITY_HIGH, now=None):
+        now = time.time() if now is None else now
+        self._roll(now)
+        return max(self.capacity(priority) - self.used, 0)
+
+    def fits(self, weight, priority, now):
+        if now < self.banned_until:
+            return False
+        self._roll(now)
+        # a single request heavier than the whole budget is let through on an empty window
+        return self.used + weight <= self.capacity(priority) or self.used == 0
+
+    def charge(self, weight, now):
+        self._roll(now)
+        self.used += weight
+
+    def wait_time(self, now):
+        if now < self.banned_until:
+            return self.banned_until - now
+        return (self.window + 1) * self.interval - now
+
+    def update(self, status, headers, now):
+        self._roll(now)
+        used = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("X-MBX-USED-WEIGHT")
+        if used is not None:
+            self.used = max(self.used, float(used))
+        if status in (418, 429):
+            retry_after = headers.get("Retry-After")
+            wait = float(retry_after) if retry_after else self.interval
+            self.banned_until = max(self.banned_until, now + wait)
+
+
+class _BaseScheduler:
+    def __init__(self, budget=None):
+        self.budget = budget if budget is not None else WeightBudget()
+        self.lanes = [collections.deque() for _ in (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)]
+
+    @property
+    def queue_depth(self):
+        return sum(len(lane) for lane in self.lanes)
+
+    def status(self):
+        now = time.time()
+        return {
+            "limit": self.budget.limit,
+            "used": self.budget.used,
+            "remaining": self.budget.remaining(PRIORITY_HIGH, now),
+            "queue_depth": self.queue_depth,
+            "queued": [len(lane) for lane in self.lanes],
+            "banned_until": self.budget.banned_until if self.budget.banned_until > now else None,
+        }
+
+    def _is_next(self, ticket, priority):
+        return self.lanes[priority][0] is ticket and not any(self.lanes[:priority])
+
+
+class WeightScheduler(_BaseScheduler):
+    """ Admission control for the sync Client, `acquire` blocks the calling thread until the request fits. """
+    def __init__(self, budget=None):
+        super().__init__(budget)
+        self._cond = threading.Condition()
+
+    def acquire(self, method, endpoint, params=None):
+        weight = endpoint_weight(method, endpoint, params)
+        priority = endpoint_priority(method, endpoint)
+        ticket = object()
+        with self._cond:
+            lane = self.lanes[priority]
+            lane.append(ticket)
+            try:
+                while True:
+                    now = time.time()
+                    if not self._is_next(ticket, priority):
+                        self._cond.wait()
+                    elif self.budget.fits(weight, priority, now):
+                        self.budget.charge(weight, now)
+                        return weight
+                    else:
+                        self._cond.wait(self.budget.wait_time(now))
+            finally:
+                lane.remove(ticket)
+                self._cond.notify_all()
+
+    def update(self, status, headers):
+        with self._cond:
+            self.budget.update(status, headers, time.time())
+            self._cond.notify_all()
+
+
+class AsyncWeightScheduler(_BaseScheduler):
+    """ Admission control for the AsyncClient, `acquire` is awaited until the request fits. """
+    def __init__(self, budget=None):
+        super().__init__(budget)
+        self._cond = asyncio.Condition()
+
+    async def _wait(self, timeout=None):
+        try:
+            await asyncio.wait_for(self._cond.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def acquire(self, method, endpoint, params=None):
+        weight = endpoint_weight(method, endpoint, params)
+        priority = endpoint_priority(method, endpoint)
+        ticket = object()
+        async with self._cond:
+            lane = self.lanes[priority]
+            lane.append(ticket)
+            try:
+                while True:
+                    now = time.time()
+                    if not self._is_next(ticket, priority):
+                        await self._wait()
+                    elif self.budget.fits(weight, priority, now):
+                        self.budget.charge(weight, now)
+                        return weight
+                    else:
+                        await self._wait(self.budget.wait_time(now))
+            finally:
+                lane.remove(ticket)
+                self._cond.notify_all()
+
+    def try_acquire(self, method, endpoint, params=None, priority=PRIORITY_LOW):
+        """ Charges a request only when it fits right now and nothing is queued, for optional extra requests
+
+        Returns:
+            int: the weight charged, None when the request should not be sent
+        """
+        now = time.time()
+        weight = endpoint_weight(method, endpoint, params)
+        if self.queue_depth or not self.budget.fits(weight, priority, now):
+            return None
+        self.budget.charge(weight, now)
+        return weight
+
+    def update(self, status, headers):
+        # only called from the event loop thread, waiters time out on their own when a window rolls
+        self.budget.update(status, headers, time.time())
@@ -0,0 +1,213 @@
+from collections import deque
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .defines import KLINE_INTERVALS, KLINE_INTERVAL_MS
+from .klines import KLINE_COLUMNS, klines_to_columns, typed_kline
+
+DAY = 86_400_000
+# weekly candles open on monday 00:00 UTC, the epoch was a thursday
+WEEK_OFFSET = 4 * DAY
+# how each column of a candle is combined with the next one, see KLINE_COLUMNS
+SUMMED = ["volume", "quote_volume", "trades", "taker_buy_base_volume", "taker_buy_quote_volume"]
+
+
+def _month_start(open_time):
+    moment = datetime.fromtimestamp(open_time // 1000, timezone.utc)
+    return int(datetime(moment.year, moment.month, 1, tzinfo=timezone.utc).timestamp()) * 1000
+
+
+def _next_month(start):
+    moment = datetime.fromtimestamp(start // 1000, timezone.utc)
+    year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp()) * 1000
+
+
+def bucket_start(open_time, interval):
+    """ Open time of the `interval` candle containing `open_time`, an int or a numpy array of ms timestamps """
+    if interval == "1M":
+        if np is not None and isinstance(open_time, np.ndarray):
+            return open_time.astype("datetime64[ms]").astype("datetime64[M]").astype("datetime64[ms]").astype(np.int64)
+        return _month_start(open_time)
+    offset = WEEK_OFFSET if interval == "1w" else 0
+    return open_time - (open_time - offset) % KLINE_INTERVAL_MS[interval]
+
+
+def bucket_end(start, interval):
+    """ Close time of the `interval` candle opening at `start` """
+    if interval == "1M":
+        if np is not None and isinstance(start, np.ndarray):
+            months = start.astype("datetime64[ms]").astype("datetime64[M]") + 1
+            return months.astype("datetime64[ms]").astype(np.int64) - 1
+        return _next_month(start) - 1
+    return start + KLINE_INTERVAL_MS[interval] - 1
+
+
+def can_resample(base, interval):
+    """ Whether every `interval` candle is made of whole `base` candles """
+    if KLINE_INTERVALS.index(interval) <= KLINE_INTERVALS.index(base):
+        return False
+    if interval == "1M":
+        return DAY % KLINE_INTERVAL_MS[base] == 0
+    return KLINE_INTERVAL_MS[interval] % KLINE_INTERVAL_MS[base] == 0
+
+
+def resample_klines(columns, interval):
+    """ Aggregates a series of klines into coarser `interval` candles
+
+    Open is the first open, close the last close, high and low the extremes and the volumes and
+    trade counts are summed. The last candle is partial when the series ends inside it.
+
+    Args:
+        columns (dict): column name -> numpy array sorted by open time, from klines_to_columns or a KlineCache
+        interval (str): one of KLINE_INTERVALS, coarser than the series and made of whole candles of it
+
+    Returns:
+        dict: column name -> numpy array, see klines.KLINE_COLUMNS
+    """
+    assert np is not None, "resample_klines needs numpy, pip install trbinance[numpy]"
+    open_times = np.asarray(columns["open_time"], dtype=np.int64)
+    if not len(open_times):
+        return {name: np.empty(0, dtype=dtype) for name, _, dtype in KLINE_COLUMNS}
+    starts = bucket_start(open_times, interval)
+    firsts = np.concatenate([[0], np.flatnonzero(np.diff(starts)) + 1])
+    lasts = np.concatenate([firsts[1:] - 1, [len(starts) - 1]])
+    result = {
+        "open_time": starts[firsts],
+        "open": np.asarray(columns["open"])[firsts],
+        "high": np.maximum.reduceat(np.asarray(columns["high"]), firsts),
+        "low": np.minimum.reduceat(np.asarray(columns["low"]), firsts),
+        "close": np.asarray(columns["close"])[lasts],
+        "close_time": bucket_end(starts[firsts], interval),
+    }
+    for name in SUMMED:
+        result[name] = np.add.reduceat(np.asarray(columns[name]), firsts)
+    return {name: result[name] for name, _, _ in KLINE_COLUMNS}
+
+
+def merge_candle(candle, row):
+    """ Folds the next candle `row` into `candle`, both typed rows in KLINE_COLUMNS order """
+    return (candle[0], candle[1], max(candle[2], row[2]), min(candle[3], row[3]), row[4], candle[5] + row[5],
+            candle[6], candle[7] + row[7], candle[8] + row[8], candle[9] + row[9], candle[10] + row[10])
+
+
+class Timeframe:
+    """ State of one interval of a KlineResampler """
+    __slots__ = ("interval", "start", "end", "folded", "closed")
+
+    def __init__(self, interval, history):
+        self.interval = interval
+        # bounds of the candle in progress
+        self.start = self.end = None
+        # the final base candles of the candle in progress folded together, None when there are none yet
+        self.folded = None
+        self.closed = deque(maxlen=history)
+
+    def open(self, start):
+        self.start = start
+        self.end = bucket_end(start, self.interval)
+        self.folded = None
+
+    def fold(self, row):
+        if self.folded is None:
+            self.folded = (self.start,) + row[1:6] + (self.end,) + row[7:]
+        else:
+            self.folded = merge_candle(self.folded, row)
+
+    def candle(self, current):
+        if self.folded is None:
+            return (self.start,) + current[1:6] + (self.end,) + current[7:]
+        return merge_candle(self.folded, current)
+
+
+class KlineResampler:
+    """
+    Keeps candles of several intervals up to date from one stream of base candles.
+
+    Every update of the base candle, a revision of the open one or the next one, costs O(1) per
+    interval: final base candles are folded into the candle in progress of each interval, and the
+    open base candle is merged on top of that only when a candle is read. A candle in progress is
+    closed once a base candle of the next bucket arrives. `1w` candles open on monday and `1M`
+    candles on the first of the month, like the exchange.
+    """
+    def __init__(self, base="1m", intervals=None, history=1000):
+        """
+        Args:
+            base (str, optional): interval of the candles fed to update(). Defaults to "1m".
+            intervals (list, optional): intervals to keep, each coarser than base and made of whole
+                base candles. Defaults to all of them.
+            history (int, optional): closed candles kept per interval. Defaults to 1000.
+        """
+        if intervals is None:
+            intervals = [interval for interval in KLINE_INTERVALS if can_resample(base, interval)]
+        for interval in intervals:
+            assert can_resample(base, interval), f"{interval} candles cannot be made of {base} candles"
+        self.base = base
+        self.current = None
+        self.timeframes = {interval: Timeframe(interval, history) for interval in intervals}
+
+    def update(self, row):
+        """ Adds a base candle, a raw api row or a typed one, a revision of the current one replaces it
+
+        Returns:
+            bool: False when the candle is older than the current one and was ignored
+        """
+        row = typed_kline(row)
+        current = self.current
+        if current is not None and row[0] < current[0]:
+            return False
+        if current is None or row[0] > current[0]:
+            for timeframe in self.timeframes.values():
+                if current is not None:
+                    timeframe.fold(current)
+                if timeframe.end is None or row[0] > timeframe.end:
+                    if timeframe.folded is not None:
+                        timeframe.closed.append(timeframe.folded)
+                    timeframe.open(bucket_start(row[0], timeframe.interval))
+        self.current = row
+        return True
+
+    def load(self, columns):
+        """ Seeds the resampler with a series of base candles, e.g. from get_historical_klines """
+        rows = list(zip(*[columns[name].tolist() for name, _, _ in KLINE_COLUMNS]))
+        if self.current is not None:
+            rows = [row for row in rows if row[0] >= self.current[0]]
+        if not rows:
+            return
+        if np is None or self.current is not None:
+            for row in rows:
+                self.update(row)
+            return
+        # vectorized: everything but the last base candle is final
+        head = {name: np.asarray(values)[:len(rows) - 1] for name, values in columns.items()}
+        last = rows[-1]
+        for interval, timeframe in self.timeframes.items():
+            resampled = resample_klines(head, interval)
+            candles = list(zip(*[resampled[name].tolist() for name, _, _ in KLINE_COLUMNS]))
+            timeframe.open(bucket_start(last[0], interval))
+            if candles and candles[-1][0] == timeframe.start:
+                timeframe.folded = candles.pop()
+            timeframe.closed.extend(candles)
+        self.current = last
+
+    def candle(self, interval):
+        """ The candle in progress of an interval as a typed row, None before the first update """
+        if self.current is None:
+            return None
+        return self.timeframes[interval].candle(self.current)
+
+    def klines(self, interval):
+        """ The kept candles of an interval, the one in progress last
+
+        Returns:
+            dict: column name -> typed array, see klines.KLINE_COLUMNS
+        """
+        timeframe = self.timeframes[interval]
+        rows = list(timeframe.closed)
+        if self.current is not None:
+            rows.append(timeframe.candle(self.current))
+        return klines_to_columns(rows)
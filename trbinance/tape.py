@@ -0,0 +1,296 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .batch import run_threaded, gather_bounded
+from .helper import convert_symbol_convention_to
+from .market_cache import FileLock
+from .paging import iter_pages, aiter_pages
+
+# column name, key in the api response, numpy dtype
+AGG_TRADE_COLUMNS = [
+    ("id", "a", "int64"),
+    ("price", "p", "float64"),
+    ("qty", "q", "float64"),
+    ("first_trade_id", "f", "int64"),
+    ("last_trade_id", "l", "int64"),
+    ("time", "T", "int64"),
+    ("buyer_maker", "m", "bool"),
+    ("best_match", "M", "bool"),
+]
+
+TRADE_COLUMNS = [
+    ("id", "id", "int64"),
+    ("price", "price", "float64"),
+    ("qty", "qty", "float64"),
+    ("quote_qty", "quoteQty", "float64"),
+    ("time", "time", "int64"),
+    ("buyer_maker", "isBuyerMaker", "bool"),
+    ("best_match", "isBestMatch", "bool"),
+]
+
+TAPE_COLUMNS = {"aggTrades": AGG_TRADE_COLUMNS, "trades": TRADE_COLUMNS}
+
+
+class TapeStore:
+    """
+    Columnar on-disk archive of the trade tape of many symbols.
+
+    Every symbol has a directory of segments, a segment is a directory with one .npy file per column
+    holding up to `segment_size` trades in id order. index.json lists the segments with their id and
+    time bounds, so a range query only opens the segments it overlaps, memory-mapped, and binary
+    searches the id and time columns within them. The last segment is topped up by later appends
+    until it is full. A segment is written under a new name before the index points to it, so
+    readers never see a partial segment, and a read that raced the removal of a replaced one starts
+    over from the new index.
+    """
+    def __init__(self, root, kind="aggTrades", segment_size=100_000):
+        """
+        Args:
+            root (str): directory of the archive, created when missing
+            kind (str, optional): "aggTrades" or "trades". Defaults to "aggTrades".
+            segment_size (int, optional): trades per segment. Defaults to 100000.
+        """
+        assert np is not None, "the tape store needs numpy, pip install trbinance[numpy]"
+        assert kind in TAPE_COLUMNS, "kind must be either 'aggTrades' or 'trades'"
+        self.root = os.path.join(root, kind)
+        self.kind = kind
+        self.columns = TAPE_COLUMNS[kind]
+        self.segment_size = segment_size
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, convert_symbol_convention_to(symbol))
+
+    def symbols(self):
+        return sorted(name.replace("_", "/") for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, "index.json")))
+
+    def segments(self, symbol):
+        """ Returns the index of a symbol, a list of {"name", "count", "first_id", "last_id", "first_time", "last_time"} """
+        try:
+            with open(os.path.join(self._dir(symbol), "index.json")) as f:
+                return json.load(f)["segments"]
+        except OSError:
+            return []
+
+    def last_id(self, symbol):
+        segments = self.segments(symbol)
+        return segments[-1]["last_id"] if segments else None
+
+    def _save_index(self, directory, segments):
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".index-")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"segments": segments}, f)
+        os.replace(tmp_path, os.path.join(directory, "index.json"))
+
+    def _to_columns(self, rows):
+        return {name: np.array([row[key] for row in rows], dtype=dtype) for name, key, dtype in self.columns}
+
+    def _write_segment(self, directory, columns):
+        ids, times = columns["id"], columns["time"]
+        name = f"{ids[0]:020d}-{ids[-1]:020d}"
+        path = os.path.join(directory, name)
+        tmp_path = tempfile.mkdtemp(dir=directory, prefix=".segment-")
+        for column, values in columns.items():
+            np.save(os.path.join(tmp_path, column + ".npy"), values)
+        if os.path.exists(path):
+            # left behind by a run that died before updating the index
+            shutil.rmtree(path)
+        os.rename(tmp_path, path)
+        return {"name": name, "count": len(ids), "first_id": int(ids[0]), "last_id": int(ids[-1]),
+                "first_time": int(times.min()), "last_time": int(times.max())}
+
+    def append(self, symbol, rows):
+        """ Appends trades as returned by the api, the ones not newer than the last stored id are skipped
+
+        Returns:
+            int: trades added
+        """
+        if not rows:
+            return 0
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        with FileLock(os.path.join(directory, ".lock")):
+            segments = self.segments(symbol)
+            columns = self._to_columns(rows)
+            order = np.argsort(columns["id"], kind="stable")
+            columns = {name: values[order] for name, values in columns.items()}
+            if segments:
+                keep = columns["id"] > segments[-1]["last_id"]
+                columns = {name: values[keep] for name, values in columns.items()}
+            added = len(columns["id"])
+            if not added:
+                return 0
+
+            replaced = None
+            if segments and segments[-1]["count"] < self.segment_size:
+                replaced = segments.pop()
+                tail = self._load(directory, replaced, [name for name, _, _ in self.columns], mmap=False)
+                columns = {name: np.concatenate([tail[name], columns[name]]) for name in columns}
+            for start in range(0, len(columns["id"]), self.segment_size):
+                segments.append(self._write_segment(
+                    directory, {name: values[start:start + self.segment_size] for name, values in columns.items()}))
+            self._save_index(directory, segments)
+            if replaced is not None and replaced["name"] != segments[-1]["name"]:
+                shutil.rmtree(os.path.join(directory, replaced["name"]), ignore_errors=True)
+            return added
+
+    def _load(self, directory, segment, columns, mmap=True):
+        path = os.path.join(directory, segment["name"])
+        return {name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None) for name in columns}
+
+    def read(self, symbol, fromId=None, toId=None, startTime=None, endTime=None, columns=None):
+        """ Reads the trades within the given id and time bounds (inclusive)
+
+        Args:
+            columns (list, optional): columns to read. Defaults to all of them.
+
+        Returns:
+            dict: column name -> numpy array, in id order
+        """
+        attempts = 3
+        while True:
+            try:
+                return self._read(symbol, fromId, toId, startTime, endTime, columns)
+            except FileNotFoundError:
+                # the index was read before an append replaced its tail segment
+                attempts -= 1
+                if not attempts:
+                    raise
+
+    def _read(self, symbol, fromId, toId, startTime, endTime, columns):
+        columns = columns or [name for name, _, _ in self.columns]
+        dtypes = {name: dtype for name, _, dtype in self.columns}
+        directory = self._dir(symbol)
+        parts = {name: [] for name in columns}
+        for segment in self.segments(symbol):
+            if (fromId is not None and segment["last_id"] < fromId) or (toId is not None and segment["first_id"] > toId) \
+                    or (startTime is not None and segment["last_time"] < startTime) \
+                    or (endTime is not None and segment["first_time"] > endTime):
+                continue
+            needed = set(columns)
+            if fromId is not None or toId is not None:
+                needed.add("id")
+            if startTime is not None or endTime is not None:
+                needed.add("time")
+            data = self._load(directory, segment, needed)
+            low, high = 0, segment["count"]
+            if fromId is not None:
+                low = max(low, int(np.searchsorted(data["id"], fromId, "left")))
+            if toId is not None:
+                high = min(high, int(np.searchsorted(data["id"], toId, "right")))
+            # trade times follow the ids, so the time column is sorted too
+            if startTime is not None:
+                low = max(low, int(np.searchsorted(data["time"], startTime, "left")))
+            if endTime is not None:
+                high = min(high, int(np.searchsorted(data["time"], endTime, "right")))
+            if low < high:
+                for name in columns:
+                    parts[name].append(data[name][low:high])
+        return {name: np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=dtypes[name])
+                for name in columns}
+
+
+class TapeArchiver:
+    """
+    Keeps a TapeStore up to date from the api.
+
+    Every symbol resumes from the last id in the store, pages are requested by fromId with the next
+    page prefetched while the current one is buffered, and symbols are updated concurrently. The
+    requests go through the client, so they are charged to its rate budget like any market data call.
+    """
+    def __init__(self, client, store, limit=1000, max_pages=None, prefetch=True):
+        """
+        Args:
+            client (Client or AsyncClient): use update() with a Client, aupdate() with an AsyncClient
+            store (TapeStore): where the trades go, its kind picks the endpoint
+            limit (int, optional): trades per request. Defaults to 1000.
+            max_pages (int, optional): stop a symbol after this many pages per update. Defaults to no limit.
+            prefetch (bool, optional): request the next page while storing the current one. Defaults to True.
+        """
+        self.client = client
+        self.store = store
+        self.limit = limit
+        self.max_pages = max_pages
+        self.prefetch = prefetch
+
+    def _params(self, symbol, fromId, startTime):
+        # a new symbol starts at fromId, or at startTime (aggTrades only), or at the latest trades
+        params = {"limit": self.limit}
+        last_id = self.store.last_id(symbol)
+        if last_id is not None:
+            params["fromId"] = last_id + 1
+        elif fromId is not None:
+            params["fromId"] = fromId
+        elif startTime is not None:
+            assert self.store.kind == "aggTrades", "only aggTrades can start at a time, use fromId"
+            params["startTime"] = startTime
+        return params
+
+    def _next_params(self, params, page):
+        return {"limit": params["limit"], "fromId": int(page[-1][self.store.columns[0][1]]) + 1}
+
+    def _fetch(self, symbol):
+        if self.store.kind == "aggTrades":
+            return lambda params: self.client.get_agg_trades(symbol, from_id=params.get("fromId"),
+                                                             startTime=params.get("startTime"), limit=params["limit"])
+        return lambda params: self.client.get_recent_trades(symbol, from_id=params.get("fromId"), limit=params["limit"])
+
+    def update_symbol(self, symbol, fromId=None, startTime=None):
+        """ Archives the new trades of one symbol, returns how many were added """
+        pages = iter_pages(self._fetch(symbol), self._params(symbol, fromId, startTime), self._next_params,
+                           self.limit, self.prefetch)
+        buffer, added = [], 0
+        try:
+            for count, page in enumerate(pages, 1):
+                buffer.extend(page)
+                if len(buffer) >= self.store.segment_size:
+                    added += self.store.append(symbol, buffer)
+                    buffer = []
+                if self.max_pages is not None and count >= self.max_pages:
+                    break
+        finally:
+            pages.close()
+        return added + self.store.append(symbol, buffer)
+
+    def update(self, symbols, concurrency=4, fromId=None, startTime=None):
+        """ Archives the new trades of many symbols
+
+        Returns:
+            dict: symbol -> trades added, or the exception raised for that symbol
+        """
+        results = run_threaded(symbols, lambda symbol: self.update_symbol(symbol, fromId, startTime), concurrency)
+        return dict(zip(symbols, results))
+
+    async def aupdate_symbol(self, symbol, fromId=None, startTime=None):
+        """ update_symbol for an AsyncClient, the store is written from a thread to keep the loop free """
+        params = await asyncio.to_thread(self._params, symbol, fromId, startTime)
+        pages = aiter_pages(self._fetch(symbol), params, self._next_params, self.limit, self.prefetch)
+        buffer, added = [], 0
+        try:
+            count = 0
+            async for page in pages:
+                count += 1
+                buffer.extend(page)
+                if len(buffer) >= self.store.segment_size:
+                    added += await asyncio.to_thread(self.store.append, symbol, buffer)
+                    buffer = []
+                if self.max_pages is not None and count >= self.max_pages:
+                    break
+        finally:
+            await pages.aclose()
+        return added + await asyncio.to_thread(self.store.append, symbol, buffer)
+
+    async def aupdate(self, symbols, concurrency=4, fromId=None, startTime=None):
+        """ update for an AsyncClient """
+        results = await gather_bounded(symbols, lambda symbol: self.aupdate_symbol(symbol, fromId, startTime),
+                                       concurrency)
+        return dict(zip(symbols, results))
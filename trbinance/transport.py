@@ -0,0 +1,283 @@
+import datetime
+import gzip
+import inspect
+import json
+import threading
+from urllib.parse import urlsplit, parse_qsl
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+
+from .decoder import orjson
+from .metrics import instrument_adapter
+
+# parameters that differ on every call, left out when recordings are matched to requests
+VOLATILE_PARAMS = ["timestamp", "signature", "recvWindow"]
+
+NO_TIME = datetime.timedelta(0)
+
+
+class Response:
+    """ What the transports other than requests answer with, shaped like a requests.Response """
+    __slots__ = ("status_code", "headers", "content", "elapsed")
+
+    def __init__(self, status_code=200, headers=None, content=b"", elapsed=NO_TIME):
+        self.status_code = status_code
+        self.headers = headers if headers is not None else {}
+        self.content = content
+        self.elapsed = elapsed
+
+    @property
+    def status(self):
+        return self.status_code
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error", response=self)
+
+
+class Request:
+    """ A request as an in-process handler sees it, `params` merges the query string and the form body """
+    __slots__ = ("method", "url", "path", "params", "headers")
+
+    def __init__(self, method, url, params=None, data=None, headers=None):
+        split = urlsplit(str(url))
+        self.method = method
+        self.url = url
+        self.path = split.path
+        self.params = dict(parse_qsl(split.query)) if split.query else {}
+        if params:
+            self.params.update({key: str(value) for key, value in params.items() if value is not None})
+        if data:
+            if isinstance(data, dict):
+                self.params.update({key: str(value) for key, value in data.items() if value is not None})
+            else:
+                self.params.update(parse_qsl(data.decode() if isinstance(data, bytes) else data))
+        self.headers = headers or {}
+
+    def key(self):
+        # what a recording is matched on
+        params = tuple(sorted((k, v) for k, v in self.params.items() if k not in VOLATILE_PARAMS))
+        return self.method, self.path, params
+
+
+def _encode(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode()
+
+
+class Transport:
+    """
+    Sends the requests of a client. Client calls `request`, AsyncClient awaits `arequest`; both
+    get (method, url, params, data, headers) with the query string or form body already signed,
+    and return a response with status_code, headers and the whole body as `content`.
+    """
+    def request(self, method, url, params=None, data=None, headers=None, timer=None):
+        raise NotImplementedError
+
+    async def arequest(self, method, url, params=None, data=None, headers=None, timer=None):
+        return self.request(method, url, params, data, headers, timer)
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        self.close()
+
+
+class RequestsTransport(Transport):
+    """ HTTP through a requests session with one connection pool per base url, what Client uses by default """
+    def __init__(self, urls, pool_size=10, max_retries=0, instrument=False):
+        self.session = requests.Session()
+        for url in urls.values():
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=max_retries)
+            if instrument:
+                instrument_adapter(adapter)
+            self.session.mount(url, adapter)
+
+    def request(self, method, url, params=None, data=None, headers=None, timer=None):
+        if method == 'GET':
+            return self.session.get(url, params=params, headers=headers)
+        return self.session.post(url, data=data, headers=headers)
+
+    def close(self):
+        self.session.close()
+
+
+class AiohttpTransport(Transport):
+    """ HTTP through an aiohttp session, what AsyncClient uses by default
+
+    The session is created on first use, aiohttp sessions must be created inside a running event loop.
+    """
+    def __init__(self, headers=None, connector_kwargs=None, trace_configs=None):
+        self.headers = headers
+        self.connector_kwargs = connector_kwargs or {}
+        self.trace_configs = trace_configs
+        self.session = None
+
+    def get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(**self.connector_kwargs)
+            self.session = aiohttp.ClientSession(headers=self.headers, connector=connector,
+                                                 trace_configs=self.trace_configs)
+        return self.session
+
+    def request(self, method, url, params=None, data=None, headers=None, timer=None):
+        raise NotImplementedError("AiohttpTransport is async only, use arequest")
+
+    async def arequest(self, method, url, params=None, data=None, headers=None, timer=None):
+        session = self.get_session()
+        if method == 'GET':
+            context = session.get(url, params=params, headers=headers, trace_request_ctx=timer)
+        else:
+            context = session.post(url, data=data, headers=headers, trace_request_ctx=timer)
+        async with context as response:
+            return Response(response.status, response.headers, await response.read())
+
+    async def aclose(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class InProcessTransport(Transport):
+    """
+    Answers requests with a function in the same process, no sockets involved. Requests still go
+    through the real signing, routing, decoding and format_* code of the client.
+
+    `handler` is either a callable(Request) or a dict of "METHOD /path" (e.g. "GET /open/v1/orders")
+    to a payload or a callable(Request), like the stand-in server of the benchmarks. A handler
+    answers with a payload that is encoded as json, bytes, a (status, payload) tuple or a Response.
+    With AsyncClient the handler may also be a coroutine function.
+    """
+    def __init__(self, handler):
+        self.routes = None
+        if isinstance(handler, dict):
+            self.routes, handler = handler, self._route
+        self.handler = handler
+        self.requests = 0
+
+    def _route(self, request):
+        route = self.routes.get(f"{request.method} {request.path}")
+        if route is None:
+            return 404, {"code": -1, "msg": "not found"}
+        return route(request) if callable(route) else route
+
+    def _response(self, result):
+        if isinstance(result, Response):
+            return result
+        status = 200
+        if isinstance(result, tuple):
+            status, result = result
+        if isinstance(result, str):
+            result = result.encode()
+        return Response(status, {}, result if isinstance(result, bytes) else _encode(result))
+
+    def request(self, method, url, params=None, data=None, headers=None, timer=None):
+        self.requests += 1
+        return self._response(self.handler(Request(method, url, params, data, headers)))
+
+    async def arequest(self, method, url, params=None, data=None, headers=None, timer=None):
+        self.requests += 1
+        result = self.handler(Request(method, url, params, data, headers))
+        if inspect.isawaitable(result):
+            result = await result
+        return self._response(result)
+
+
+class RecordingTransport(Transport):
+    """
+    Passes requests on to another transport and writes every exchange to a gzip compressed json
+    lines file, for ReplayTransport to play back offline. Signatures, timestamps and the api key
+    header are not recorded.
+    """
+    def __init__(self, transport, path):
+        self.transport = transport
+        self.path = path
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    @property
+    def session(self):
+        return getattr(self.transport, "session", None)
+
+    def _record(self, method, url, params, data, response):
+        request = Request(method, url, params, data)
+        line = json.dumps({
+            "method": method, "path": request.path,
+            "params": {k: v for k, v in request.params.items() if k not in VOLATILE_PARAMS},
+            "status": response.status_code, "headers": dict(response.headers),
+            "body": response.content.decode("utf-8"),
+        })
+        with self._lock:
+            self._file.write(line + "\n")
+            self.recorded += 1
+
+    def request(self, method, url, params=None, data=None, headers=None, timer=None):
+        response = self.transport.request(method, url, params, data, headers, timer)
+        self._record(method, url, params, data, response)
+        return response
+
+    async def arequest(self, method, url, params=None, data=None, headers=None, timer=None):
+        response = await self.transport.arequest(method, url, params, data, headers, timer)
+        self._record(method, url, params, data, response)
+        return response
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        self.transport.close()
+
+    async def aclose(self):
+        with self._lock:
+            self._file.close()
+        await self.transport.aclose()
+
+
+class ReplayTransport(Transport):
+    """
+    Plays back a RecordingTransport file at full speed.
+
+    A request is answered with the next recorded response of the same method, path and parameters
+    (timestamps and signatures aside), in recorded order, starting over once they are used up.
+    Without an exact match the responses recorded for the method and path are used, unless `strict`.
+    """
+    def __init__(self, path, strict=False):
+        self.strict = strict
+        self.exact = {}
+        self.by_path = {}
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                item = json.loads(line)
+                response = Response(item["status"], item["headers"], item["body"].encode("utf-8"))
+                key = (item["method"], item["path"], tuple(sorted(item["params"].items())))
+                self.exact.setdefault(key, []).append(response)
+                self.by_path.setdefault(key[:2], []).append(response)
+        self._positions = {}
+        self.requests = 0
+        # the sync client sends from its thread pools
+        self._lock = threading.Lock()
+
+    def _next(self, key, responses):
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        return responses[position % len(responses)]
+
+    def request(self, method, url, params=None, data=None, headers=None, timer=None):
+        with self._lock:
+            self.requests += 1
+        key = Request(method, url, params, data).key()
+        responses = self.exact.get(key)
+        if responses is not None:
+            return self._next(key, responses)
+        responses = self.by_path.get(key[:2])
+        if responses is None or self.strict:
+            raise Exception(f"No recorded response for {method} {key[1]}")
+        return self._next(key[:2], responses)
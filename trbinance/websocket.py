@@ -0,0 +1,235 @@
+import asyncio
+import collections
+import json
+import logging
+
+import aiohttp
+
+from .defines import KLINE_INTERVALS
+from .helper import convert_symbol_convention_to
+
+STREAM_URL = "wss://stream-cloud.binance.me/stream"
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """ Messages of one or more streams, delivered through a bounded queue.
+
+    What happens when the consumer falls behind and the queue is full depends on `overflow`:
+    "drop_oldest" discards the oldest queued message, "drop_newest" discards the incoming one and
+    "block" stops reading from the socket until there is room, slowing down every subscriber.
+    """
+    def __init__(self, manager, streams, queue_size=1000, overflow="drop_oldest"):
+        assert overflow in ["drop_oldest", "drop_newest", "block"], "overflow must be either 'drop_oldest', 'drop_newest' or 'block'"
+        self.manager = manager
+        self.streams = streams
+        self.overflow = overflow
+        self.queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    async def _put(self, message):
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+        elif self.overflow == "block":
+            await self.queue.put(message)
+        elif self.overflow == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.put_nowait(message)
+            self.dropped += 1
+        else:
+            self.dropped += 1
+
+    async def get(self):
+        """ Returns the next message, {"stream": stream name, "data": payload} """
+        return await self.queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    async def close(self):
+        await self.manager.unsubscribe(self)
+
+
+class WebsocketClient:
+    """
+    Combined market data streams over a single websocket connection.
+
+    Streams are (un)subscribed with SUBSCRIBE/UNSUBSCRIBE messages, so subscriptions can change
+    while connected. When the connection drops it is reopened with exponential backoff and all active
+    streams are subscribed again. Pings from the server are answered by aiohttp, `heartbeat` makes
+    aiohttp ping the server too and close the connection when it stops answering. A malformed message
+    is logged and skipped, and (un)subscribe requests the server rejects are logged and kept in `errors`.
+    """
+    def __init__(self, client=None, url=STREAM_URL, heartbeat=20, reconnect_delay=1, max_reconnect_delay=60,
+                 queue_size=1000, overflow="drop_oldest"):
+        """
+        Args:
+            client (AsyncClient, optional): when given, symbols are converted with its markets routes.
+            url (str, optional): combined stream endpoint. Defaults to STREAM_URL.
+            heartbeat (float, optional): seconds between pings sent to the server. Defaults to 20.
+            reconnect_delay (float, optional): first delay before reconnecting, doubled on every failure. Defaults to 1.
+            max_reconnect_delay (float, optional): upper bound of the reconnect delay. Defaults to 60.
+            queue_size (int, optional): default queue size of subscriptions. Defaults to 1000.
+            overflow (str, optional): default overflow policy of subscriptions. Defaults to "drop_oldest".
+        """
+        self.client = client
+        self.url = url
+        self.heartbeat = heartbeat
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.subscribers = collections.defaultdict(list)
+        self.reconnects = 0
+        self.messages = 0
+        self.connected = asyncio.Event()
+        self._ws = None
+        self._session = None
+        self._task = None
+        self._closed = False
+        self._request_id = 0
+        # id -> (method, streams) of requests waiting for their reply
+        self._requests = {}
+        self.errors = collections.deque(maxlen=100)
+
+    def stream_symbol(self, symbol):
+        if self.client is not None and self.client.routes is not None and symbol in self.client.routes:
+            return self.client.routes[symbol]["depth"].symbol.lower()
+        return convert_symbol_convention_to(symbol).replace("_", "").lower()
+
+    async def start(self):
+        if self._task is None:
+            self._closed = False
+            self._session = aiohttp.ClientSession()
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def close(self):
+        self._closed = True
+        if self._ws is not None:
+            await self._ws.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while not self._closed:
+            try:
+                async with self._session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+                    self._ws = ws
+                    delay = self.reconnect_delay
+                    if self.subscribers:
+                        await self._send("SUBSCRIBE", list(self.subscribers))
+                    self.connected.set()
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await self._receive(msg.data)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                pass
+            except Exception:
+                logger.exception("websocket connection failed, reconnecting")
+            finally:
+                self._ws = None
+                self._requests.clear()
+                self.connected.clear()
+            if self._closed:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _receive(self, data):
+        # one bad message must not end the connection
+        try:
+            message = json.loads(data)
+        except ValueError:
+            logger.warning("skipped a malformed websocket message: %.200s", data)
+            return
+        try:
+            await self._dispatch(message)
+        except Exception:
+            logger.exception("failed to dispatch a websocket message: %.200s", data)
+
+    async def _dispatch(self, message):
+        stream = message.get("stream")
+        if stream is None:
+            # reply to a (un)subscribe request, {"result": null, "id": 1} when it went through
+            method, streams = self._requests.pop(message.get("id"), (None, None))
+            if message.get("error") is not None:
+                self.errors.append({"id": message.get("id"), "method": method, "streams": streams,
+                                    "error": message["error"]})
+                logger.warning("websocket %s %s failed: %s", method, streams, message["error"])
+            return
+        self.messages += 1
+        for subscription in self.subscribers.get(stream, ()):
+            await subscription._put(message)
+
+    async def _send(self, method, streams):
+        if self._ws is None or self._ws.closed:
+            return  # sent on (re)connect
+        self._request_id += 1
+        self._requests[self._request_id] = (method, streams)
+        await self._ws.send_json({"method": method, "params": streams, "id": self._request_id})
+
+    async def subscribe(self, *streams, queue_size=None, overflow=None):
+        """ Subscribes to raw stream names, e.g. "btctry@trade" """
+        await self.start()
+        subscription = Subscription(self, list(streams), queue_size or self.queue_size, overflow or self.overflow)
+        new_streams = [stream for stream in streams if not self.subscribers.get(stream)]
+        for stream in streams:
+            self.subscribers[stream].append(subscription)
+        if new_streams:
+            await self._send("SUBSCRIBE", new_streams)
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        old_streams = []
+        for stream in subscription.streams:
+            subscribers = self.subscribers.get(stream, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self.subscribers.pop(stream, None)
+                old_streams.append(stream)
+        if old_streams:
+            await self._send("UNSUBSCRIBE", old_streams)
+
+    async def depth(self, symbols, levels=None, speed="100ms", **kwargs):
+        """ Depth diffs, or partial book snapshots of 5, 10 or 20 `levels` """
+        channel = f"depth{levels or ''}@{speed}"
+        return await self.subscribe(*self._streams(symbols, channel), **kwargs)
+
+    async def trades(self, symbols, **kwargs):
+        return await self.subscribe(*self._streams(symbols, "trade"), **kwargs)
+
+    async def agg_trades(self, symbols, **kwargs):
+        return await self.subscribe(*self._streams(symbols, "aggTrade"), **kwargs)
+
+    async def klines(self, symbols, interval, **kwargs):
+        assert interval in KLINE_INTERVALS, "Invalid interval. Valid intervals: " + ", ".join(KLINE_INTERVALS) + "."
+        return await self.subscribe(*self._streams(symbols, f"kline_{interval}"), **kwargs)
+
+    def _streams(self, symbols, channel):
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        return [f"{self.stream_symbol(symbol)}@{channel}" for symbol in symbols]